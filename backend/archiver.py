@@ -0,0 +1,85 @@
+"""Background compactor that moves completed timers out of the hot store"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Optional
+
+
+logger = logging.getLogger(__name__)
+
+ArchiveBatch = Callable[[datetime, int], Awaitable[int]]
+Purge = Callable[[datetime], Awaitable[int]]
+
+
+class TimerArchiver:
+    """Moves timers completed more than `grace` seconds ago to the archive.
+
+    Each pass archives in batches of `batch_size` until no candidates are
+    left, then drops archived timers older than `retention_days` (none when
+    it is 0) and delete tombstones older than `tombstone_days`. Passes run
+    every `interval` seconds; every worker may run one, since moving a
+    timer twice is harmless.
+    """
+
+    def __init__(self, archive: ArchiveBatch, purge: Purge, grace: float = 3600.0,
+                 interval: float = 300.0, batch_size: int = 500, retention_days: float = 0,
+                 purge_tombstones: Optional[Purge] = None, tombstone_days: float = 7):
+        self._archive = archive
+        self._purge = purge
+        self._grace = grace
+        self._interval = interval
+        self._batch_size = batch_size
+        self._retention_days = retention_days
+        self._purge_tombstones = purge_tombstones
+        self._tombstone_days = tombstone_days
+        self._task: Optional[asyncio.Task] = None
+        self.archived = 0
+        self.purged = 0
+        self.tombstones_purged = 0
+
+    async def run_once(self, grace: Optional[float] = None) -> Dict[str, int]:
+        now = datetime.utcnow()
+        cutoff = now - timedelta(seconds=self._grace if grace is None else grace)
+        archived = 0
+        while True:
+            moved = await self._archive(cutoff, self._batch_size)
+            archived += moved
+            if moved < self._batch_size:
+                break
+
+        purged = 0
+        if self._retention_days > 0:
+            purged = await self._purge(now - timedelta(days=self._retention_days))
+
+        tombstones = 0
+        if self._purge_tombstones is not None:
+            tombstones = await self._purge_tombstones(now - timedelta(days=self._tombstone_days))
+
+        self.archived += archived
+        self.purged += purged
+        self.tombstones_purged += tombstones
+        return {"archived": archived, "purged": purged, "tombstones": tombstones}
+
+    async def start(self):
+        if self._interval > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self._interval)
+            try:
+                result = await self.run_once()
+                if any(result.values()):
+                    logger.info("Archived %(archived)d timers, purged %(purged)d and %(tombstones)d tombstones",
+                                result)
+            except Exception:
+                logger.exception("Timer archival pass failed")
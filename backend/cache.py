@@ -0,0 +1,91 @@
+"""Per-worker snapshot cache kept coherent through a version stamp in Mongo"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Generic, List, Optional, Tuple, TypeVar
+
+
+T = TypeVar("T")
+
+
+class SnapshotCache(Generic[T]):
+    """Caches a whole small collection in memory.
+
+    Within `ttl` seconds of the last load or revalidation, reads are served
+    without touching the database. After that, the shared version stamp is
+    read; if no worker bumped it the snapshot is kept, otherwise it is
+    reloaded. Writers call `invalidate` locally and bump the stamp so other
+    workers converge within one TTL.
+    """
+
+    def __init__(self, load: Callable[[], Awaitable[List[T]]],
+                 read_version: Callable[[], Awaitable[int]],
+                 key: Callable[[T], str], ttl: float = 60.0):
+        self._load = load
+        self._read_version = read_version
+        self._key = key
+        self._ttl = ttl
+        self._lock = asyncio.Lock()
+        self._items: Optional[List[T]] = None
+        self._by_key: Dict[str, T] = {}
+        self._version: Optional[int] = None
+        self._checked_at = 0.0
+        self._encoded: Optional[Tuple[List[T], bytes]] = None
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+
+    def invalidate(self):
+        self._items = None
+        self._version = None
+
+    async def _snapshot(self) -> List[T]:
+        if self._items is not None and time.monotonic() - self._checked_at < self._ttl:
+            self.hits += 1
+            return self._items
+
+        async with self._lock:
+            # Another request may have refreshed while we waited
+            if self._items is not None and time.monotonic() - self._checked_at < self._ttl:
+                self.hits += 1
+                return self._items
+
+            version = await self._read_version()
+            if self._items is not None and version == self._version:
+                self.revalidations += 1
+            else:
+                self.misses += 1
+                items = await self._load()
+                self._items = items
+                self._by_key = {self._key(item): item for item in items}
+                self._version = version
+            self._checked_at = time.monotonic()
+            return self._items
+
+    async def get_all(self) -> List[T]:
+        return list(await self._snapshot())
+
+    async def get_encoded(self, encode: Callable[[List[T]], bytes]) -> bytes:
+        """The whole snapshot run through `encode`, redone only when the snapshot is reloaded"""
+        items = await self._snapshot()
+        if self._encoded is None or self._encoded[0] is not items:
+            self._encoded = (items, encode(items))
+        return self._encoded[1]
+
+    async def version(self) -> Optional[int]:
+        """Version stamp of the snapshot `get_all` would return now"""
+        await self._snapshot()
+        return self._version
+
+    async def get(self, key: str) -> Optional[T]:
+        await self._snapshot()
+        return self._by_key.get(key)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidations": self.revalidations,
+            "size": len(self._by_key) if self._items is not None else 0,
+            "version": self._version,
+            "ttl_seconds": self._ttl,
+        }
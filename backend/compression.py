@@ -0,0 +1,23 @@
+"""Gzip for large responses, leaving event streams uncompressed"""
+from typing import Sequence
+
+from starlette.middleware.gzip import GZipMiddleware
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """Starlette's gzip middleware minus the paths listed in `exclude`
+
+    Gzip holds output back until its compressor block fills, which would
+    delay Server-Sent Events indefinitely, so streams opt out by path.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, compresslevel: int = 6,
+                 exclude: Sequence[str] = ()):
+        super().__init__(app, minimum_size=minimum_size, compresslevel=compresslevel)
+        self._exclude = frozenset(exclude)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] in self._exclude:
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
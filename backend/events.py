@@ -0,0 +1,70 @@
+"""In-process pub/sub hub that fans timer events out to stream subscribers"""
+import asyncio
+import json
+from typing import Any, Dict, Optional, Set
+
+
+def _frame(event_type: str, data: Any) -> str:
+    return f"event: {event_type}\ndata: {json.dumps(data)}\n\n"
+
+
+class Subscription:
+    """A bounded queue of pre-encoded Server-Sent Event frames.
+
+    When a slow consumer lets the queue fill up, its backlog is dropped and
+    replaced by a single ``resync`` event so it can refetch the full list
+    instead of holding an unbounded amount of memory on the server.
+    """
+
+    def __init__(self, user_id: str, queue_size: int):
+        self.user_id = user_id
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+
+    def offer(self, frame: str):
+        try:
+            self._queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            self.dropped += self._queue.qsize()
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            self._queue.put_nowait(_frame("resync", {"dropped": self.dropped}))
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[str]:
+        """Next frame, or None if nothing arrived within `timeout` seconds"""
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class EventHub:
+    """Subscribers grouped by tenant; events only reach their own tenant"""
+
+    def __init__(self, queue_size: int = 100):
+        self._queue_size = queue_size
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+
+    def __len__(self) -> int:
+        return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def subscribe(self, user_id: str) -> Subscription:
+        subscription = Subscription(user_id, self._queue_size)
+        self._subscribers.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscribers = self._subscribers.get(subscription.user_id)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.user_id]
+
+    def publish(self, user_id: str, event_type: str, data: Any):
+        """Encode an event once and enqueue it for the tenant's subscribers without blocking"""
+        subscribers = self._subscribers.get(user_id)
+        if not subscribers:
+            return
+        frame = _frame(event_type, data)
+        for subscription in list(subscribers):
+            subscription.offer(frame)
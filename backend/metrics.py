@@ -0,0 +1,184 @@
+"""Dependency-free Prometheus metrics: counters, histograms, gauges and the text exposition"""
+import bisect
+import functools
+import inspect
+import time
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+LabelValues = Tuple[str, ...]
+
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self) -> Iterable[str]:
+        for labels, value in sorted(self._values.items()):
+            yield f"{self.name}{_labels(self.label_names, labels)} {_number(value)}"
+
+
+class Histogram:
+    """Cumulative-bucket histogram; each series keeps one count per bucket"""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = REQUEST_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, *labels: str):
+        # Per-bucket counts plus the sum; made cumulative when rendered
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def samples(self) -> Iterable[str]:
+        for labels, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = _labels(self.label_names, labels, f'le="{_number(bound)}"')
+                yield f"{self.name}_bucket{le} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.label_names, labels)} {_number(series[-1])}"
+            yield f"{self.name}_count{_labels(self.label_names, labels)} {cumulative}"
+
+
+class Gauge:
+    """Value read at scrape time from an async callback"""
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, read: Callable[[], Awaitable[float]]):
+        self.name = name
+        self.documentation = documentation
+        self.read = read
+        self._value: Optional[float] = None
+
+    async def collect(self):
+        self._value = await self.read()
+
+    def samples(self) -> Iterable[str]:
+        if self._value is not None:
+            yield f"{self.name} {_number(self._value)}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labels))
+
+    def histogram(self, name: str, documentation: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = REQUEST_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def gauge(self, name: str, documentation: str, read: Callable[[], Awaitable[float]]) -> Gauge:
+        return self.register(Gauge(name, documentation, read))
+
+    async def render(self) -> str:
+        """Every metric in the Prometheus text exposition format (0.0.4)"""
+        lines = []
+        for metric in self._metrics:
+            if isinstance(metric, Gauge):
+                await metric.collect()
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request count and latency per route template
+
+    The route is read from the endpoint the router stored in the scope, so
+    `/api/timers/{timer_id}` is one series however many ids are requested;
+    paths that match no route share the "unmatched" label.
+    """
+
+    def __init__(self, app, requests: Histogram, routes: Callable[[], Dict[Callable, str]]):
+        self.app = app
+        self.requests = requests
+        self._routes = routes
+        self._paths: Optional[Dict[Callable, str]] = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = ["500"]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = str(message["status"])
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            if self._paths is None:
+                self._paths = self._routes()
+            route = self._paths.get(scope.get("endpoint"), "unmatched")
+            self.requests.observe(time.perf_counter() - start, scope["method"], route, status[0])
+
+
+def instrument(target, histogram: Histogram, *labels: str):
+    """Wrap every public coroutine method of `target` to time it into `histogram`
+
+    Observations are labelled with `labels` followed by the method name.
+    """
+    for name, method in inspect.getmembers(target, inspect.iscoroutinefunction):
+        if name.startswith("_"):
+            continue
+        setattr(target, name, _timed(method, histogram, labels + (name,)))
+    return target
+
+
+def _timed(method, histogram: Histogram, labels: LabelValues):
+    @functools.wraps(method)
+    async def timed(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await method(*args, **kwargs)
+        finally:
+            histogram.observe(time.perf_counter() - start, *labels)
+    return timed
@@ -0,0 +1,200 @@
+"""Pydantic models and timer-state helpers shared by the API and storage backends"""
+from pydantic import BaseModel, Field
+from typing import List, Optional, Dict
+import math
+import uuid
+from datetime import date, datetime, timedelta
+from enum import Enum
+
+
+# Timer Status Enum
+class TimerStatus(str, Enum):
+    STOPPED = "stopped"
+    RUNNING = "running"
+    PAUSED = "paused"
+    COMPLETED = "completed"
+
+ACTIVE_STATUSES = [TimerStatus.STOPPED.value, TimerStatus.RUNNING.value, TimerStatus.PAUSED.value]
+
+# Tenant of requests that name none, and of data stored before tenants existed
+DEFAULT_USER_ID = "default"
+
+
+# Timer Models
+class TimerTemplate(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    user_id: str = DEFAULT_USER_ID
+    name: str
+    duration_minutes: int
+    description: str
+    category: str
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+class TimerTemplateCreate(BaseModel):
+    name: str
+    duration_minutes: int
+    description: str
+    category: str
+
+class Timer(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    user_id: str = DEFAULT_USER_ID
+    name: str
+    duration_seconds: int
+    remaining_seconds: int
+    status: TimerStatus = TimerStatus.STOPPED
+    started_at: Optional[datetime] = None
+    paused_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    ends_at: Optional[datetime] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    category: str = "general"
+    template_id: Optional[str] = None
+    # Set by every write; timers stored before it existed have none
+    updated_at: Optional[datetime] = None
+
+class TimerCreate(BaseModel):
+    name: str
+    duration_seconds: int
+    category: str = "general"
+    template_id: Optional[str] = None
+
+class TimerUpdate(BaseModel):
+    name: Optional[str] = None
+    remaining_seconds: Optional[int] = None
+    status: Optional[TimerStatus] = None
+
+class TimerSession(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    user_id: str = DEFAULT_USER_ID
+    timer_id: str
+    timer_name: str
+    category: str
+    duration_seconds: int
+    completed_seconds: int
+    started_at: datetime
+    completed_at: Optional[datetime] = None
+    session_date: datetime = Field(default_factory=datetime.utcnow)
+
+class BulkOperationType(str, Enum):
+    CREATE = "create"
+    UPDATE = "update"
+    DELETE = "delete"
+
+class TimerBulkOperation(BaseModel):
+    op: BulkOperationType
+    id: Optional[str] = None
+    timer: Optional[TimerCreate] = None
+    update: Optional[TimerUpdate] = None
+
+class TimerBulkRequest(BaseModel):
+    operations: List[TimerBulkOperation] = Field(..., max_length=500)
+
+class TimerBulkResult(BaseModel):
+    index: int
+    op: BulkOperationType
+    status_code: int
+    id: Optional[str] = None
+    timer: Optional[Timer] = None
+    detail: Optional[str] = None
+
+class TimerStats(BaseModel):
+    total_sessions: int
+    total_time_seconds: int
+    categories: Dict[str, int]
+    today_sessions: int
+    today_time_seconds: int
+    average_session_duration: float
+
+class DistributionSummary(BaseModel):
+    count: int
+    mean: Optional[float] = None
+    p50: Optional[float] = None
+    p90: Optional[float] = None
+    p99: Optional[float] = None
+
+class MetricDistribution(BaseModel):
+    overall: DistributionSummary
+    categories: Dict[str, DistributionSummary]
+
+class TimerDistribution(BaseModel):
+    relative_accuracy: float
+    duration_seconds: MetricDistribution
+    completion_ratio: MetricDistribution
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+class StatsGranularity(str, Enum):
+    HOUR = "hour"
+    DAY = "day"
+    WEEK = "week"
+
+class TimerStatsBucket(BaseModel):
+    start: datetime
+    sessions: int
+    time_seconds: int
+    categories: Dict[str, int]
+
+class TimerChanges(BaseModel):
+    timers: List[Timer]
+    deleted: List[str]
+    token: str
+
+class TimerStatsRange(BaseModel):
+    start: datetime
+    end: datetime
+    granularity: StatsGranularity
+    tz: str
+    total_sessions: int
+    total_time_seconds: int
+    buckets: List[TimerStatsBucket]
+
+class ReportPeriod(str, Enum):
+    WEEK = "week"
+    MONTH = "month"
+
+class ReportPeriodSummary(BaseModel):
+    start: datetime
+    sessions: int
+    time_seconds: int
+    # Change from the period before; the ratio is None when that one was empty
+    delta_seconds: int
+    delta_ratio: Optional[float] = None
+
+class ReportDay(BaseModel):
+    date: date
+    sessions: int
+    time_seconds: int
+    rolling_average_seconds: float
+
+class CategoryShare(BaseModel):
+    sessions: int
+    time_seconds: int
+    share: float
+
+class TimerReport(BaseModel):
+    period: ReportPeriod
+    tz: str
+    start: datetime
+    end: datetime
+    window_days: int
+    total_sessions: int
+    total_time_seconds: int
+    periods: List[ReportPeriodSummary]
+    days: List[ReportDay]
+    categories: Dict[str, CategoryShare]
+    # Seconds per local weekday (Monday first) and hour of day
+    heatmap: List[List[int]]
+
+
+# Timer deadlines
+def deadline_after(now: datetime, seconds: int) -> datetime:
+    """Deadline `seconds` from now, truncated to Mongo's millisecond precision"""
+    deadline = now + timedelta(seconds=seconds)
+    return deadline.replace(microsecond=deadline.microsecond // 1000 * 1000)
+
+def remaining_until(ends_at: datetime, now: Optional[datetime] = None) -> int:
+    now = now or datetime.utcnow()
+    return max(0, math.ceil((ends_at - now).total_seconds()))
@@ -0,0 +1,187 @@
+"""Opt-in per-request profiling: cProfile plus an account of every storage and database call"""
+import asyncio
+import cProfile
+import functools
+import inspect
+import json
+import pstats
+import re
+import time
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+class RequestProfile:
+    """Calls made on behalf of one profiled request"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        # Storage calls are repository methods; database calls are the Motor
+        # commands they issue, which arrive from Motor's executor threads
+        self.storage_calls: List[dict] = []
+        self.db_calls: List[dict] = []
+
+    def _call(self, collection: str, operation: str, seconds: float) -> dict:
+        return {
+            "collection": collection,
+            "operation": operation,
+            "ms": round(seconds * 1000, 3),
+            "at_ms": round((time.perf_counter() - self.start - seconds) * 1000, 3),
+        }
+
+    def record_storage(self, collection: str, operation: str, seconds: float):
+        self.storage_calls.append(self._call(collection, operation, seconds))
+
+    def record_db(self, collection: str, operation: str, seconds: float):
+        self.db_calls.append(self._call(collection, operation, seconds))
+
+
+# Set only for the duration of a profiled request
+current_profile: ContextVar[Optional[RequestProfile]] = ContextVar("current_profile", default=None)
+
+
+def record_db_call(collection: str, operation: str, seconds: float):
+    """Database command hook; a no-op outside profiled requests"""
+    profile = current_profile.get()
+    if profile is not None:
+        profile.record_db(collection, operation, seconds)
+
+
+def record_calls(target, collection: str):
+    """Wrap every public coroutine method of `target` to record into the current profile"""
+    for name, method in inspect.getmembers(target, inspect.iscoroutinefunction):
+        if name.startswith("_"):
+            continue
+        setattr(target, name, _recorded(method, collection, name))
+    return target
+
+
+def _recorded(method, collection: str, operation: str):
+    @functools.wraps(method)
+    async def recorded(*args, **kwargs):
+        profile = current_profile.get()
+        if profile is None:
+            return await method(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return await method(*args, **kwargs)
+        finally:
+            profile.record_storage(collection, operation, time.perf_counter() - start)
+    return recorded
+
+
+def _totals(calls: List[dict]) -> dict:
+    by_operation: Dict[str, dict] = {}
+    for call in calls:
+        totals = by_operation.setdefault(f"{call['collection']}.{call['operation']}", {"calls": 0, "ms": 0.0})
+        totals["calls"] += 1
+        totals["ms"] = round(totals["ms"] + call["ms"], 3)
+    return {
+        "calls": len(calls),
+        "ms": round(sum(call["ms"] for call in calls), 3),
+        "by_operation": by_operation,
+    }
+
+
+def _functions(profiler: cProfile.Profile, limit: int) -> List[dict]:
+    """The `limit` functions with the most cumulative time"""
+    stats = pstats.Stats(profiler).stats
+    ranked = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+    return [
+        {
+            "function": f"{Path(filename).name}:{line}({name})",
+            "calls": calls,
+            "own_ms": round(own * 1000, 3),
+            "cumulative_ms": round(cumulative * 1000, 3),
+        }
+        for (filename, line, name), (_, calls, own, cumulative, _) in ranked
+    ]
+
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling requests that carry the `header` request header
+
+    When `token` is set the header has to equal it. The profiled request
+    gets an X-Profile-Report header with the storage and database call
+    totals and the hottest functions up to the moment the response starts.
+    With `output_dir` the full report, listing every call, is also written
+    there along with the raw cProfile stats, named in X-Profile-File.
+
+    cProfile traces the whole thread, so profiled requests run one at a
+    time, and other requests the event loop serves meanwhile show up in
+    the function list; storage and database calls are attributed exactly.
+    Requests without the header only pay for the header lookup.
+    """
+
+    def __init__(self, app, header: str = "X-Profile", token: Optional[str] = None,
+                 output_dir: Optional[str] = None, header_functions: int = 10, report_functions: int = 50):
+        self.app = app
+        self._header = header.lower().encode()
+        self._token = token
+        self._output_dir = Path(output_dir) if output_dir else None
+        self._header_functions = header_functions
+        self._report_functions = report_functions
+        self._lock = asyncio.Lock()
+
+    def _requested(self, scope) -> bool:
+        for name, value in scope["headers"]:
+            if name == self._header:
+                value = value.decode("latin-1")
+                return value == self._token if self._token else value.lower() in ('1', 'true', 'yes')
+        return False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        async with self._lock:
+            profile = RequestProfile()
+            profiler = cProfile.Profile()
+            started_at = datetime.utcnow()
+            status = [500]
+            filename = None
+            if self._output_dir is not None:
+                slug = re.sub(r"[^A-Za-z0-9]+", "-", scope["path"]).strip("-")
+                filename = f"{started_at.strftime('%Y%m%dT%H%M%S%f')}-{scope['method']}-{slug}"
+
+            async def send_with_report(message):
+                if message["type"] == "http.response.start":
+                    profiler.disable()
+                    status[0] = message["status"]
+                    report = self._report(scope, profile, profiler, self._header_functions)
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-profile-report", json.dumps(report, separators=(",", ":")).encode()))
+                    if filename:
+                        headers.append((b"x-profile-file", f"{filename}.json".encode()))
+                    message = {**message, "headers": headers}
+                    profiler.enable()
+                await send(message)
+
+            token = current_profile.set(profile)
+            profiler.enable()
+            try:
+                await self.app(scope, receive, send_with_report)
+            finally:
+                profiler.disable()
+                current_profile.reset(token)
+                if filename:
+                    report = self._report(scope, profile, profiler, self._report_functions)
+                    report.update(started_at=started_at.isoformat(), status=status[0],
+                                  storage_calls=profile.storage_calls, db_calls=profile.db_calls)
+                    self._output_dir.mkdir(parents=True, exist_ok=True)
+                    (self._output_dir / f"{filename}.json").write_text(json.dumps(report, indent=2))
+                    profiler.dump_stats(str(self._output_dir / f"{filename}.prof"))
+
+    @staticmethod
+    def _report(scope, profile: RequestProfile, profiler: cProfile.Profile, functions: int) -> dict:
+        return {
+            "method": scope["method"],
+            "path": scope["path"],
+            "duration_ms": round((time.perf_counter() - profile.start) * 1000, 3),
+            "storage": _totals(profile.storage_calls),
+            "db": _totals(profile.db_calls),
+            "functions": _functions(profiler, functions),
+        }
@@ -0,0 +1,135 @@
+"""Weekly and monthly productivity reports, computed with NumPy over columns of sessions"""
+from datetime import datetime, timedelta
+from typing import Tuple
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pandas as pd
+
+from models import CategoryShare, ReportDay, ReportPeriod, ReportPeriodSummary, TimerReport
+from storage import SessionColumns
+
+
+HOURS_PER_WEEK = 7 * 24
+
+
+def period_start(moment: datetime, period: ReportPeriod) -> datetime:
+    """Midnight starting the week (from Monday) or month containing `moment`"""
+    day = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if period == ReportPeriod.WEEK:
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def shift_period(start: datetime, period: ReportPeriod, count: int) -> datetime:
+    if period == ReportPeriod.WEEK:
+        return start + timedelta(weeks=count)
+    month = start.month - 1 + count
+    return start.replace(year=start.year + month // 12, month=month % 12 + 1)
+
+
+def report_range(now: datetime, period: ReportPeriod, periods: int,
+                 window: int) -> Tuple[datetime, datetime, datetime]:
+    """Local (fetch_from, start, end) of the `periods` periods ending with the one holding `now`
+
+    Sessions are read from one period before `start`, or `window - 1` days
+    before it if that is further back, so the first period has a delta and
+    the first day a full rolling window.
+    """
+    end = shift_period(period_start(now, period), period, 1)
+    start = shift_period(end, period, -periods)
+    fetch_from = min(shift_period(start, period, -1), start - timedelta(days=window - 1))
+    return fetch_from, start, end
+
+
+def build_report(columns: SessionColumns, period: ReportPeriod, tz: str, periods: int, window: int,
+                 now: datetime) -> TimerReport:
+    """Report over `columns`, as read for report_range(now, period, periods, window)
+
+    `now` is local wall time in `tz`. Every breakdown is a bincount over
+    integer day, hour, period or category codes, so the cost is a few passes
+    over flat arrays whatever the number of sessions.
+    """
+    zone = ZoneInfo(tz)
+    fetch_from, start, end = report_range(now, period, periods, window)
+
+    # Naive UTC to naive local wall time
+    local = pd.to_datetime(columns.session_date).tz_localize("UTC").tz_convert(tz) \
+        .tz_localize(None).to_numpy().astype("datetime64[s]")
+    seconds = np.asarray(columns.completed_seconds, dtype=np.int64)
+    categories = np.asarray(columns.category, dtype=object)
+    fetched = (local >= np.datetime64(fetch_from, "s")) & (local < np.datetime64(end, "s"))
+    local, seconds, categories = local[fetched], seconds[fetched], categories[fetched]
+
+    # Daily totals from fetch_from on, with a trailing rolling mean
+    days = local.astype("datetime64[D]")
+    first_day = np.datetime64(fetch_from.date(), "D")
+    day_index = (days - first_day).astype(np.int64)
+    day_count = (end.date() - fetch_from.date()).days
+    daily_seconds = np.bincount(day_index, weights=seconds, minlength=day_count)
+    daily_sessions = np.bincount(day_index, minlength=day_count)
+    rolling = pd.Series(daily_seconds).rolling(window, min_periods=1).mean().to_numpy()
+
+    # Periods from the one before `start`, so each reported one has a predecessor
+    previous = shift_period(start, period, -1)
+    if period == ReportPeriod.WEEK:
+        period_index = (days - np.datetime64(previous.date(), "D")).astype(np.int64) // 7
+    else:
+        period_index = (local.astype("datetime64[M]") - np.datetime64(previous, "M")).astype(np.int64)
+    counted = period_index >= 0
+    period_seconds = np.bincount(period_index[counted], weights=seconds[counted], minlength=periods + 1)
+    period_sessions = np.bincount(period_index[counted], minlength=periods + 1)
+    deltas = np.diff(period_seconds)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratios = np.where(period_seconds[:-1] > 0, deltas / period_seconds[:-1], np.nan)
+
+    # Heatmap and category shares cover the reported periods only
+    reported = local >= np.datetime64(start, "s")
+    hour_of_week = ((days[reported].astype(np.int64) + 3) % 7) * 24 \
+        + (local[reported] - days[reported]).astype("timedelta64[h]").astype(np.int64)
+    heatmap = np.bincount(hour_of_week, weights=seconds[reported], minlength=HOURS_PER_WEEK)
+    codes, names = pd.factorize(categories[reported])
+    category_seconds = np.bincount(codes, weights=seconds[reported], minlength=len(names))
+    category_sessions = np.bincount(codes, minlength=len(names))
+
+    total_sessions = int(period_sessions[1:].sum())
+    total_seconds = int(period_seconds[1:].sum())
+    first_reported = (start.date() - fetch_from.date()).days
+    last_reported = (now.date() - fetch_from.date()).days + 1
+    return TimerReport(
+        period=period,
+        tz=tz,
+        start=start.replace(tzinfo=zone),
+        end=end.replace(tzinfo=zone),
+        window_days=window,
+        total_sessions=total_sessions,
+        total_time_seconds=total_seconds,
+        periods=[
+            ReportPeriodSummary(
+                start=shift_period(start, period, index).replace(tzinfo=zone),
+                sessions=int(period_sessions[index + 1]),
+                time_seconds=int(period_seconds[index + 1]),
+                delta_seconds=int(deltas[index]),
+                delta_ratio=None if np.isnan(ratios[index]) else float(ratios[index])
+            )
+            for index in range(periods)
+        ],
+        days=[
+            ReportDay(
+                date=fetch_from.date() + timedelta(days=index),
+                sessions=int(daily_sessions[index]),
+                time_seconds=int(daily_seconds[index]),
+                rolling_average_seconds=float(rolling[index])
+            )
+            for index in range(first_reported, last_reported)
+        ],
+        categories={
+            name: CategoryShare(
+                sessions=int(count),
+                time_seconds=int(total),
+                share=float(total / total_seconds) if total_seconds else 0.0
+            )
+            for name, count, total in zip(names, category_sessions, category_seconds)
+        },
+        heatmap=heatmap.astype(np.int64).reshape(7, 24).tolist()
+    )
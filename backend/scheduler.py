@@ -0,0 +1,116 @@
+"""In-process deadline scheduler that completes running timers on expiry"""
+import asyncio
+import heapq
+import logging
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+# Timers are identified by (user_id, timer_id), which is also the shard key
+TimerKey = Tuple[str, str]
+ExpiryCallback = Callable[[str, str, datetime], Awaitable[None]]
+DeadlineLoader = Callable[[Optional[datetime]], Awaitable[Iterable[Tuple[str, str, datetime]]]]
+
+
+class TimerScheduler:
+    """Min-heap of (deadline, (user_id, timer_id)) drained by a single background task.
+
+    Cancelled or rescheduled entries are left in the heap and skipped when
+    popped; the heap is compacted once stale entries outnumber live ones.
+    The loader is called with ``None`` at startup to pick up every running
+    timer, then periodically with a horizon to adopt timers whose owning
+    worker went away.
+    """
+
+    def __init__(self, on_expire: ExpiryCallback, loader: DeadlineLoader,
+                 resync_interval: float = 30.0):
+        self._on_expire = on_expire
+        self._loader = loader
+        self._resync_interval = resync_interval
+        self._heap: List[Tuple[datetime, TimerKey]] = []
+        self._deadlines: Dict[TimerKey, datetime] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def schedule(self, user_id: str, timer_id: str, deadline: datetime):
+        """Arm (or re-arm) the expiry of a timer"""
+        key = (user_id, timer_id)
+        self._deadlines[key] = deadline
+        heapq.heappush(self._heap, (deadline, key))
+        if len(self._heap) > 2 * len(self._deadlines) + 64:
+            self._compact()
+        if self._wakeup is not None and self._heap[0] == (deadline, key):
+            self._wakeup.set()
+
+    def cancel(self, user_id: str, timer_id: str):
+        """Disarm a timer; its heap entry is discarded lazily"""
+        self._deadlines.pop((user_id, timer_id), None)
+
+    async def start(self):
+        self._wakeup = asyncio.Event()
+        await self._resync(None)
+        self._task = asyncio.create_task(self._run())
+        logger.info("Timer scheduler started with %d running timers", len(self))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _compact(self):
+        self._heap = [(deadline, key) for key, deadline in self._deadlines.items()]
+        heapq.heapify(self._heap)
+
+    def _pop_due(self, now: datetime) -> List[Tuple[TimerKey, datetime]]:
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            deadline, key = heapq.heappop(self._heap)
+            if self._deadlines.get(key) == deadline:
+                del self._deadlines[key]
+                due.append((key, deadline))
+        return due
+
+    async def _resync(self, horizon: Optional[datetime]):
+        for user_id, timer_id, deadline in await self._loader(horizon):
+            if self._deadlines.get((user_id, timer_id)) != deadline:
+                self.schedule(user_id, timer_id, deadline)
+
+    async def _run(self):
+        next_resync = datetime.utcnow() + timedelta(seconds=self._resync_interval)
+        while True:
+            now = datetime.utcnow()
+            for (user_id, timer_id), deadline in self._pop_due(now):
+                try:
+                    await self._on_expire(user_id, timer_id, deadline)
+                except Exception:
+                    logger.exception("Failed to complete expired timer %s", timer_id)
+
+            if now >= next_resync:
+                next_resync = now + timedelta(seconds=self._resync_interval)
+                try:
+                    await self._resync(next_resync)
+                except Exception:
+                    logger.exception("Timer scheduler resync failed")
+
+            wait_until = next_resync
+            if self._heap and self._heap[0][0] < wait_until:
+                wait_until = self._heap[0][0]
+            timeout = max(0.0, (wait_until - datetime.utcnow()).total_seconds())
+
+            # A plain Event.wait() with a timer instead of asyncio.wait_for,
+            # which can swallow a cancel that races with the event being set
+            self._wakeup.clear()
+            alarm = asyncio.get_running_loop().call_later(timeout, self._wakeup.set)
+            try:
+                await self._wakeup.wait()
+            finally:
+                alarm.cancel()
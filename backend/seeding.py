@@ -0,0 +1,100 @@
+"""Default timer templates, seeded into each tenant with one bulk upsert"""
+import hashlib
+import json
+import uuid
+from typing import Awaitable, Callable, Iterable, List, Set
+
+from models import TimerTemplate, TimerTemplateCreate
+from storage import VersionRepository
+
+
+DEFAULT_TEMPLATES = [
+    TimerTemplateCreate(
+        name="Pomodoro Work",
+        duration_minutes=25,
+        description="25-minute focused work session",
+        category="productivity"
+    ),
+    TimerTemplateCreate(
+        name="Short Break",
+        duration_minutes=5,
+        description="5-minute quick break",
+        category="break"
+    ),
+    TimerTemplateCreate(
+        name="Long Break",
+        duration_minutes=15,
+        description="15-minute relaxation break",
+        category="break"
+    ),
+    TimerTemplateCreate(
+        name="Deep Work",
+        duration_minutes=90,
+        description="90-minute deep focus session",
+        category="productivity"
+    ),
+    TimerTemplateCreate(
+        name="Quick Task",
+        duration_minutes=10,
+        description="10-minute quick task timer",
+        category="tasks"
+    ),
+]
+
+# Seeded template ids are derived from tenant and name, so every worker
+# seeding the same tenant writes the same documents
+SEED_NAMESPACE = uuid.UUID("4f0c9a52-8d0e-4b7f-9a43-3c1b8e6d2a71")
+
+Upsert = Callable[[str, List[dict]], Awaitable[int]]
+
+
+def load_template_pack(path: str) -> List[TimerTemplateCreate]:
+    """Templates from a JSON file holding a list of template objects"""
+    with open(path, encoding="utf-8") as pack:
+        return [TimerTemplateCreate(**template) for template in json.load(pack)]
+
+
+class TemplateSeeder:
+    """Seeds tenants with the default templates plus any template packs.
+
+    Templates are matched by name: a pack entry replaces the default of the
+    same name, and a tenant that already has a template by that name keeps
+    its own. The whole set is fingerprinted as the seed version; once a
+    tenant holds it, a marker in the shared version counters lets every
+    worker skip the upsert, and this worker remembers it without a read.
+    """
+
+    def __init__(self, upsert: Upsert, versions: VersionRepository,
+                 packs: Iterable[List[TimerTemplateCreate]] = ()):
+        by_name = {template.name: template for template in DEFAULT_TEMPLATES}
+        for pack in packs:
+            by_name.update((template.name, template) for template in pack)
+        self.templates = list(by_name.values())
+        fingerprint = json.dumps([template.dict() for template in self.templates], sort_keys=True)
+        self.version = hashlib.sha256(fingerprint.encode()).hexdigest()[:16]
+        self._upsert = upsert
+        self._versions = versions
+        self._seeded: Set[str] = set()
+
+    def _marker(self, user_id: str) -> str:
+        return f"template_seed:{user_id}:{self.version}"
+
+    async def seed(self, user_id: str) -> int:
+        """Add the templates the tenant is missing; returns how many were created"""
+        if user_id in self._seeded:
+            return 0
+        if await self._versions.get(self._marker(user_id)):
+            self._seeded.add(user_id)
+            return 0
+
+        docs = [
+            TimerTemplate(
+                **template.dict(), user_id=user_id,
+                id=str(uuid.uuid5(SEED_NAMESPACE, f"{user_id}:{template.name}"))
+            ).dict()
+            for template in self.templates
+        ]
+        created = await self._upsert(user_id, docs)
+        await self._versions.bump(self._marker(user_id))
+        self._seeded.add(user_id)
+        return created
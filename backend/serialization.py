@@ -0,0 +1,53 @@
+"""Fast JSON path for list endpoints: trusts stored documents and skips model validation"""
+import json
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, Optional
+
+from starlette.responses import Response
+
+from models import Timer, TimerStatus, remaining_until
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+TIMER_FIELDS = tuple(Timer.model_fields)
+# Stored documents written before a field existed fall back to its default
+TIMER_DEFAULTS = {
+    name: field.default for name, field in Timer.model_fields.items()
+    if not field.is_required() and field.default_factory is None
+}
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """JSON bytes matching what the response models would produce"""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, default=_default, separators=(",", ":")).encode()
+
+
+class FastJSONResponse(Response):
+    """JSON response for content that is already encoded or trivially encodable"""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return content if isinstance(content, bytes) else dumps(content)
+
+
+def timer_payload(doc: Dict[str, Any], now: Optional[datetime] = None) -> Dict[str, Any]:
+    """The Timer response shape of a stored timer, without building a model"""
+    payload = {field: doc.get(field, TIMER_DEFAULTS.get(field)) for field in TIMER_FIELDS}
+    if payload["status"] == TimerStatus.RUNNING and payload["ends_at"]:
+        payload["remaining_seconds"] = remaining_until(payload["ends_at"], now)
+    return payload
@@ -1,24 +1,80 @@
-from fastapi import FastAPI, APIRouter, HTTPException
+from fastapi import FastAPI, APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
 import os
+import io
+import csv
+import json
+import base64
+import hashlib
+import hmac
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict
-import uuid
-from datetime import datetime, timedelta
-from enum import Enum
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime, timedelta, timezone, tzinfo
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from archiver import TimerArchiver
+from cache import SnapshotCache
+from compression import CompressionMiddleware
+from models import (
+    ACTIVE_STATUSES, DEFAULT_USER_ID, BulkOperationType, DistributionSummary, ExportFormat,
+    MetricDistribution, ReportPeriod, StatsGranularity, Timer, TimerBulkRequest, TimerBulkResult,
+    TimerChanges, TimerCreate, TimerDistribution, TimerReport, TimerSession, TimerStats, TimerStatsBucket,
+    TimerStatsRange, TimerStatus, TimerTemplate, TimerTemplateCreate, TimerUpdate, deadline_after,
+    remaining_until
+)
+from events import EventHub
+from metrics import DB_BUCKETS, MetricsMiddleware, MetricsRegistry, instrument
+from profiling import ProfilingMiddleware, record_calls, record_db_call
+from reports import build_report, report_range
+from scheduler import TimerScheduler
+from seeding import TemplateSeeder, load_template_pack
+from sketches import RELATIVE_ACCURACY, QuantileSketch
+from serialization import FastJSONResponse, dumps, timer_payload
+from storage import STATS_BACKFILL_REQUESTS, TimerProgress, TimerWrite, apply_timer_update, create_storage
+from writebehind import CoalescingBuffer, WriteBehindQueue
 
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# Requests sending X-Profile are profiled when PROFILING_ENABLED is set;
+# otherwise nothing is wrapped and no database commands are observed
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+
+# Timers, sessions and templates live in the backend named by STORAGE_BACKEND
+storage = create_storage(on_command=record_db_call if PROFILING_ENABLED else None)
+
+# Prometheus metrics for this worker, served at /metrics
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+metrics = MetricsRegistry()
+request_latency = metrics.histogram(
+    "power_timer_http_request_duration_seconds", "HTTP request latency by route template",
+    ["method", "route", "status"]
+)
+db_latency = metrics.histogram(
+    "power_timer_db_operation_duration_seconds", "Storage operation latency by collection",
+    ["backend", "collection", "operation"], buckets=DB_BUCKETS
+)
+sessions_completed = metrics.counter(
+    "power_timer_sessions_completed_total", "Timer sessions recorded, by what completed them",
+    ["source"]
+)
+metrics.gauge("power_timer_running_timers", "Timers currently running",
+              lambda: storage.timers.count_running())
+
+repositories = (("timers", storage.timers), ("timer_sessions", storage.sessions),
+                ("timer_templates", storage.templates), ("cache_versions", storage.versions))
+if METRICS_ENABLED:
+    for collection, repository in repositories:
+        instrument(repository, db_latency, storage.name, collection)
+if PROFILING_ENABLED:
+    for collection, repository in repositories:
+        record_calls(repository, collection)
 
 # Create the main app without a prefix
 app = FastAPI()
@@ -26,72 +82,177 @@ app = FastAPI()
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
+# List endpoints can skip model validation and encode stored documents directly
+FAST_JSON_RESPONSES = os.environ.get('FAST_JSON_RESPONSES', 'false').lower() in ('1', 'true', 'yes')
+
+# Fan-out of timer changes to /api/timers/stream subscribers in this worker
+event_hub = EventHub(queue_size=int(os.environ.get('EVENT_QUEUE_SIZE', 100)))
+STREAM_HEARTBEAT_SECONDS = float(os.environ.get('STREAM_HEARTBEAT_SECONDS', 15))
+
+# Tenancy: the authenticating proxy in front of the API names the user in
+# X-User-Id; without it requests fall into the default tenant
+REQUIRE_USER_ID = os.environ.get('REQUIRE_USER_ID', 'false').lower() in ('1', 'true', 'yes')
+
+async def current_user(x_user_id: Optional[str] = Header(None)) -> str:
+    """The tenant every read and write of this request is scoped to"""
+    if x_user_id:
+        return x_user_id
+    if REQUIRE_USER_ID:
+        raise HTTPException(status_code=401, detail="X-User-Id header required")
+    return DEFAULT_USER_ID
+
+# Operations spanning every tenant need X-Admin-Token to equal ADMIN_TOKEN,
+# and are refused altogether while it is unset
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN') or None
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if ADMIN_TOKEN is None or not hmac.compare_digest((x_admin_token or "").encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+
+def timer_from_doc(doc: dict) -> Timer:
+    """Build a Timer, deriving remaining time from the deadline while running"""
+    timer = Timer(**doc)
+    if timer.status == TimerStatus.RUNNING and timer.ends_at:
+        timer.remaining_seconds = remaining_until(timer.ends_at)
+    return timer
+
+def session_for(timer: Timer, completed_at: datetime) -> TimerSession:
+    return TimerSession(
+        user_id=timer.user_id,
+        timer_id=timer.id,
+        timer_name=timer.name,
+        category=timer.category,
+        duration_seconds=timer.duration_seconds,
+        completed_seconds=timer.duration_seconds - timer.remaining_seconds,
+        started_at=timer.started_at or completed_at,
+        completed_at=completed_at
+    )
+
+# Conditional GET: writes bump a per-tenant change counter that ETags are built from
+TIMERS_VERSION = "timers"
+SESSIONS_VERSION = "timer_sessions"
+TEMPLATES_VERSION = "timer_templates"
+
+def version_key(collection: str, user_id: str) -> str:
+    return f"{collection}:{user_id}"
 
-# Timer Status Enum
-class TimerStatus(str, Enum):
-    STOPPED = "stopped"
-    RUNNING = "running"
-    PAUSED = "paused"
-    COMPLETED = "completed"
-
-
-# Timer Models
-class TimerTemplate(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    name: str
-    duration_minutes: int
-    description: str
-    category: str
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-
-class TimerTemplateCreate(BaseModel):
-    name: str
-    duration_minutes: int
-    description: str
-    category: str
-
-class Timer(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    name: str
-    duration_seconds: int
-    remaining_seconds: int
-    status: TimerStatus = TimerStatus.STOPPED
-    started_at: Optional[datetime] = None
-    paused_at: Optional[datetime] = None
-    completed_at: Optional[datetime] = None
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-    category: str = "general"
-    template_id: Optional[str] = None
-
-class TimerCreate(BaseModel):
-    name: str
-    duration_seconds: int
-    category: str = "general"
-    template_id: Optional[str] = None
-
-class TimerUpdate(BaseModel):
-    name: Optional[str] = None
-    remaining_seconds: Optional[int] = None
-    status: Optional[TimerStatus] = None
-
-class TimerSession(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    timer_id: str
-    timer_name: str
-    category: str
-    duration_seconds: int
-    completed_seconds: int
-    started_at: datetime
-    completed_at: Optional[datetime] = None
-    session_date: datetime = Field(default_factory=datetime.utcnow)
-
-class TimerStats(BaseModel):
-    total_sessions: int
-    total_time_seconds: int
-    categories: Dict[str, int]
-    today_sessions: int
-    today_time_seconds: int
-    average_session_duration: float
+def etag_matches(request: Request, etag: str) -> bool:
+    """Weak comparison of `etag` against the request's If-None-Match"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return etag.removeprefix("W/") in {tag.strip().removeprefix("W/") for tag in header.split(",")}
+
+def tenant_etag(user_id: str, resource: str, version: Any) -> str:
+    """Weak ETag of a tenant's `resource` at `version`, never equal to another tenant's"""
+    tenant = hashlib.sha1(user_id.encode()).hexdigest()[:12]
+    return f'W/"{resource}-{tenant}-{version}"'
+
+def conditional_headers(etag: Optional[str]) -> Dict[str, str]:
+    # The same URL answers differently per tenant, so caches have to key on X-User-Id
+    headers = {"Vary": "X-User-Id"}
+    if etag:
+        headers.update({"ETag": etag, "Cache-Control": "no-cache"})
+    return headers
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers=conditional_headers(etag))
+
+async def timers_etag(user_id: str) -> Optional[str]:
+    """ETag of the tenant's active timer list, or None while any of its timers is running
+
+    A running timer's remaining time changes every second, so the list is
+    only cacheable while everything is paused.
+    """
+    if await storage.timers.count_running(user_id):
+        return None
+    return tenant_etag(user_id, "timers", await storage.versions.get(version_key(TIMERS_VERSION, user_id)))
+
+async def sessions_version(user_id: str) -> str:
+    """Changes with the tenant's sessions and with every rollup rebuild"""
+    rebuilds = await storage.versions.get(SESSIONS_VERSION)
+    writes = await storage.versions.get(version_key(SESSIONS_VERSION, user_id))
+    return f"{rebuilds}.{writes}"
+
+async def write_timer_sessions(sessions: List[TimerSession]):
+    await storage.sessions.add(sessions)
+    # A write-behind batch can span tenants
+    for user_id in {session.user_id for session in sessions}:
+        await storage.versions.bump(version_key(SESSIONS_VERSION, user_id))
+
+# Optionally queue session records and write them in batches
+SESSION_WRITE_BEHIND = os.environ.get('SESSION_WRITE_BEHIND', 'false').lower() in ('1', 'true', 'yes')
+session_queue = WriteBehindQueue(
+    write_timer_sessions,
+    max_batch=int(os.environ.get('SESSION_FLUSH_SIZE', 100)),
+    interval=float(os.environ.get('SESSION_FLUSH_INTERVAL_SECONDS', 0.5))
+) if SESSION_WRITE_BEHIND else None
+
+async def record_timer_sessions(sessions: List[TimerSession], source: str):
+    """Write session records and fold them into the rollups"""
+    if not sessions:
+        return
+    sessions_completed.inc(source, amount=len(sessions))
+    if session_queue is not None:
+        session_queue.put(sessions)
+    else:
+        await write_timer_sessions(sessions)
+
+async def flush_timer_sessions():
+    """Make queued sessions visible before statistics are read"""
+    if session_queue is not None:
+        await session_queue.flush()
+
+async def record_timer_session(timer: Timer, completed_at: datetime, source: str) -> TimerSession:
+    """Write the session record and rollups for a completed timer"""
+    session = session_for(timer, completed_at)
+    await record_timer_sessions([session], source)
+    return session
+
+# Optionally acknowledge progress-only PATCHes (remaining_seconds alone) of
+# stopped and paused timers from a last-writer-wins buffer flushed every
+# PATCH_FLUSH_INTERVAL_SECONDS. The writes carry the time they were
+# acknowledged, so keep the interval below TIMER_CHANGES_OVERLAP_SECONDS or
+# delta sync can miss them
+PATCH_COALESCING = os.environ.get('PATCH_COALESCING', 'false').lower() in ('1', 'true', 'yes')
+PATCH_FLUSH_INTERVAL_SECONDS = float(os.environ.get('PATCH_FLUSH_INTERVAL_SECONDS', 1))
+
+async def write_timer_progress(progress: List[TimerProgress]):
+    await storage.timers.save_progress(progress)
+    for user_id in {item.user_id for item in progress}:
+        await storage.versions.bump(version_key(TIMERS_VERSION, user_id))
+
+progress_buffer = CoalescingBuffer(
+    write_timer_progress,
+    interval=PATCH_FLUSH_INTERVAL_SECONDS
+) if PATCH_COALESCING else None
+
+def with_pending_progress(user_id: str, timers: List[dict]) -> List[dict]:
+    """`timers` as acknowledged by this worker, including progress it has not written yet"""
+    if progress_buffer is None:
+        return timers
+    merged = []
+    for timer in timers:
+        pending = progress_buffer.get((user_id, timer["id"]))
+        if pending is not None:
+            # Only the fields the caller projected
+            timer = {**timer, **{field: pending.doc[field] for field in timer if field in pending.doc}}
+        merged.append(timer)
+    return merged
+
+def is_progress_update(update: TimerUpdate) -> bool:
+    return update.remaining_seconds is not None and update.status is None and update.name is None
+
+def announce_timer(timer: Timer, event_type: str):
+    """Arm or disarm the expiry scheduler and notify stream subscribers"""
+    if timer.status == TimerStatus.RUNNING and timer.ends_at:
+        timer_scheduler.schedule(timer.user_id, timer.id, timer.ends_at)
+    else:
+        timer_scheduler.cancel(timer.user_id, timer.id)
+    event_hub.publish(timer.user_id, event_type, jsonable_encoder(timer))
 
 
 # Basic route
@@ -102,105 +263,366 @@ async def root():
 
 # Timer CRUD Operations
 @api_router.post("/timers", response_model=Timer)
-async def create_timer(timer_data: TimerCreate):
+async def create_timer(timer_data: TimerCreate, user_id: str = Depends(current_user)):
     """Create a new timer"""
     timer_dict = timer_data.dict()
     timer_dict['remaining_seconds'] = timer_data.duration_seconds
-    timer = Timer(**timer_dict)
+    timer = Timer(**timer_dict, user_id=user_id)
+    timer.updated_at = timer.created_at
     
-    await db.timers.insert_one(timer.dict())
+    await storage.timers.insert(timer.dict())
+    await storage.versions.bump(version_key(TIMERS_VERSION, user_id))
+    event_hub.publish(user_id, "created", jsonable_encoder(timer))
     return timer
 
+def encode_timer_cursor(timer: dict, key: str = "created_at") -> str:
+    position = [timer[key].isoformat(), timer["id"]]
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+def decode_timer_cursor(cursor: str) -> Tuple[datetime, str]:
+    """The (timestamp, id) position encoded in `cursor`"""
+    try:
+        created_at, timer_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(created_at), str(timer_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
 @api_router.get("/timers", response_model=List[Timer])
-async def get_timers():
-    """Get all active timers"""
-    timers = await db.timers.find({"status": {"$ne": "completed"}}).to_list(1000)
+async def get_timers(
+    request: Request,
+    response: Response,
+    limit: int = Query(1000, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    user_id: str = Depends(current_user)
+):
+    """Get a page of active timers; the next page's cursor is in X-Next-Cursor"""
+    after = decode_timer_cursor(cursor) if cursor else None
+    
+    # Read before the timers so a concurrent write can only make the tag stale
+    etag = await timers_etag(user_id)
+    if etag and etag_matches(request, etag):
+        return not_modified(etag)
+    changes_token = encode_changes_token(datetime.utcnow())
+    
+    projection = None
+    if fields:
+        requested = {field.strip() for field in fields.split(",") if field.strip()}
+        unknown = requested - set(Timer.model_fields)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+        requested.add("id")
+        projection = set(requested)
+        # Remaining time of a running timer is derived from its deadline
+        if "remaining_seconds" in requested:
+            projection |= {"status", "ends_at"}
+    
+    # One extra row tells us whether another page exists
+    timers = with_pending_progress(
+        user_id, await storage.timers.list_active(user_id, limit + 1, after=after, fields=projection)
+    )
+    
+    headers = conditional_headers(etag)
+    headers["X-Changes-Token"] = changes_token
+    if len(timers) > limit:
+        timers = timers[:limit]
+        headers["X-Next-Cursor"] = encode_timer_cursor(timers[-1])
+    
+    if projection is None and FAST_JSON_RESPONSES:
+        now = datetime.utcnow()
+        return FastJSONResponse([timer_payload(timer, now) for timer in timers], headers=headers)
+    if projection is None:
+        response.headers.update(headers)
+        return [timer_from_doc(timer) for timer in timers]
+    
+    items = []
+    for timer in timers:
+        if timer.get("status") == TimerStatus.RUNNING and timer.get("ends_at"):
+            timer["remaining_seconds"] = remaining_until(timer["ends_at"])
+        items.append({field: timer.get(field) for field in requested})
+    if FAST_JSON_RESPONSES:
+        return FastJSONResponse(items, headers=headers)
+    return JSONResponse(jsonable_encoder(items), headers=headers)
+
+# Delta sync: tokens trail the clock by an overlap, so writes still in
+# flight when a token is issued are reported again rather than missed
+TIMER_CHANGES_OVERLAP_SECONDS = float(os.environ.get('TIMER_CHANGES_OVERLAP_SECONDS', 5))
+TIMER_CHANGES_LIMIT = int(os.environ.get('TIMER_CHANGES_LIMIT', 1000))
+TIMER_TOMBSTONE_RETENTION_DAYS = float(os.environ.get('TIMER_TOMBSTONE_RETENTION_DAYS', 7))
+
+def encode_changes_token(now: datetime) -> str:
+    since = now - timedelta(seconds=TIMER_CHANGES_OVERLAP_SECONDS)
+    return base64.urlsafe_b64encode(since.isoformat().encode()).decode()
+
+def decode_changes_token(token: str) -> datetime:
+    try:
+        return datetime.fromisoformat(base64.urlsafe_b64decode(token.encode()).decode())
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid token")
+
+@api_router.get("/timers/changes", response_model=TimerChanges)
+async def get_timer_changes(since: str, user_id: str = Depends(current_user)):
+    """Get timers written and ids deleted since a token from /timers or an earlier call"""
+    start = decode_changes_token(since)
+    now = datetime.utcnow()
+    # Tombstones older than the retention may already be gone
+    if start < now - timedelta(days=TIMER_TOMBSTONE_RETENTION_DAYS):
+        raise HTTPException(status_code=410, detail="Token expired, reload /api/timers")
+    token = encode_changes_token(now)
+    
+    timers, deleted = await storage.timers.changes(user_id, start, TIMER_CHANGES_LIMIT + 1)
+    timers = with_pending_progress(user_id, timers)
+    if progress_buffer is not None:
+        # Acknowledged progress of timers the store has no newer write for
+        listed = {timer["id"] for timer in timers}
+        timers += [item.doc for item in progress_buffer.values()
+                   if item.user_id == user_id and item.at >= start and item.timer_id not in listed]
+    if len(timers) > TIMER_CHANGES_LIMIT:
+        raise HTTPException(status_code=410, detail="Too many changes, reload /api/timers")
+    return TimerChanges(timers=[timer_from_doc(timer) for timer in timers], deleted=deleted, token=token)
+
+@api_router.get("/timers/stream")
+async def stream_timer_events(request: Request, user_id: str = Depends(current_user)):
+    """Stream timer changes as Server-Sent Events"""
+    subscription = event_hub.subscribe(user_id)
+    
+    async def event_source():
+        try:
+            yield "retry: 3000\n\n"
+            while not await request.is_disconnected():
+                frame = await subscription.get(timeout=STREAM_HEARTBEAT_SECONDS)
+                yield frame if frame is not None else ": keepalive\n\n"
+        finally:
+            event_hub.unsubscribe(subscription)
+    
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@api_router.get("/timers/archive", response_model=List[Timer])
+async def get_archived_timers(
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    category: Optional[str] = None,
+    user_id: str = Depends(current_user)
+):
+    """Get a page of archived timers, most recently completed first"""
+    before = decode_timer_cursor(cursor) if cursor else None
+    timers = await storage.timers.list_archived(user_id, limit + 1, before=before, category=category)
+    if len(timers) > limit:
+        timers = timers[:limit]
+        response.headers["X-Next-Cursor"] = encode_timer_cursor(timers[-1], key="completed_at")
     return [Timer(**timer) for timer in timers]
 
 @api_router.get("/timers/{timer_id}", response_model=Timer)
-async def get_timer(timer_id: str):
+async def get_timer(timer_id: str, user_id: str = Depends(current_user)):
     """Get a specific timer"""
-    timer = await db.timers.find_one({"id": timer_id})
+    # Completed timers move to the archive after TIMER_ARCHIVE_AFTER_SECONDS
+    pending = progress_buffer.get((user_id, timer_id)) if progress_buffer is not None else None
+    if pending is not None:
+        return timer_from_doc(pending.doc)
+    timer = await storage.timers.get(user_id, timer_id) or await storage.timers.get_archived(user_id, timer_id)
     if not timer:
         raise HTTPException(status_code=404, detail="Timer not found")
-    return Timer(**timer)
+    return timer_from_doc(timer)
 
 @api_router.patch("/timers/{timer_id}", response_model=Timer)
-async def update_timer(timer_id: str, update_data: TimerUpdate):
+async def update_timer(timer_id: str, update_data: TimerUpdate, user_id: str = Depends(current_user)):
     """Update timer status or remaining time"""
-    timer = await db.timers.find_one({"id": timer_id})
-    if not timer:
+    now = deadline_after(datetime.utcnow(), 0)
+    if progress_buffer is not None:
+        if is_progress_update(update_data):
+            timer_obj = await buffer_timer_progress(user_id, timer_id, update_data.remaining_seconds, now)
+            if timer_obj is not None:
+                return timer_obj
+        # Status transitions and renames apply on top of the latest progress
+        await progress_buffer.flush_key((user_id, timer_id))
+    
+    result = await storage.timers.update(user_id, timer_id, update_data, now)
+    if not result.found:
         raise HTTPException(status_code=404, detail="Timer not found")
     
-    timer_obj = Timer(**timer)
-    update_dict = {}
-    
-    # Handle status changes
-    if update_data.status:
-        if update_data.status == TimerStatus.RUNNING:
-            update_dict['started_at'] = datetime.utcnow()
-            update_dict['paused_at'] = None
-        elif update_data.status == TimerStatus.PAUSED:
-            update_dict['paused_at'] = datetime.utcnow()
-        elif update_data.status == TimerStatus.COMPLETED:
-            update_dict['completed_at'] = datetime.utcnow()
-            # Create session record
-            session = TimerSession(
-                timer_id=timer_id,
-                timer_name=timer_obj.name,
-                category=timer_obj.category,
-                duration_seconds=timer_obj.duration_seconds,
-                completed_seconds=timer_obj.duration_seconds - timer_obj.remaining_seconds,
-                started_at=timer_obj.started_at or datetime.utcnow(),
-                completed_at=datetime.utcnow()
-            )
-            await db.timer_sessions.insert_one(session.dict())
-        
-        update_dict['status'] = update_data.status
+    await storage.versions.bump(version_key(TIMERS_VERSION, user_id))
+    timer_obj = timer_from_doc(result.doc)
     
-    # Handle other updates
-    if update_data.name is not None:
-        update_dict['name'] = update_data.name
-    if update_data.remaining_seconds is not None:
-        update_dict['remaining_seconds'] = update_data.remaining_seconds
+    # Create session record once per completion
+    if result.completed:
+        await record_timer_session(timer_obj, now, "patch")
     
-    await db.timers.update_one({"id": timer_id}, {"$set": update_dict})
+    announce_timer(timer_obj, "completed" if result.completed else "updated")
+    return timer_obj
+
+async def buffer_timer_progress(user_id: str, timer_id: str, remaining: int, now: datetime) -> Optional[Timer]:
+    """Acknowledge a progress-only PATCH from the buffer, or None to take the regular path"""
+    key = (user_id, timer_id)
+    pending = progress_buffer.get(key)
+    doc = pending.doc if pending is not None else await storage.timers.get(user_id, timer_id)
+    if doc is None or doc["status"] not in ACTIVE_STATUSES:
+        return None
+    # Expiry and resync go by the stored deadline, so a running timer is never
+    # buffered: a report that agrees with its deadline (to the whole second the
+    # client counts in) changes nothing, and one that moves it is written now
+    if doc["status"] == TimerStatus.RUNNING:
+        if abs(remaining - remaining_until(doc["ends_at"], now)) > 1:
+            return None
+        return timer_from_doc(doc)
     
-    # Return updated timer
-    updated_timer = await db.timers.find_one({"id": timer_id})
-    return Timer(**updated_timer)
+    doc = apply_timer_update(doc, TimerUpdate(remaining_seconds=remaining), now)
+    progress_buffer.put(key, TimerProgress(user_id, timer_id, remaining, now, doc))
+    # Lists and delta sync show the buffered doc, so their ETags have to move now
+    await storage.versions.bump(version_key(TIMERS_VERSION, user_id))
+    timer_obj = timer_from_doc(doc)
+    announce_timer(timer_obj, "updated")
+    return timer_obj
 
 @api_router.delete("/timers/{timer_id}")
-async def delete_timer(timer_id: str):
+async def delete_timer(timer_id: str, user_id: str = Depends(current_user)):
     """Delete a timer"""
-    result = await db.timers.delete_one({"id": timer_id})
-    if result.deleted_count == 0:
+    now = deadline_after(datetime.utcnow(), 0)
+    if progress_buffer is not None:
+        progress_buffer.discard((user_id, timer_id))
+    if not await storage.timers.delete(user_id, timer_id, now):
         raise HTTPException(status_code=404, detail="Timer not found")
+    await storage.versions.bump(version_key(TIMERS_VERSION, user_id))
+    timer_scheduler.cancel(user_id, timer_id)
+    event_hub.publish(user_id, "deleted", {"id": timer_id})
     return {"message": "Timer deleted successfully"}
 
 
+@api_router.post("/timers/bulk", response_model=List[TimerBulkResult])
+async def bulk_timer_operations(request: TimerBulkRequest, user_id: str = Depends(current_user)):
+    """Apply a batch of timer creates, updates and deletes in one bulk write"""
+    now = deadline_after(datetime.utcnow(), 0)
+    results = []
+    writes = []
+    pending = []
+    
+    for index, operation in enumerate(request.operations):
+        result = TimerBulkResult(index=index, op=operation.op, status_code=200, id=operation.id)
+        results.append(result)
+        
+        if operation.op == BulkOperationType.CREATE:
+            if operation.timer is None:
+                result.status_code, result.detail = 422, "create requires timer"
+                continue
+            timer = Timer(**operation.timer.dict(), remaining_seconds=operation.timer.duration_seconds,
+                          updated_at=now, user_id=user_id)
+            result.id, result.timer = timer.id, timer
+            writes.append(TimerWrite("create", timer.id, doc=timer.dict()))
+        elif operation.op == BulkOperationType.UPDATE:
+            if operation.id is None or operation.update is None:
+                result.status_code, result.detail = 422, "update requires id and update"
+                continue
+            writes.append(TimerWrite("update", operation.id, update=operation.update))
+        else:
+            if operation.id is None:
+                result.status_code, result.detail = 422, "delete requires id"
+                continue
+            writes.append(TimerWrite("delete", operation.id))
+        pending.append(result)
+    
+    if progress_buffer is not None and any(
+        progress_buffer.get((user_id, write.timer_id)) for write in writes if write.op != "create"
+    ):
+        await progress_buffer.flush()
+    outcomes = await storage.timers.bulk(user_id, writes, now)
+    if any(outcome.found for outcome in outcomes):
+        await storage.versions.bump(version_key(TIMERS_VERSION, user_id))
+    
+    sessions = []
+    for result, outcome in zip(pending, outcomes):
+        if not outcome.found:
+            result.status_code, result.detail = 404, "Timer not found"
+        elif result.op == BulkOperationType.CREATE:
+            event_hub.publish(user_id, "created", jsonable_encoder(result.timer))
+        elif result.op == BulkOperationType.DELETE:
+            timer_scheduler.cancel(user_id, result.id)
+            event_hub.publish(user_id, "deleted", {"id": result.id})
+        else:
+            result.timer = timer_from_doc(outcome.doc)
+            if outcome.completed:
+                sessions.append(session_for(result.timer, now))
+            announce_timer(result.timer, "completed" if outcome.completed else "updated")
+    
+    await record_timer_sessions(sessions, "bulk")
+    return results
+
+
 # Timer Templates
+TEMPLATE_CACHE_TTL_SECONDS = float(os.environ.get('TEMPLATE_CACHE_TTL_SECONDS', 60))
+template_caches: Dict[str, SnapshotCache[TimerTemplate]] = {}
+
+def template_cache_for(user_id: str) -> SnapshotCache[TimerTemplate]:
+    """This worker's snapshot of one tenant's templates, created on first use"""
+    cache = template_caches.get(user_id)
+    if cache is None:
+        async def load_templates() -> List[TimerTemplate]:
+            templates = await storage.templates.list_all(user_id)
+            return [TimerTemplate(**template) for template in templates]
+        
+        cache = template_caches[user_id] = SnapshotCache(
+            load_templates,
+            lambda: storage.versions.get(version_key(TEMPLATES_VERSION, user_id)),
+            key=lambda template: template.id,
+            ttl=TEMPLATE_CACHE_TTL_SECONDS
+        )
+    return cache
+
+async def invalidate_templates(user_id: str):
+    """Drop this worker's snapshot of the tenant's templates and tell the other workers"""
+    await storage.versions.bump(version_key(TEMPLATES_VERSION, user_id))
+    template_cache_for(user_id).invalidate()
+
 @api_router.get("/templates", response_model=List[TimerTemplate])
-async def get_timer_templates():
+async def get_timer_templates(request: Request, response: Response, user_id: str = Depends(current_user)):
     """Get all timer templates"""
-    templates = await db.timer_templates.find().to_list(1000)
-    return [TimerTemplate(**template) for template in templates]
+    template_cache = template_cache_for(user_id)
+    etag = tenant_etag(user_id, "templates", await template_cache.version())
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    headers = conditional_headers(etag)
+    
+    if FAST_JSON_RESPONSES:
+        return FastJSONResponse(await template_cache.get_encoded(
+            lambda templates: dumps([template.model_dump() for template in templates])
+        ), headers=headers)
+    response.headers.update(headers)
+    return await template_cache.get_all()
 
 @api_router.post("/templates", response_model=TimerTemplate)
-async def create_timer_template(template_data: TimerTemplateCreate):
+async def create_timer_template(template_data: TimerTemplateCreate, user_id: str = Depends(current_user)):
     """Create a new timer template"""
-    template = TimerTemplate(**template_data.dict())
-    await db.timer_templates.insert_one(template.dict())
+    template = TimerTemplate(**template_data.dict(), user_id=user_id)
+    await storage.templates.insert(template.dict())
+    await invalidate_templates(user_id)
     return template
 
+@api_router.get("/admin/template-cache")
+async def get_template_cache_stats():
+    """Report template cache hit/miss counters, summed over tenants"""
+    per_tenant = [cache.stats() for cache in template_caches.values()]
+    return {
+        "tenants": len(per_tenant),
+        **{counter: sum(stats[counter] for stats in per_tenant)
+           for counter in ("hits", "misses", "revalidations", "size")},
+        "ttl_seconds": TEMPLATE_CACHE_TTL_SECONDS,
+    }
+
 @api_router.post("/templates/{template_id}/create-timer", response_model=Timer)
-async def create_timer_from_template(template_id: str, name: Optional[str] = None):
+async def create_timer_from_template(template_id: str, name: Optional[str] = None,
+                                     user_id: str = Depends(current_user)):
     """Create a timer from a template"""
-    template = await db.timer_templates.find_one({"id": template_id})
-    if not template:
-        raise HTTPException(status_code=404, detail="Template not found")
+    template_obj = await template_cache_for(user_id).get(template_id)
+    if template_obj is None:
+        # Possibly created on another worker since our snapshot was taken
+        template = await storage.templates.get(user_id, template_id)
+        if not template:
+            raise HTTPException(status_code=404, detail="Template not found")
+        template_obj = TimerTemplate(**template)
     
-    template_obj = TimerTemplate(**template)
     timer_data = TimerCreate(
         name=name or template_obj.name,
         duration_seconds=template_obj.duration_minutes * 60,
@@ -208,115 +630,406 @@ async def create_timer_from_template(template_id: str, name: Optional[str] = Non
         template_id=template_id
     )
     
-    return await create_timer(timer_data)
+    return await create_timer(timer_data, user_id)
 
 
 # Timer Statistics
+@api_router.get("/admin/session-queue")
+async def get_session_queue_stats():
+    """Report write-behind queue depth and flush latency"""
+    if session_queue is None:
+        return {"enabled": False}
+    return {"enabled": True, **session_queue.stats()}
+
+@api_router.get("/admin/progress-buffer")
+async def get_progress_buffer_stats():
+    """Report how many progress PATCHes were coalesced into how many writes"""
+    if progress_buffer is None:
+        return {"enabled": False}
+    return {"enabled": True, **progress_buffer.stats()}
+
 @api_router.get("/stats", response_model=TimerStats)
-async def get_timer_stats():
+async def get_timer_stats(request: Request, response: Response, user_id: str = Depends(current_user)):
     """Get timer statistics"""
-    # Get all completed sessions
-    sessions = await db.timer_sessions.find().to_list(10000)
+    await flush_timer_sessions()
+    today = datetime.utcnow().date().isoformat()
+    # Today's totals roll over at midnight without any write
+    etag = tenant_etag(user_id, "stats", f"{await sessions_version(user_id)}-{today}")
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers.update(conditional_headers(etag))
     
-    if not sessions:
-        return TimerStats(
-            total_sessions=0,
-            total_time_seconds=0,
-            categories={},
-            today_sessions=0,
-            today_time_seconds=0,
-            average_session_duration=0
+    rollups = await storage.sessions.read_rollups(user_id, today)
+
+    by_kind = {"global": None, "day": None}
+    categories = {}
+    for rollup in rollups:
+        if rollup["kind"] == "category":
+            categories[rollup["category"]] = rollup["time_seconds"]
+        else:
+            by_kind[rollup["kind"]] = rollup
+
+    total = by_kind["global"] or {"sessions": 0, "time_seconds": 0}
+    today_rollup = by_kind["day"] or {"sessions": 0, "time_seconds": 0}
+
+    # Average session duration
+    total_sessions = total["sessions"]
+    avg_duration = total["time_seconds"] / total_sessions if total_sessions > 0 else 0
+
+    return TimerStats(
+        total_sessions=total_sessions,
+        total_time_seconds=total["time_seconds"],
+        categories=categories,
+        today_sessions=today_rollup["sessions"],
+        today_time_seconds=today_rollup["time_seconds"],
+        average_session_duration=avg_duration
+    )
+
+DISTRIBUTION_QUANTILES = {"p50": 0.5, "p90": 0.9, "p99": 0.99}
+
+def summarize_sketch(doc: Optional[dict]) -> DistributionSummary:
+    sketch = QuantileSketch.from_doc(doc or {})
+    return DistributionSummary(
+        count=sketch.count,
+        mean=sketch.mean(),
+        **{name: sketch.quantile(q) for name, q in DISTRIBUTION_QUANTILES.items()}
+    )
+
+@api_router.get("/stats/distribution", response_model=TimerDistribution)
+async def get_timer_distribution(request: Request, response: Response, user_id: str = Depends(current_user)):
+    """Get p50/p90/p99 of session length and completion ratio, overall and per category"""
+    await flush_timer_sessions()
+    etag = tenant_etag(user_id, "distribution", await sessions_version(user_id))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers.update(conditional_headers(etag))
+    
+    # A handful of fixed-size sketches per tenant, however many sessions there are
+    sketches = await storage.sessions.read_sketches(user_id)
+    
+    overall = {}
+    by_category = {"duration": {}, "completion": {}}
+    for sketch in sketches:
+        if sketch["category"] is None:
+            overall[sketch["metric"]] = summarize_sketch(sketch)
+        else:
+            by_category[sketch["metric"]][sketch["category"]] = summarize_sketch(sketch)
+    
+    return TimerDistribution(
+        relative_accuracy=RELATIVE_ACCURACY,
+        duration_seconds=MetricDistribution(
+            overall=overall.get("duration") or summarize_sketch(None),
+            categories=by_category["duration"]
+        ),
+        completion_ratio=MetricDistribution(
+            overall=overall.get("completion") or summarize_sketch(None),
+            categories=by_category["completion"]
         )
+    )
+
+STATS_RANGE_DEFAULT_SPAN = {
+    StatsGranularity.HOUR: timedelta(days=1),
+    StatsGranularity.DAY: timedelta(days=30),
+    StatsGranularity.WEEK: timedelta(weeks=12),
+}
+STATS_RANGE_BUCKET_SPAN = {
+    StatsGranularity.HOUR: timedelta(hours=1),
+    StatsGranularity.DAY: timedelta(days=1),
+    StatsGranularity.WEEK: timedelta(weeks=1),
+}
+STATS_RANGE_MAX_BUCKETS = int(os.environ.get('STATS_RANGE_MAX_BUCKETS', 9000))
+
+def to_utc(moment: datetime, zone: tzinfo) -> datetime:
+    """Naive UTC for `moment`, reading naive input as wall time in `zone`"""
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=zone)
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
+
+def parse_zone(tz: str) -> ZoneInfo:
+    try:
+        return ZoneInfo(tz)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise HTTPException(status_code=400, detail=f"Unknown time zone: {tz}")
+
+@api_router.get("/stats/range", response_model=TimerStatsRange)
+async def get_timer_stats_range(
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    granularity: StatsGranularity = StatsGranularity.DAY,
+    tz: str = "UTC",
+    user_id: str = Depends(current_user)
+):
+    """Get session counts and time per hour, day or week between from and to"""
+    zone = parse_zone(tz)
     
-    # Calculate stats
-    total_sessions = len(sessions)
-    total_time = sum(session['completed_seconds'] for session in sessions)
+    end = to_utc(end, zone) if end else datetime.utcnow()
+    start = to_utc(start, zone) if start else end - STATS_RANGE_DEFAULT_SPAN[granularity]
+    if start >= end:
+        raise HTTPException(status_code=400, detail="from must be before to")
+    if (end - start) / STATS_RANGE_BUCKET_SPAN[granularity] > STATS_RANGE_MAX_BUCKETS:
+        raise HTTPException(status_code=400, detail="Range too long for this granularity")
     
-    # Category breakdown
-    categories = {}
+    await flush_timer_sessions()
+    groups = await storage.sessions.aggregate_range(user_id, start, end, granularity.value, tz)
+    
+    # Groups arrive sorted by bucket, one per category
+    buckets: List[TimerStatsBucket] = []
+    for bucket, category, sessions, seconds in groups:
+        if not buckets or buckets[-1].start != bucket:
+            buckets.append(TimerStatsBucket(start=bucket, sessions=0, time_seconds=0, categories={}))
+        buckets[-1].sessions += sessions
+        buckets[-1].time_seconds += seconds
+        buckets[-1].categories[category] = seconds
+    
+    # Report bucket starts as wall time in the requested zone
+    for item in buckets:
+        item.start = item.start.replace(tzinfo=timezone.utc).astimezone(zone)
+    
+    return TimerStatsRange(
+        start=start.replace(tzinfo=timezone.utc).astimezone(zone),
+        end=end.replace(tzinfo=timezone.utc).astimezone(zone),
+        granularity=granularity,
+        tz=tz,
+        total_sessions=sum(item.sessions for item in buckets),
+        total_time_seconds=sum(item.time_seconds for item in buckets),
+        buckets=buckets
+    )
+
+@api_router.get("/stats/report", response_model=TimerReport)
+async def get_timer_report(
+    request: Request,
+    response: Response,
+    period: ReportPeriod = ReportPeriod.WEEK,
+    periods: int = Query(4, ge=1, le=52),
+    window: int = Query(7, ge=1, le=31),
+    tz: str = "UTC",
+    user_id: str = Depends(current_user)
+):
+    """Get a weekly or monthly productivity report: deltas, rolling averages, heatmap and category shares"""
+    zone = parse_zone(tz)
+    await flush_timer_sessions()
+    now = datetime.now(zone).replace(tzinfo=None)
+    # The current period and its days move on at local midnight without any write
+    etag = tenant_etag(user_id, "report", f"{await sessions_version(user_id)}-{now.date().isoformat()}")
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers.update(conditional_headers(etag))
+    
+    # Three projected columns rather than whole sessions
+    fetch_from, _, end = report_range(now, period, periods, window)
+    columns = await storage.sessions.read_columns(user_id, to_utc(fetch_from, zone), to_utc(end, zone))
+    # Vectorized, but still CPU-bound for long histories, so kept off the event loop
+    return await run_in_threadpool(build_report, columns, period, tz, periods, window, now)
+
+# Session export
+EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', 500))
+# An export only ever holds the caller's own sessions, so the owner column is left out
+SESSION_FIELDS = [field for field in TimerSession.model_fields if field != "user_id"]
+
+def encode_session_batch(sessions: List[dict], export_format: ExportFormat, header: bool = False) -> bytes:
+    if export_format == ExportFormat.NDJSON:
+        return b"".join(dumps({field: session.get(field) for field in SESSION_FIELDS}) + b"\n"
+                        for session in sessions)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(SESSION_FIELDS)
     for session in sessions:
-        category = session.get('category', 'general')
-        categories[category] = categories.get(category, 0) + session['completed_seconds']
+        writer.writerow([
+            value.isoformat() if isinstance(value, datetime) else value
+            for value in (session.get(field) for field in SESSION_FIELDS)
+        ])
+    return buffer.getvalue().encode()
+
+@api_router.get("/sessions/export")
+async def export_sessions(
+    export_format: ExportFormat = Query(ExportFormat.NDJSON, alias="format"),
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    category: Optional[str] = None,
+    cursor: Optional[str] = None,
+    user_id: str = Depends(current_user)
+):
+    """Stream session history oldest first; resume with cursor=<id of the last row received>"""
+    start = to_utc(start, timezone.utc) if start else None
+    end = to_utc(end, timezone.utc) if end else None
     
-    # Today's stats
-    today = datetime.utcnow().date()
-    today_sessions_data = [s for s in sessions if s['session_date'].date() == today]
-    today_sessions = len(today_sessions_data)
-    today_time = sum(session['completed_seconds'] for session in today_sessions_data)
+    after = None
+    if cursor:
+        last = await storage.sessions.get(user_id, cursor)
+        if not last:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        after = (last["session_date"], last["id"])
     
-    # Average session duration
-    avg_duration = total_time / total_sessions if total_sessions > 0 else 0
+    await flush_timer_sessions()
     
-    return TimerStats(
-        total_sessions=total_sessions,
-        total_time_seconds=total_time,
-        categories=categories,
-        today_sessions=today_sessions,
-        today_time_seconds=today_time,
-        average_session_duration=avg_duration
+    async def rows():
+        # A resumed CSV download continues the file, so it gets no header
+        header = export_format == ExportFormat.CSV and after is None
+        batch = []
+        async for session in storage.sessions.stream(user_id, start, end, category, after, EXPORT_BATCH_SIZE):
+            batch.append(session)
+            if len(batch) >= EXPORT_BATCH_SIZE:
+                yield encode_session_batch(batch, export_format, header)
+                batch, header = [], False
+        if batch or header:
+            yield encode_session_batch(batch, export_format, header)
+    
+    media_type = "application/x-ndjson" if export_format == ExportFormat.NDJSON else "text/csv"
+    return StreamingResponse(
+        rows(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="sessions.{export_format.value}"'}
     )
 
+@api_router.post("/stats/rebuild", dependencies=[Depends(require_admin)])
+async def rebuild_timer_stats():
+    """Recompute statistics rollups from the raw sessions"""
+    await flush_timer_sessions()
+    try:
+        count = await storage.sessions.rebuild_rollups()
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    # Covers every tenant, so the tenant-independent counter is bumped
+    await storage.versions.bump(SESSIONS_VERSION)
+    return {"message": f"Rebuilt {count} statistics rollups"}
+
+# Rollups are kept current as sessions are recorded; sessions recorded before
+# they existed are folded in by a single rebuild per database, run by whichever
+# worker starts first. Bump the version when a rebuild has new data to add;
+# storage backends that drop rollups on connect bump STATS_BACKFILL_REQUESTS.
+# 2: distribution sketches
+STATS_BACKFILL_VERSION = 2
+BACKFILL_STATS_ON_STARTUP = os.environ.get('BACKFILL_STATS_ON_STARTUP', 'true').lower() in ('1', 'true', 'yes')
+
+async def backfill_statistics() -> bool:
+    """Rebuild rollups and sketches unless this backfill already ran; True if this call ran it"""
+    requests = await storage.versions.get(STATS_BACKFILL_REQUESTS)
+    if not await storage.versions.claim(f"stats_backfill:{STATS_BACKFILL_VERSION}.{requests}"):
+        return False
+    try:
+        count = await storage.sessions.rebuild_rollups()
+    except RuntimeError as e:
+        # A manual rebuild already covers everything this one would
+        logger.info(f"Skipped statistics backfill: {e}")
+        return False
+    await storage.versions.bump(SESSIONS_VERSION)
+    logger.info(f"Backfilled {count} statistics rollups (backfill version {STATS_BACKFILL_VERSION})")
+    return True
+
 
 # Initialize default templates
+# Comma-separated JSON files of extra templates, seeded alongside the defaults
+TEMPLATE_PACKS = [path.strip() for path in os.environ.get('TEMPLATE_PACKS', '').split(',') if path.strip()]
+SEED_TEMPLATES_ON_STARTUP = os.environ.get('SEED_TEMPLATES_ON_STARTUP', 'true').lower() in ('1', 'true', 'yes')
+
+template_seeder = TemplateSeeder(
+    lambda user_id, docs: storage.templates.seed(user_id, docs),
+    storage.versions,
+    packs=[load_template_pack(path) for path in TEMPLATE_PACKS]
+)
+
+async def seed_templates(user_id: str) -> int:
+    created = await template_seeder.seed(user_id)
+    if created:
+        await invalidate_templates(user_id)
+    return created
+
 @api_router.post("/init-templates")
-async def initialize_default_templates():
+async def initialize_default_templates(user_id: str = Depends(current_user)):
     """Initialize default timer templates"""
-    default_templates = [
-        {
-            "name": "Pomodoro Work",
-            "duration_minutes": 25,
-            "description": "25-minute focused work session",
-            "category": "productivity"
-        },
-        {
-            "name": "Short Break",
-            "duration_minutes": 5,
-            "description": "5-minute quick break",
-            "category": "break"
-        },
-        {
-            "name": "Long Break",
-            "duration_minutes": 15,
-            "description": "15-minute relaxation break",
-            "category": "break"
-        },
-        {
-            "name": "Deep Work",
-            "duration_minutes": 90,
-            "description": "90-minute deep focus session",
-            "category": "productivity"
-        },
-        {
-            "name": "Quick Task",
-            "duration_minutes": 10,
-            "description": "10-minute quick task timer",
-            "category": "tasks"
-        }
-    ]
-    
-    created_templates = []
-    for template_data in default_templates:
-        # Check if template already exists
-        existing = await db.timer_templates.find_one({"name": template_data["name"]})
-        if not existing:
-            template = TimerTemplate(**template_data)
-            await db.timer_templates.insert_one(template.dict())
-            created_templates.append(template)
-    
-    return {"message": f"Created {len(created_templates)} default templates"}
+    created = await seed_templates(user_id)
+    return {"message": f"Created {created} default templates", "seed_version": template_seeder.version}
+
+
+# Timer expiry scheduler
+async def expire_timer(user_id: str, timer_id: str, deadline: datetime):
+    """Complete a running timer whose deadline has passed"""
+    timer = await storage.timers.expire(user_id, timer_id, deadline, deadline_after(datetime.utcnow(), 0))
+    # Another worker or a client PATCH got there first
+    if not timer:
+        return
+    timer_obj = Timer(**timer)
+    await storage.versions.bump(version_key(TIMERS_VERSION, timer_obj.user_id))
+    # Progress acknowledged for a timer that has since run out is moot
+    if progress_buffer is not None:
+        progress_buffer.discard((timer_obj.user_id, timer_obj.id))
+    await record_timer_session(timer_obj, deadline, "expiry")
+    announce_timer(timer_obj, "completed")
+
+timer_scheduler = TimerScheduler(
+    expire_timer,
+    lambda horizon: storage.timers.running_deadlines(horizon),
+    resync_interval=float(os.environ.get('TIMER_SCHEDULER_RESYNC_SECONDS', 30))
+)
+
+
+# Timer archival
+timer_archiver = TimerArchiver(
+    lambda completed_before, limit: storage.timers.archive_completed(completed_before, limit),
+    lambda completed_before: storage.timers.purge_archived(completed_before),
+    grace=float(os.environ.get('TIMER_ARCHIVE_AFTER_SECONDS', 3600)),
+    interval=float(os.environ.get('TIMER_ARCHIVE_INTERVAL_SECONDS', 300)),
+    batch_size=int(os.environ.get('TIMER_ARCHIVE_BATCH_SIZE', 500)),
+    retention_days=float(os.environ.get('TIMER_ARCHIVE_RETENTION_DAYS', 0)),
+    purge_tombstones=lambda deleted_before: storage.timers.purge_tombstones(deleted_before),
+    tombstone_days=TIMER_TOMBSTONE_RETENTION_DAYS
+)
+
+@api_router.post("/admin/archive")
+async def run_timer_archival(older_than_seconds: Optional[float] = Query(None, ge=0)):
+    """Archive completed timers and apply the retention policy now"""
+    return await timer_archiver.run_once(grace=older_than_seconds)
+
+
+# Index provisioning
+@api_router.get("/admin/indexes")
+async def get_index_report():
+    """Report existing indexes and the planner's choice for the main queries"""
+    return await storage.describe_indexes()
 
 
 # Include the router in the main app
 app.include_router(api_router)
 
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Prometheus scrape endpoint"""
+    return PlainTextResponse(await metrics.render(), media_type="text/plain; version=0.0.4")
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Changes-Token", "ETag", "X-Profile-Report", "X-Profile-File"],
 )
 
+# Compress large responses; the SSE stream has to reach clients unbuffered
+RESPONSE_COMPRESSION = os.environ.get('RESPONSE_COMPRESSION', 'true').lower() in ('1', 'true', 'yes')
+if RESPONSE_COMPRESSION:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=int(os.environ.get('COMPRESSION_MINIMUM_SIZE', 1024)),
+        exclude=["/api/timers/stream"]
+    )
+
+if METRICS_ENABLED:
+    app.add_middleware(
+        MetricsMiddleware,
+        requests=request_latency,
+        routes=lambda: {route.endpoint: route.path for route in app.routes if hasattr(route, "endpoint")}
+    )
+
+# Outermost, so the report covers every other middleware too
+if PROFILING_ENABLED:
+    app.add_middleware(
+        ProfilingMiddleware,
+        token=os.environ.get('PROFILE_TOKEN') or None,
+        output_dir=os.environ.get('PROFILE_DIR') or None
+    )
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -324,6 +1037,77 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def connect_storage():
+    await storage.connect()
+
+@app.on_event("startup")
+async def seed_default_templates():
+    if SEED_TEMPLATES_ON_STARTUP:
+        await seed_templates(DEFAULT_USER_ID)
+
+@app.on_event("startup")
+async def backfill_statistics_once():
+    if BACKFILL_STATS_ON_STARTUP:
+        await backfill_statistics()
+
+@app.on_event("startup")
+async def start_timer_scheduler():
+    await timer_scheduler.start()
+
+@app.on_event("startup")
+async def start_timer_archiver():
+    await timer_archiver.start()
+
+@app.on_event("startup")
+async def start_session_queue():
+    if session_queue is not None:
+        await session_queue.start()
+
+@app.on_event("startup")
+async def start_progress_buffer():
+    if progress_buffer is not None:
+        await progress_buffer.start()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
+    await timer_archiver.stop()
+    await timer_scheduler.stop()
+    if progress_buffer is not None:
+        await progress_buffer.stop()
+    if session_queue is not None:
+        await session_queue.stop()
+    await storage.close()
+
+
+
+if __name__ == "__main__":
+    import argparse
+    import asyncio
+
+    parser = argparse.ArgumentParser(description="Power Timer maintenance commands")
+    parser.add_argument("command", choices=["rebuild-rollups", "migrate-sessions"])
+    parser.add_argument("--to", choices=["buckets", "documents"], default="buckets",
+                        help="session layout to migrate into (migrate-sessions)")
+    parser.add_argument("--drop-source", action="store_true",
+                        help="drop the old layout's collection once every session is copied (migrate-sessions)")
+    args = parser.parse_args()
+
+    if args.command == "rebuild-rollups":
+        async def rebuild():
+            await storage.connect()
+            return await storage.sessions.rebuild_rollups()
+        
+        count = asyncio.run(rebuild())
+        print(f"Rebuilt {count} statistics rollups")
+    
+    if args.command == "migrate-sessions":
+        if storage.name != "mongo":
+            parser.error("migrate-sessions needs STORAGE_BACKEND=mongo")
+        
+        async def migrate():
+            await storage.connect()
+            return await storage.migrate_sessions(args.to, drop_source=args.drop_source)
+        
+        count = asyncio.run(migrate())
+        print(f"Copied {count} sessions into the {args.to} layout; set SESSION_LAYOUT={args.to} to use it")
@@ -0,0 +1,87 @@
+"""Mergeable quantile sketches with a bounded relative error"""
+import math
+from typing import Dict, Optional
+
+
+# Stored sketches only merge with sketches of the same accuracy, so this is
+# fixed rather than configurable
+RELATIVE_ACCURACY = 0.01
+
+
+class QuantileSketch:
+    """DDSketch-style histogram over logarithmically sized bins.
+
+    A positive value lands in bin ceil(log_gamma(value)) with
+    gamma = (1 + a) / (1 - a), so any quantile is reported within relative
+    error `a` of the exact value at that rank; zero and negative values share
+    one extra bin. Memory grows with the logarithm of the value range, not
+    with the number of values, and two sketches merge by adding their bin
+    counts, which lets stores maintain them with plain increments.
+    """
+
+    def __init__(self, relative_accuracy: float = RELATIVE_ACCURACY):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bins: Dict[int, int] = {}
+        self.zero = 0
+        self.count = 0
+        self.sum = 0.0
+
+    def key(self, value: float) -> Optional[int]:
+        """Bin of `value`, or None for the zero bin"""
+        if value <= 0:
+            return None
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def add(self, value: float, count: int = 1):
+        key = self.key(value)
+        if key is None:
+            self.zero += count
+        else:
+            self.bins[key] = self.bins.get(key, 0) + count
+        self.count += count
+        self.sum += value * count
+
+    def merge(self, other: "QuantileSketch"):
+        for key, count in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + count
+        self.zero += other.zero
+        self.count += other.count
+        self.sum += other.sum
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate of the value at rank floor(q * (count - 1)), or None when empty"""
+        if not self.count:
+            return None
+        rank = math.floor(q * (self.count - 1))
+        seen = self.zero
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if rank < seen:
+                # Midpoint of the bin in relative terms
+                return 2 * self.gamma ** key / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.bins) / (self.gamma + 1)
+
+    def mean(self) -> Optional[float]:
+        return self.sum / self.count if self.count else None
+
+    def to_doc(self) -> dict:
+        # Bin keys are strings so the document is valid JSON and BSON
+        return {
+            "count": self.count,
+            "zero": self.zero,
+            "sum": self.sum,
+            "bins": {str(key): count for key, count in self.bins.items()},
+        }
+
+    @classmethod
+    def from_doc(cls, doc: dict) -> "QuantileSketch":
+        sketch = cls()
+        sketch.count = doc.get("count", 0)
+        sketch.zero = doc.get("zero", 0)
+        sketch.sum = doc.get("sum", 0.0)
+        sketch.bins = {int(key): count for key, count in (doc.get("bins") or {}).items()}
+        return sketch
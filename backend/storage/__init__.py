@@ -0,0 +1,36 @@
+"""Storage backends for timers, sessions and templates, chosen by STORAGE_BACKEND"""
+import os
+from typing import Callable, Optional
+
+from storage.base import (
+    STATS_BACKFILL_REQUESTS, SessionColumns, SessionRepository, Storage, TemplateRepository, TimerProgress,
+    TimerRepository, TimerWrite, VersionRepository, WriteResult, apply_timer_update
+)
+
+
+__all__ = [
+    "STATS_BACKFILL_REQUESTS", "SessionColumns", "SessionRepository", "Storage", "TemplateRepository",
+    "TimerProgress", "TimerRepository", "TimerWrite", "VersionRepository", "WriteResult", "apply_timer_update",
+    "create_storage",
+]
+
+
+def create_storage(on_command: Optional[Callable[[str, str, float], None]] = None) -> Storage:
+    """Build the backend named by STORAGE_BACKEND (mongo, memory or sqlite)
+
+    `on_command` is called with the collection, name and duration in seconds
+    of every database command, where the backend can observe them.
+    """
+    backend = os.environ.get('STORAGE_BACKEND', 'mongo')
+    if backend == 'mongo':
+        from storage.mongo import MongoStorage
+        # SESSION_LAYOUT=buckets packs sessions into per-day bucket documents
+        return MongoStorage(os.environ['MONGO_URL'], os.environ['DB_NAME'],
+                            os.environ.get('SESSION_LAYOUT', 'documents'), on_command)
+    if backend == 'memory':
+        from storage.memory import MemoryStorage
+        return MemoryStorage()
+    if backend == 'sqlite':
+        from storage.sqlite import SQLiteStorage
+        return SQLiteStorage(os.environ.get('SQLITE_PATH', 'power_timer.db'))
+    raise ValueError(f"Unknown STORAGE_BACKEND: {backend}")
@@ -0,0 +1,389 @@
+"""Repository interfaces shared by every storage backend"""
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone, tzinfo
+from typing import Any, AsyncIterator, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from models import TimerSession, TimerStatus, TimerUpdate, deadline_after, remaining_until
+from sketches import QuantileSketch
+
+
+class TimerWrite(NamedTuple):
+    """One create, update or delete inside a bulk timer write"""
+    op: str
+    timer_id: str
+    doc: Optional[dict] = None
+    update: Optional[TimerUpdate] = None
+
+
+class TimerProgress(NamedTuple):
+    """A progress-only PATCH: the remaining time a client reported at `at`"""
+    user_id: str
+    timer_id: str
+    remaining_seconds: int
+    at: datetime
+    # The timer as acknowledged to the client; not written
+    doc: Optional[dict] = None
+
+
+class WriteResult(NamedTuple):
+    found: bool
+    doc: Optional[dict] = None
+    completed: bool = False
+
+
+def apply_timer_update(doc: dict, update: TimerUpdate, now: datetime) -> dict:
+    """Reference semantics of a PATCH, applied to a copy of the stored timer
+
+    Backends that cannot express the transition as a server-side update run
+    this while holding whatever guarantees atomicity for them.
+    """
+    doc = dict(doc)
+
+    # A rename leaves a running timer's deadline alone
+    if update.status is None and update.remaining_seconds is None:
+        if update.name is not None:
+            doc['name'] = update.name
+            doc['updated_at'] = now
+        return doc
+
+    if update.remaining_seconds is not None:
+        remaining = update.remaining_seconds
+    elif doc['status'] == TimerStatus.RUNNING and doc.get('ends_at'):
+        remaining = remaining_until(doc['ends_at'], now)
+    else:
+        remaining = doc['remaining_seconds']
+    doc['remaining_seconds'] = remaining
+
+    # Handle status changes
+    if update.status:
+        if update.status == TimerStatus.RUNNING:
+            doc['started_at'] = now
+            doc['paused_at'] = None
+        elif update.status == TimerStatus.PAUSED:
+            doc['paused_at'] = now
+        elif update.status == TimerStatus.COMPLETED:
+            doc['completed_at'] = now
+
+        doc['status'] = update.status.value
+
+    # Handle other updates
+    if update.name is not None:
+        doc['name'] = update.name
+
+    # Running timers carry a deadline; every other state stores remaining time
+    running = doc['status'] == TimerStatus.RUNNING
+    doc['ends_at'] = deadline_after(now, remaining) if running else None
+    doc['updated_at'] = now
+    return doc
+
+
+def expire_timer_doc(doc: dict, deadline: datetime, now: datetime) -> dict:
+    return {**doc, "status": TimerStatus.COMPLETED.value, "remaining_seconds": 0,
+            "completed_at": deadline, "ends_at": None, "updated_at": now}
+
+
+# Version counter bumped by a backend that drops rollups it cannot keep, so
+# the next statistics backfill runs again even at the same backfill version
+STATS_BACKFILL_REQUESTS = "stats_backfill_requests"
+
+
+def rollup_id(user_id: str, key: str) -> str:
+    """Rollups are per tenant, so every rollup key is prefixed with its user"""
+    return f"{user_id}:{key}"
+
+
+def rollup_increments(sessions: Iterable[TimerSession]) -> Dict[str, Tuple[Dict[str, int], Dict[str, str]]]:
+    """Per rollup key, the counters to add and the fields identifying the rollup"""
+    increments = {}
+    for session in sessions:
+        day = session.session_date.date().isoformat()
+        user_id = session.user_id
+        for key, fields in (
+            ("global", {"kind": "global"}),
+            (f"category:{session.category}", {"kind": "category", "category": session.category}),
+            (f"day:{day}", {"kind": "day", "day": day}),
+        ):
+            inc, _ = increments.setdefault(
+                rollup_id(user_id, key), ({"sessions": 0, "time_seconds": 0}, {"user_id": user_id, **fields})
+            )
+            inc["sessions"] += 1
+            inc["time_seconds"] += session.completed_seconds
+    return increments
+
+
+def fold_rollup_groups(groups: Iterable[Tuple[str, str, str, int, int]]) -> Dict[str, dict]:
+    """Rollup documents keyed by id, from (user_id, category, day, sessions, seconds) groups"""
+    rollups = {}
+
+    def fold(user_id: str, key: str, fields: Dict[str, str], sessions: int, seconds: int):
+        doc = rollups.setdefault(rollup_id(user_id, key), {
+            "_id": rollup_id(user_id, key), "user_id": user_id, **fields, "sessions": 0, "time_seconds": 0
+        })
+        doc["sessions"] += sessions
+        doc["time_seconds"] += seconds
+
+    for user_id, category, day, sessions, seconds in groups:
+        fold(user_id, "global", {"kind": "global"}, sessions, seconds)
+        fold(user_id, f"category:{category}", {"kind": "category", "category": category}, sessions, seconds)
+        fold(user_id, f"day:{day}", {"kind": "day", "day": day}, sessions, seconds)
+    return rollups
+
+
+# Distribution sketches: one per tenant, metric and scope (overall or a category)
+SKETCH_METRICS = ("duration", "completion")
+SketchRow = Tuple[str, str, int, int]
+
+
+def fold_sketches(sketches: Dict[str, Tuple[dict, QuantileSketch]],
+                  rows: Iterable[SketchRow]) -> Dict[str, Tuple[dict, QuantileSketch]]:
+    """Add (user_id, category, completed_seconds, duration_seconds) rows to `sketches` by sketch id"""
+    for user_id, category, completed, duration in rows:
+        values = {"duration": completed, "completion": completed / duration if duration > 0 else 0.0}
+        for metric, value in values.items():
+            for key, scope in ((f"sketch:{metric}", None), (f"sketch:{metric}:{category}", category)):
+                _, sketch = sketches.setdefault(rollup_id(user_id, key), (
+                    {"user_id": user_id, "metric": metric, "category": scope}, QuantileSketch()
+                ))
+                sketch.add(value)
+    return sketches
+
+
+def sketch_increments(sessions: Iterable[TimerSession]) -> Dict[str, Tuple[dict, QuantileSketch]]:
+    """Per sketch id, the fields identifying the sketch and a sketch of just these sessions"""
+    return fold_sketches({}, (
+        (session.user_id, session.category, session.completed_seconds, session.duration_seconds)
+        for session in sessions
+    ))
+
+
+# Range statistics: (bucket start in UTC, category, sessions, seconds)
+RangeGroup = Tuple[datetime, str, int, int]
+
+
+class SessionColumns(NamedTuple):
+    """The fields productivity reports read, as parallel lists with one entry per session"""
+    session_date: List[datetime]
+    category: List[str]
+    completed_seconds: List[int]
+
+
+def bucket_start(moment: datetime, granularity: str, zone: tzinfo) -> datetime:
+    """UTC start of the local hour, day or ISO week (from Monday) containing `moment`"""
+    local = moment.replace(tzinfo=timezone.utc).astimezone(zone)
+    if granularity == "hour":
+        local = local.replace(minute=0, second=0, microsecond=0)
+    else:
+        local = local.replace(hour=0, minute=0, second=0, microsecond=0)
+        if granularity == "week":
+            local -= timedelta(days=local.weekday())
+    return local.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def fold_range_groups(groups: Iterable[RangeGroup], granularity: str, zone: tzinfo) -> List[RangeGroup]:
+    """Re-bucket finer (moment, category, sessions, seconds) groups, sorted by bucket"""
+    buckets = {}
+    for moment, category, sessions, seconds in groups:
+        counts = buckets.setdefault((bucket_start(moment, granularity, zone), category), [0, 0])
+        counts[0] += sessions
+        counts[1] += seconds
+    return sorted((start, category, sessions, seconds)
+                  for (start, category), (sessions, seconds) in buckets.items())
+
+
+class TimerRepository(ABC):
+    """Timers partitioned by tenant: every request-path method is scoped to
+    one `user_id`, and only background maintenance spans all tenants"""
+
+    @abstractmethod
+    async def insert(self, doc: dict):
+        ...
+
+    @abstractmethod
+    async def get(self, user_id: str, timer_id: str) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    async def list_active(self, user_id: str, limit: int, after: Optional[Tuple[datetime, str]] = None,
+                          fields: Optional[Set[str]] = None) -> List[dict]:
+        """Active timers ordered by (created_at, id), strictly after `after`
+
+        With `fields`, only those keys (plus whatever the backend needs) are
+        read from the store.
+        """
+
+    @abstractmethod
+    async def update(self, user_id: str, timer_id: str, update: TimerUpdate, now: datetime) -> WriteResult:
+        """Atomically apply a PATCH; `completed` is set only for the caller
+        that moved the timer into COMPLETED"""
+
+    @abstractmethod
+    async def delete(self, user_id: str, timer_id: str, now: datetime) -> bool:
+        """Delete a timer, leaving a tombstone stamped `now` for delta sync"""
+
+    @abstractmethod
+    async def bulk(self, user_id: str, writes: List[TimerWrite], now: datetime) -> List[WriteResult]:
+        """Apply writes in order, with one result per write"""
+
+    @abstractmethod
+    async def save_progress(self, progress: List[TimerProgress]) -> int:
+        """Apply progress updates to active timers in one round trip; returns how many applied
+
+        An update is skipped when the timer was written after its `at`, so a
+        late flush never undoes a newer write from another worker.
+        """
+
+    @abstractmethod
+    async def expire(self, user_id: str, timer_id: str, deadline: datetime, now: datetime) -> Optional[dict]:
+        """Complete a timer if it is still running towards `deadline`"""
+
+    @abstractmethod
+    async def running_deadlines(self, horizon: Optional[datetime]) -> List[Tuple[str, str, datetime]]:
+        """(user_id, id, ends_at) of running timers due by `horizon`, or of all of them"""
+
+    @abstractmethod
+    async def count_running(self, user_id: Optional[str] = None) -> int:
+        """Running timers of one tenant, or of all of them"""
+
+    @abstractmethod
+    async def archive_completed(self, completed_before: datetime, limit: int) -> int:
+        """Move up to `limit` timers completed before `completed_before` to the archive
+
+        A timer restarted while being moved stays in the hot store; moving
+        the same timer twice is harmless.
+        """
+
+    @abstractmethod
+    async def get_archived(self, user_id: str, timer_id: str) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    async def list_archived(self, user_id: str, limit: int, before: Optional[Tuple[datetime, str]] = None,
+                            category: Optional[str] = None) -> List[dict]:
+        """Archived timers newest first by (completed_at, id), strictly before `before`"""
+
+    @abstractmethod
+    async def purge_archived(self, completed_before: datetime) -> int:
+        """Drop archived timers completed before `completed_before`"""
+
+    @abstractmethod
+    async def changes(self, user_id: str, since: datetime, limit: int) -> Tuple[List[dict], List[str]]:
+        """Timers written at or after `since`, hot or archived, and ids deleted since then
+
+        At most `limit` timers are returned; callers ask for one more than
+        they can use to tell whether the list was cut short.
+        """
+
+    @abstractmethod
+    async def purge_tombstones(self, deleted_before: datetime) -> int:
+        ...
+
+
+class SessionRepository(ABC):
+    @abstractmethod
+    async def add(self, sessions: List[TimerSession]):
+        """Store completed sessions and fold them into their tenants' stats rollups and sketches"""
+
+    @abstractmethod
+    async def count(self, user_id: str) -> int:
+        ...
+
+    @abstractmethod
+    async def get(self, user_id: str, session_id: str) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    def stream(self, user_id: str, start: Optional[datetime], end: Optional[datetime],
+               category: Optional[str], after: Optional[Tuple[datetime, str]],
+               batch_size: int) -> AsyncIterator[dict]:
+        """Sessions ordered by (session_date, id), strictly after `after`
+
+        Rows are fetched `batch_size` at a time, so memory stays flat however
+        many sessions match.
+        """
+
+    @abstractmethod
+    async def read_rollups(self, user_id: str, day: str) -> List[dict]:
+        """The global and category rollups, plus the rollup for `day` if any"""
+
+    @abstractmethod
+    async def read_sketches(self, user_id: str) -> List[dict]:
+        """The tenant's sketches: metric, category (None overall) and QuantileSketch.to_doc fields"""
+
+    @abstractmethod
+    async def rebuild_rollups(self) -> int:
+        """Recompute every tenant's rollups and sketches from the raw sessions; returns the rollup count"""
+
+    @abstractmethod
+    async def aggregate_range(self, user_id: str, start: datetime, end: datetime, granularity: str,
+                              tz: str) -> List[RangeGroup]:
+        """Sessions in [start, end) grouped per local `granularity` bucket and category
+
+        Grouping happens in the store; only the groups are returned, sorted
+        by bucket.
+        """
+
+    @abstractmethod
+    async def read_columns(self, user_id: str, start: datetime, end: datetime) -> SessionColumns:
+        """session_date, category and completed_seconds of the sessions in [start, end)
+
+        Only these fields are read, and the (user_id, session_date, category,
+        completed_seconds) index holds all of them.
+        """
+
+
+class TemplateRepository(ABC):
+    @abstractmethod
+    async def list_all(self, user_id: str) -> List[dict]:
+        ...
+
+    @abstractmethod
+    async def get(self, user_id: str, template_id: str) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    async def get_by_name(self, user_id: str, name: str) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    async def insert(self, doc: dict):
+        ...
+
+    @abstractmethod
+    async def seed(self, user_id: str, docs: List[dict]) -> int:
+        """Insert the templates whose names the tenant lacks, in one round trip; returns how many"""
+        ...
+
+
+class VersionRepository(ABC):
+    """Change counters shared by every worker, one per key"""
+
+    @abstractmethod
+    async def get(self, key: str) -> int:
+        ...
+
+    @abstractmethod
+    async def bump(self, key: str):
+        ...
+
+    @abstractmethod
+    async def claim(self, key: str) -> bool:
+        """Set `key` to 1 if it has never been set; True only for the caller that did"""
+        ...
+
+
+class Storage(ABC):
+    name: str
+    timers: TimerRepository
+    sessions: SessionRepository
+    templates: TemplateRepository
+    versions: VersionRepository
+
+    async def connect(self):
+        """Prepare schema and indexes; safe to call on every startup"""
+
+    async def close(self):
+        ...
+
+    @abstractmethod
+    async def describe_indexes(self) -> Dict[str, Any]:
+        ...
@@ -0,0 +1,335 @@
+"""In-process backend for benchmarks, tests and single-node deployments"""
+import bisect
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+from zoneinfo import ZoneInfo
+
+from models import ACTIVE_STATUSES, TimerSession, TimerStatus, TimerUpdate
+from storage.base import (
+    RangeGroup, SessionColumns, SessionRepository, Storage, TemplateRepository, TimerProgress, TimerRepository,
+    TimerWrite, VersionRepository, WriteResult, apply_timer_update, expire_timer_doc, fold_range_groups,
+    fold_sketches, rollup_id, rollup_increments
+)
+from sketches import QuantileSketch
+
+
+def _project(doc: dict, fields: Optional[Set[str]]) -> dict:
+    if fields is None:
+        return dict(doc)
+    return {field: doc.get(field) for field in fields | {"id", "created_at"}}
+
+
+def _owned(doc: Optional[dict], user_id: str) -> Optional[dict]:
+    """A copy of `doc` if it belongs to `user_id`"""
+    return dict(doc) if doc is not None and doc["user_id"] == user_id else None
+
+
+class MemoryTimerRepository(TimerRepository):
+    """Timers by id, plus a sorted (user_id, created_at, id) index of the active ones
+
+    No awaits happen between reading and writing a timer, so every method is
+    atomic with respect to other requests on the event loop.
+    """
+
+    def __init__(self):
+        self._by_id: Dict[str, dict] = {}
+        self._active: List[Tuple[str, datetime, str]] = []
+        self._running: Dict[str, datetime] = {}
+        self._archive: Dict[str, dict] = {}
+        self._tombstones: Dict[str, Tuple[str, datetime]] = {}
+
+    def _put(self, doc: dict):
+        previous = self._by_id.get(doc["id"])
+        if previous is not None:
+            self._unindex(previous)
+        doc = dict(doc)
+        if isinstance(doc.get("status"), TimerStatus):
+            doc["status"] = doc["status"].value
+        self._by_id[doc["id"]] = doc
+        if doc["status"] in ACTIVE_STATUSES:
+            bisect.insort(self._active, (doc["user_id"], doc["created_at"], doc["id"]))
+        if doc["status"] == TimerStatus.RUNNING and doc.get("ends_at"):
+            self._running[doc["id"]] = doc["ends_at"]
+
+    def _unindex(self, doc: dict):
+        key = (doc["user_id"], doc["created_at"], doc["id"])
+        position = bisect.bisect_left(self._active, key)
+        if position < len(self._active) and self._active[position] == key:
+            del self._active[position]
+        self._running.pop(doc["id"], None)
+
+    async def insert(self, doc: dict):
+        self._put(doc)
+
+    async def get(self, user_id: str, timer_id: str) -> Optional[dict]:
+        return _owned(self._by_id.get(timer_id), user_id)
+
+    async def list_active(self, user_id: str, limit: int, after: Optional[Tuple[datetime, str]] = None,
+                          fields: Optional[Set[str]] = None) -> List[dict]:
+        if after:
+            start = bisect.bisect_right(self._active, (user_id, *after))
+        else:
+            start = bisect.bisect_left(self._active, (user_id,))
+        timers = []
+        for owner, _, timer_id in self._active[start:start + limit]:
+            if owner != user_id:
+                break
+            timers.append(_project(self._by_id[timer_id], fields))
+        return timers
+
+    def _update(self, user_id: str, timer_id: str, update: TimerUpdate, now: datetime) -> WriteResult:
+        doc = _owned(self._by_id.get(timer_id), user_id)
+        if doc is None:
+            return WriteResult(False)
+        # Completing an already completed timer is a no-op
+        if update.status == TimerStatus.COMPLETED and doc["status"] == TimerStatus.COMPLETED:
+            return WriteResult(True, doc)
+        doc = apply_timer_update(doc, update, now)
+        self._put(doc)
+        return WriteResult(True, dict(doc), update.status == TimerStatus.COMPLETED)
+
+    def _delete(self, timer_id: str) -> bool:
+        doc = self._by_id.pop(timer_id, None)
+        if doc is None:
+            return False
+        self._unindex(doc)
+        return True
+
+    def _delete_with_tombstone(self, user_id: str, timer_id: str, now: datetime) -> bool:
+        if _owned(self._by_id.get(timer_id), user_id) is None:
+            return False
+        self._delete(timer_id)
+        self._tombstones[timer_id] = (user_id, now)
+        return True
+
+    async def update(self, user_id: str, timer_id: str, update: TimerUpdate, now: datetime) -> WriteResult:
+        return self._update(user_id, timer_id, update, now)
+
+    async def delete(self, user_id: str, timer_id: str, now: datetime) -> bool:
+        return self._delete_with_tombstone(user_id, timer_id, now)
+
+    async def bulk(self, user_id: str, writes: List[TimerWrite], now: datetime) -> List[WriteResult]:
+        results = []
+        for write in writes:
+            if write.op == "create":
+                self._put(write.doc)
+                results.append(WriteResult(True, write.doc))
+            elif write.op == "update":
+                results.append(self._update(user_id, write.timer_id, write.update, now))
+            else:
+                results.append(WriteResult(self._delete_with_tombstone(user_id, write.timer_id, now)))
+        return results
+
+    async def save_progress(self, progress: List[TimerProgress]) -> int:
+        applied = 0
+        for item in progress:
+            doc = _owned(self._by_id.get(item.timer_id), item.user_id)
+            if (doc is None or doc["status"] not in ACTIVE_STATUSES
+                    or (doc.get("updated_at") is not None and doc["updated_at"] > item.at)):
+                continue
+            self._put(apply_timer_update(doc, TimerUpdate(remaining_seconds=item.remaining_seconds), item.at))
+            applied += 1
+        return applied
+
+    async def expire(self, user_id: str, timer_id: str, deadline: datetime, now: datetime) -> Optional[dict]:
+        if self._running.get(timer_id) != deadline or self._by_id[timer_id]["user_id"] != user_id:
+            return None
+        doc = expire_timer_doc(self._by_id[timer_id], deadline, now)
+        self._put(doc)
+        return dict(doc)
+
+    async def running_deadlines(self, horizon: Optional[datetime]) -> List[Tuple[str, str, datetime]]:
+        return [(self._by_id[timer_id]["user_id"], timer_id, ends_at) for timer_id, ends_at in self._running.items()
+                if horizon is None or ends_at <= horizon]
+
+    async def count_running(self, user_id: Optional[str] = None) -> int:
+        if user_id is None:
+            return len(self._running)
+        return sum(1 for timer_id in self._running if self._by_id[timer_id]["user_id"] == user_id)
+
+    async def archive_completed(self, completed_before: datetime, limit: int) -> int:
+        moved = [doc for doc in self._by_id.values()
+                 if doc["status"] == TimerStatus.COMPLETED and doc["completed_at"] < completed_before][:limit]
+        for doc in moved:
+            self._archive[doc["id"]] = doc
+            self._delete(doc["id"])
+        return len(moved)
+
+    async def get_archived(self, user_id: str, timer_id: str) -> Optional[dict]:
+        return _owned(self._archive.get(timer_id), user_id)
+
+    async def list_archived(self, user_id: str, limit: int, before: Optional[Tuple[datetime, str]] = None,
+                            category: Optional[str] = None) -> List[dict]:
+        matches = sorted(
+            (doc for doc in self._archive.values()
+             if doc["user_id"] == user_id
+             and (category is None or doc["category"] == category)
+             and (before is None or (doc["completed_at"], doc["id"]) < before)),
+            key=lambda doc: (doc["completed_at"], doc["id"]),
+            reverse=True
+        )
+        return [dict(doc) for doc in matches[:limit]]
+
+    async def purge_archived(self, completed_before: datetime) -> int:
+        expired = [timer_id for timer_id, doc in self._archive.items() if doc["completed_at"] < completed_before]
+        for timer_id in expired:
+            del self._archive[timer_id]
+        return len(expired)
+
+    async def changes(self, user_id: str, since: datetime, limit: int) -> Tuple[List[dict], List[str]]:
+        changed = [dict(doc) for docs in (self._by_id, self._archive) for doc in docs.values()
+                   if doc["user_id"] == user_id and doc.get("updated_at") is not None
+                   and doc["updated_at"] >= since]
+        changed.sort(key=lambda doc: (doc["updated_at"], doc["id"]))
+        deleted = [timer_id for timer_id, (owner, deleted_at) in self._tombstones.items()
+                   if owner == user_id and deleted_at >= since]
+        return changed[:limit], deleted
+
+    async def purge_tombstones(self, deleted_before: datetime) -> int:
+        expired = [timer_id for timer_id, (_, deleted_at) in self._tombstones.items() if deleted_at < deleted_before]
+        for timer_id in expired:
+            del self._tombstones[timer_id]
+        return len(expired)
+
+
+class MemorySessionRepository(SessionRepository):
+    """Sessions, rollups and sketches kept per tenant"""
+
+    def __init__(self):
+        self._sessions: Dict[str, List[dict]] = {}
+        self._rollups: Dict[str, dict] = {}
+        self._sketches: Dict[str, Tuple[dict, QuantileSketch]] = {}
+
+    def _fold(self, sessions: List[TimerSession]):
+        for key, (inc, fields) in rollup_increments(sessions).items():
+            rollup = self._rollups.setdefault(key, {"_id": key, **fields, "sessions": 0, "time_seconds": 0})
+            rollup["sessions"] += inc["sessions"]
+            rollup["time_seconds"] += inc["time_seconds"]
+        fold_sketches(self._sketches, (
+            (session.user_id, session.category, session.completed_seconds, session.duration_seconds)
+            for session in sessions
+        ))
+
+    async def add(self, sessions: List[TimerSession]):
+        for session in sessions:
+            self._sessions.setdefault(session.user_id, []).append(session.dict())
+        self._fold(sessions)
+
+    async def count(self, user_id: str) -> int:
+        return len(self._sessions.get(user_id, []))
+
+    async def get(self, user_id: str, session_id: str) -> Optional[dict]:
+        return next((dict(session) for session in self._sessions.get(user_id, [])
+                     if session["id"] == session_id), None)
+
+    async def stream(self, user_id: str, start: Optional[datetime], end: Optional[datetime],
+                     category: Optional[str], after: Optional[Tuple[datetime, str]],
+                     batch_size: int) -> AsyncIterator[dict]:
+        matches = sorted(
+            (session for session in self._sessions.get(user_id, [])
+             if (start is None or session["session_date"] >= start)
+             and (end is None or session["session_date"] < end)
+             and (category is None or session["category"] == category)
+             and (after is None or (session["session_date"], session["id"]) > after)),
+            key=lambda session: (session["session_date"], session["id"])
+        )
+        for session in matches:
+            yield dict(session)
+
+    async def read_rollups(self, user_id: str, day: str) -> List[dict]:
+        return [dict(rollup) for key, rollup in self._rollups.items()
+                if rollup["user_id"] == user_id
+                and (rollup["kind"] in ("global", "category") or key == rollup_id(user_id, f"day:{day}"))]
+
+    async def read_sketches(self, user_id: str) -> List[dict]:
+        return [{**fields, **sketch.to_doc()} for fields, sketch in self._sketches.values()
+                if fields["user_id"] == user_id]
+
+    async def rebuild_rollups(self) -> int:
+        self._rollups = {}
+        self._sketches = {}
+        for sessions in self._sessions.values():
+            self._fold([TimerSession(**session) for session in sessions])
+        return len(self._rollups)
+
+    async def aggregate_range(self, user_id: str, start: datetime, end: datetime, granularity: str,
+                              tz: str) -> List[RangeGroup]:
+        groups = ((session["session_date"], session["category"], 1, session["completed_seconds"])
+                  for session in self._sessions.get(user_id, []) if start <= session["session_date"] < end)
+        return fold_range_groups(groups, granularity, ZoneInfo(tz))
+
+    async def read_columns(self, user_id: str, start: datetime, end: datetime) -> SessionColumns:
+        matches = [session for session in self._sessions.get(user_id, []) if start <= session["session_date"] < end]
+        return SessionColumns(
+            [session["session_date"] for session in matches],
+            [session["category"] for session in matches],
+            [session["completed_seconds"] for session in matches]
+        )
+
+
+class MemoryTemplateRepository(TemplateRepository):
+    def __init__(self):
+        self._by_id: Dict[str, dict] = {}
+        self._by_name: Dict[Tuple[str, str], str] = {}
+
+    async def list_all(self, user_id: str) -> List[dict]:
+        return [dict(doc) for doc in self._by_id.values() if doc["user_id"] == user_id]
+
+    async def get(self, user_id: str, template_id: str) -> Optional[dict]:
+        return _owned(self._by_id.get(template_id), user_id)
+
+    async def get_by_name(self, user_id: str, name: str) -> Optional[dict]:
+        template_id = self._by_name.get((user_id, name))
+        return await self.get(user_id, template_id) if template_id else None
+
+    async def insert(self, doc: dict):
+        self._by_id[doc["id"]] = dict(doc)
+        self._by_name.setdefault((doc["user_id"], doc["name"]), doc["id"])
+
+    async def seed(self, user_id: str, docs: List[dict]) -> int:
+        missing = [doc for doc in docs if (user_id, doc["name"]) not in self._by_name]
+        for doc in missing:
+            await self.insert(doc)
+        return len(missing)
+
+
+class MemoryVersionRepository(VersionRepository):
+    def __init__(self):
+        self._versions: Dict[str, int] = {}
+
+    async def get(self, key: str) -> int:
+        return self._versions.get(key, 0)
+
+    async def bump(self, key: str):
+        self._versions[key] = self._versions.get(key, 0) + 1
+
+    async def claim(self, key: str) -> bool:
+        if key in self._versions:
+            return False
+        self._versions[key] = 1
+        return True
+
+
+class MemoryStorage(Storage):
+    name = "memory"
+
+    def __init__(self):
+        self.timers = MemoryTimerRepository()
+        self.sessions = MemorySessionRepository()
+        self.templates = MemoryTemplateRepository()
+        self.versions = MemoryVersionRepository()
+
+    async def describe_indexes(self) -> Dict[str, Any]:
+        return {
+            "backend": "memory",
+            "indexes": {
+                "timers": ["id", "active (user_id, created_at, id)", "running ends_at"],
+                "timers_archive": ["id"],
+                "timer_tombstones": ["id"],
+                "timer_sessions": ["user_id"],
+                "timer_templates": ["id", "(user_id, name)"],
+                "stats_rollups": ["_id"],
+                "stats_sketches": ["_id"],
+            },
+            "plans": {},
+        }
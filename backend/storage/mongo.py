@@ -0,0 +1,1050 @@
+"""MongoDB backend on Motor"""
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set, Tuple
+
+from bson import Binary
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, DeleteOne, IndexModel, InsertOne, ReplaceOne, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+from pymongo.monitoring import CommandListener
+
+from models import ACTIVE_STATUSES, DEFAULT_USER_ID, TimerSession, TimerStatus, TimerUpdate, deadline_after
+from storage.base import (
+    STATS_BACKFILL_REQUESTS, RangeGroup, SessionColumns, SessionRepository, SketchRow, Storage, TemplateRepository,
+    TimerProgress, TimerRepository, TimerWrite, VersionRepository, WriteResult, fold_rollup_groups, fold_sketches,
+    rollup_id, rollup_increments, sketch_increments
+)
+from sketches import QuantileSketch
+
+
+logger = logging.getLogger(__name__)
+
+# Projected session rows are small, so reports fetch them in large batches
+COLUMN_BATCH_SIZE = 10000
+
+# A rollup rebuild publishes a cutoff this far ahead: sessions dated from it on
+# are folded into the collections being rebuilt, and the rebuild waits as long
+# again past it for earlier sessions to be stored. Keep it above the session
+# write-behind interval and the clock skew between workers.
+REBUILD_SETTLE_SECONDS = 5.0
+# A rebuild that has not finished by then is presumed dead and can be replaced
+REBUILD_TIMEOUT_SECONDS = 3600
+REBUILT_COLLECTIONS = {"stats_rollups": "stats_rollups_rebuild", "stats_sketches": "stats_sketches_rebuild"}
+
+# Spelled out rather than {"$ne": "completed"} so the user_status_created_at_id
+# index scans one range per active status, merged in created_at order
+ACTIVE_TIMER_QUERY = {"status": {"$in": ACTIVE_STATUSES}}
+
+
+def timer_update_pipeline(update_data: TimerUpdate, now: datetime,
+                          completion_id: Optional[str] = None) -> List[dict]:
+    """Aggregation-pipeline update that applies a PATCH to the stored timer
+
+    Remaining time and the deadline are derived from the document as it is
+    at write time, so the whole transition runs in one find-and-modify.
+    `completion_id` is stamped on a completing timer so a caller that cannot
+    see per-document results (bulk writes) can tell whether it won the race.
+    """
+    changes = {}
+
+    # Handle status changes
+    if update_data.status:
+        if update_data.status == TimerStatus.RUNNING:
+            changes['started_at'] = {"$literal": now}
+            changes['paused_at'] = None
+        elif update_data.status == TimerStatus.PAUSED:
+            changes['paused_at'] = {"$literal": now}
+        elif update_data.status == TimerStatus.COMPLETED:
+            changes['completed_at'] = {"$literal": now}
+            if completion_id:
+                changes['completion_id'] = {"$literal": completion_id}
+
+        changes['status'] = {"$literal": update_data.status.value}
+
+    # Handle other updates
+    if update_data.name is not None:
+        changes['name'] = {"$literal": update_data.name}
+
+    # A rename leaves a running timer's deadline alone
+    if update_data.status is None and update_data.remaining_seconds is None:
+        return [{"$set": {**changes, "updated_at": {"$literal": now}}}] if changes else []
+
+    if update_data.remaining_seconds is not None:
+        remaining = {"$literal": update_data.remaining_seconds}
+    else:
+        remaining = {"$cond": [
+            {"$and": [
+                {"$eq": ["$status", TimerStatus.RUNNING.value]},
+                {"$ne": [{"$ifNull": ["$ends_at", None]}, None]}
+            ]},
+            {"$max": [0, {"$ceil": {"$divide": [{"$subtract": ["$ends_at", now]}, 1000]}}]},
+            "$remaining_seconds"
+        ]}
+
+    # Running timers carry a deadline; every other state stores remaining time
+    status = changes.get('status', "$status")
+    changes['ends_at'] = {"$cond": [
+        {"$eq": [status, TimerStatus.RUNNING.value]},
+        {"$add": [now, {"$multiply": ["$remaining_seconds", 1000]}]},
+        None
+    ]}
+    changes['updated_at'] = {"$literal": now}
+    return [{"$set": {"remaining_seconds": remaining}}, {"$set": changes}]
+
+
+def _update_query(user_id: str, timer_id: str, update: TimerUpdate) -> dict:
+    query = {"user_id": user_id, "id": timer_id}
+    # Only one writer may move a timer into COMPLETED
+    if update.status == TimerStatus.COMPLETED:
+        query["status"] = {"$ne": TimerStatus.COMPLETED.value}
+    return query
+
+
+class MongoTimerRepository(TimerRepository):
+    def __init__(self, db):
+        self.db = db
+
+    async def insert(self, doc: dict):
+        await self.db.timers.insert_one(doc)
+
+    async def get(self, user_id: str, timer_id: str) -> Optional[dict]:
+        return await self.db.timers.find_one({"user_id": user_id, "id": timer_id})
+
+    async def list_active(self, user_id: str, limit: int, after: Optional[Tuple[datetime, str]] = None,
+                          fields: Optional[Set[str]] = None) -> List[dict]:
+        query = {"user_id": user_id, **ACTIVE_TIMER_QUERY}
+        if after:
+            created_at, timer_id = after
+            query = {"$and": [query, {"$or": [
+                {"created_at": {"$gt": created_at}},
+                {"created_at": created_at, "id": {"$gt": timer_id}}
+            ]}]}
+        projection = None
+        if fields is not None:
+            projection = {field: 1 for field in fields | {"id", "created_at"}}
+            projection["_id"] = 0
+        return await self.db.timers.find(query, projection) \
+            .sort([("created_at", ASCENDING), ("id", ASCENDING)]) \
+            .to_list(limit)
+
+    async def update(self, user_id: str, timer_id: str, update: TimerUpdate, now: datetime) -> WriteResult:
+        pipeline = timer_update_pipeline(update, now)
+        if pipeline:
+            doc = await self.db.timers.find_one_and_update(
+                _update_query(user_id, timer_id, update), pipeline, return_document=ReturnDocument.AFTER
+            )
+            if doc is not None:
+                return WriteResult(True, doc, update.status == TimerStatus.COMPLETED)
+        doc = await self.db.timers.find_one({"user_id": user_id, "id": timer_id})
+        return WriteResult(doc is not None, doc)
+
+    async def _bury(self, user_id: str, timer_ids: List[str], now: datetime):
+        """Leave tombstones so delta sync can report the deletes"""
+        await self.db.timer_tombstones.bulk_write([
+            UpdateOne({"user_id": user_id, "id": timer_id}, {"$set": {"deleted_at": now}}, upsert=True)
+            for timer_id in timer_ids
+        ], ordered=False)
+
+    async def delete(self, user_id: str, timer_id: str, now: datetime) -> bool:
+        result = await self.db.timers.delete_one({"user_id": user_id, "id": timer_id})
+        if result.deleted_count == 0:
+            return False
+        await self._bury(user_id, [timer_id], now)
+        return True
+
+    async def bulk(self, user_id: str, writes: List[TimerWrite], now: datetime) -> List[WriteResult]:
+        batch_id = str(uuid.uuid4())
+        requests = []
+        for index, write in enumerate(writes):
+            if write.op == "create":
+                requests.append(InsertOne(write.doc))
+            elif write.op == "update":
+                pipeline = timer_update_pipeline(write.update, now, completion_id=f"{batch_id}:{index}")
+                if pipeline:
+                    requests.append(UpdateOne(_update_query(user_id, write.timer_id, write.update), pipeline))
+            else:
+                requests.append(DeleteOne({"user_id": user_id, "id": write.timer_id}))
+
+        # Bulk results carry counts rather than per-document outcomes, so
+        # deletes are checked before and updates read back after the write
+        delete_ids = [write.timer_id for write in writes if write.op == "delete"]
+        existing = set()
+        if delete_ids:
+            query = {"user_id": user_id, "id": {"$in": delete_ids}}
+            async for doc in self.db.timers.find(query, {"_id": 0, "id": 1}):
+                existing.add(doc["id"])
+
+        if requests:
+            await self.db.timers.bulk_write(requests, ordered=True)
+        if existing:
+            await self._bury(user_id, list(existing), now)
+
+        update_ids = [write.timer_id for write in writes if write.op == "update"]
+        updated = {}
+        if update_ids:
+            async for doc in self.db.timers.find({"user_id": user_id, "id": {"$in": update_ids}}):
+                updated[doc["id"]] = doc
+
+        results = []
+        for index, write in enumerate(writes):
+            if write.op == "create":
+                results.append(WriteResult(True, write.doc))
+            elif write.op == "delete":
+                results.append(WriteResult(write.timer_id in existing))
+            else:
+                doc = updated.get(write.timer_id)
+                # Only the write whose stamp landed performed the completion
+                completed = doc is not None and doc.get("completion_id") == f"{batch_id}:{index}"
+                results.append(WriteResult(doc is not None, doc, completed))
+        return results
+
+    async def save_progress(self, progress: List[TimerProgress]) -> int:
+        if not progress:
+            return 0
+        requests = []
+        for item in progress:
+            # Matches a missing updated_at too, unlike {"$lte": ...}
+            query = {"user_id": item.user_id, "id": item.timer_id, "updated_at": {"$not": {"$gt": item.at}}}
+            values = {"remaining_seconds": item.remaining_seconds, "updated_at": item.at}
+            # At most one of the pair matches: running timers also move their deadline
+            requests.append(UpdateOne(
+                {**query, "status": TimerStatus.RUNNING.value},
+                {"$set": {**values, "ends_at": deadline_after(item.at, item.remaining_seconds)}}
+            ))
+            requests.append(UpdateOne(
+                {**query, "status": {"$in": [TimerStatus.STOPPED.value, TimerStatus.PAUSED.value]}},
+                {"$set": values}
+            ))
+        result = await self.db.timers.bulk_write(requests, ordered=False)
+        return result.modified_count
+
+    async def expire(self, user_id: str, timer_id: str, deadline: datetime, now: datetime) -> Optional[dict]:
+        # findAndModify has to carry the shard key on clusters before MongoDB 7.1
+        return await self.db.timers.find_one_and_update(
+            {"user_id": user_id, "id": timer_id, "status": TimerStatus.RUNNING.value, "ends_at": deadline},
+            {"$set": {
+                "status": TimerStatus.COMPLETED.value,
+                "remaining_seconds": 0,
+                "completed_at": deadline,
+                "ends_at": None,
+                "updated_at": now
+            }},
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def running_deadlines(self, horizon: Optional[datetime]) -> List[Tuple[str, str, datetime]]:
+        query = {"status": TimerStatus.RUNNING.value, "ends_at": {"$ne": None}}
+        if horizon is not None:
+            query["ends_at"]["$lte"] = horizon
+        cursor = self.db.timers.find(query, {"_id": 0, "user_id": 1, "id": 1, "ends_at": 1})
+        return [(doc["user_id"], doc["id"], doc["ends_at"]) async for doc in cursor]
+
+    async def count_running(self, user_id: Optional[str] = None) -> int:
+        query = {"status": TimerStatus.RUNNING.value}
+        if user_id is not None:
+            # A count over the (user_id, status) prefix of user_status_created_at_id
+            query["user_id"] = user_id
+        return await self.db.timers.count_documents(query)
+
+    async def archive_completed(self, completed_before: datetime, limit: int) -> int:
+        query = {"status": TimerStatus.COMPLETED.value, "completed_at": {"$lt": completed_before}}
+        docs = await self.db.timers.find(query, {"_id": 0}).limit(limit).to_list(None)
+        if not docs:
+            return 0
+
+        # Copy first, then delete only copies that are still the completed
+        # version; anything restarted in between is taken back out of the archive
+        await self.db.timers_archive.bulk_write(
+            [ReplaceOne({"user_id": doc["user_id"], "id": doc["id"]}, doc, upsert=True) for doc in docs],
+            ordered=False
+        )
+        result = await self.db.timers.bulk_write([
+            DeleteOne({"user_id": doc["user_id"], "id": doc["id"], "status": TimerStatus.COMPLETED.value,
+                       "completed_at": doc["completed_at"]})
+            for doc in docs
+        ], ordered=False)
+        if result.deleted_count < len(docs):
+            kept = await self.db.timers.distinct("id", {
+                "user_id": {"$in": list({doc["user_id"] for doc in docs})},
+                "id": {"$in": [doc["id"] for doc in docs]}
+            })
+            await self.db.timers_archive.delete_many({"id": {"$in": kept}})
+        return result.deleted_count
+
+    async def get_archived(self, user_id: str, timer_id: str) -> Optional[dict]:
+        return await self.db.timers_archive.find_one({"user_id": user_id, "id": timer_id}, {"_id": 0})
+
+    async def list_archived(self, user_id: str, limit: int, before: Optional[Tuple[datetime, str]] = None,
+                            category: Optional[str] = None) -> List[dict]:
+        query: Dict[str, Any] = {"user_id": user_id}
+        if category is not None:
+            query["category"] = category
+        if before is not None:
+            query["$or"] = [
+                {"completed_at": {"$lt": before[0]}},
+                {"completed_at": before[0], "id": {"$lt": before[1]}},
+            ]
+        cursor = self.db.timers_archive.find(query, {"_id": 0}) \
+            .sort([("completed_at", DESCENDING), ("id", DESCENDING)]).limit(limit)
+        return await cursor.to_list(None)
+
+    async def purge_archived(self, completed_before: datetime) -> int:
+        result = await self.db.timers_archive.delete_many({"completed_at": {"$lt": completed_before}})
+        return result.deleted_count
+
+    async def changes(self, user_id: str, since: datetime, limit: int) -> Tuple[List[dict], List[str]]:
+        query = {"user_id": user_id, "updated_at": {"$gte": since}}
+        # A timer caught mid-archive is in both collections with the same contents
+        changed = {}
+        for collection in (self.db.timers, self.db.timers_archive):
+            cursor = collection.find(query, {"_id": 0}) \
+                .sort([("updated_at", ASCENDING), ("id", ASCENDING)]).limit(limit)
+            async for doc in cursor:
+                changed[doc["id"]] = doc
+        timers = sorted(changed.values(), key=lambda doc: (doc["updated_at"], doc["id"]))[:limit]
+        deleted = await self.db.timer_tombstones.distinct("id", {"user_id": user_id, "deleted_at": {"$gte": since}})
+        return timers, deleted
+
+    async def purge_tombstones(self, deleted_before: datetime) -> int:
+        result = await self.db.timer_tombstones.delete_many({"deleted_at": {"$lt": deleted_before}})
+        return result.deleted_count
+
+
+def _sketch_inc(sketch: QuantileSketch) -> Dict[str, Any]:
+    """$inc that merges `sketch` into a stored one, bin by bin"""
+    doc = sketch.to_doc()
+    return {
+        "count": doc["count"], "zero": doc["zero"], "sum": doc["sum"],
+        **{f"bins.{key}": count for key, count in doc["bins"].items()},
+    }
+
+
+def _merge_rollup(doc: dict) -> UpdateOne:
+    """Upsert adding a rollup document's counts to the stored one"""
+    fields = {key: value for key, value in doc.items() if key not in ("_id", "sessions", "time_seconds")}
+    return UpdateOne(
+        {"_id": doc["_id"]},
+        {"$inc": {"sessions": doc["sessions"], "time_seconds": doc["time_seconds"]}, "$setOnInsert": fields},
+        upsert=True
+    )
+
+
+def _merge_sketch(doc: dict) -> UpdateOne:
+    """Upsert adding a sketch document's bins to the stored one"""
+    fields = {key: doc[key] for key in ("user_id", "metric", "category")}
+    return UpdateOne(
+        {"_id": doc["_id"]}, {"$inc": _sketch_inc(QuantileSketch.from_doc(doc)), "$setOnInsert": fields}, upsert=True
+    )
+
+
+def _range_group_stages(granularity: str, tz: str, seconds: Any) -> List[dict]:
+    """Stages grouping sessions into sorted (bucket, category) range groups"""
+    # $dateTrunc (MongoDB 5.0+) buckets in the caller's zone, DST included
+    trunc = {"date": "$session_date", "unit": granularity, "timezone": tz}
+    if granularity == "week":
+        trunc["startOfWeek"] = "monday"
+    return [
+        {"$group": {
+            "_id": {
+                "bucket": {"$dateTrunc": trunc},
+                "category": {"$ifNull": ["$category", "general"]}
+            },
+            "sessions": {"$sum": 1},
+            "time_seconds": {"$sum": seconds}
+        }},
+        {"$sort": {"_id.bucket": 1, "_id.category": 1}}
+    ]
+
+
+class MongoSessionRepository(SessionRepository):
+    def __init__(self, db):
+        self.db = db
+
+    async def store(self, sessions: List[TimerSession]) -> List[TimerSession]:
+        """Write sessions without touching rollups or sketches; returns those not already stored"""
+        try:
+            await self.db.timer_sessions.insert_many([session.dict() for session in sessions], ordered=False)
+        except BulkWriteError as e:
+            # A retried write-behind batch may already be partly stored
+            if any(error["code"] != 11000 for error in e.details["writeErrors"]):
+                raise
+            duplicates = {error["index"] for error in e.details["writeErrors"]}
+            return [session for index, session in enumerate(sessions) if index not in duplicates]
+        return sessions
+
+    async def add(self, sessions: List[TimerSession]):
+        if not sessions:
+            return
+        sessions = await self.store(sessions)
+        if not sessions:
+            return
+        # While a rebuild runs, sessions dated from its cutoff are folded into
+        # the collections it builds; it counts the earlier ones itself
+        rebuild = await self.db.stats_rebuild.find_one({"_id": "rollups"})
+        if rebuild is not None:
+            cutoff = rebuild["cutoff"]
+            await self._fold(self.db.stats_rollups_rebuild, self.db.stats_sketches_rebuild,
+                             [session for session in sessions if session.session_date >= cutoff])
+            sessions = [session for session in sessions if session.session_date < cutoff]
+        await self._fold(self.db.stats_rollups, self.db.stats_sketches, sessions)
+
+    @staticmethod
+    async def _fold(rollups, sketches, sessions: List[TimerSession]):
+        if not sessions:
+            return
+        await rollups.bulk_write([
+            UpdateOne({"_id": key}, {"$inc": inc, "$setOnInsert": fields}, upsert=True)
+            for key, (inc, fields) in rollup_increments(sessions).items()
+        ], ordered=False)
+        await sketches.bulk_write([
+            UpdateOne({"_id": key}, {"$inc": _sketch_inc(sketch), "$setOnInsert": fields}, upsert=True)
+            for key, (fields, sketch) in sketch_increments(sessions).items()
+        ], ordered=False)
+
+    async def count(self, user_id: str) -> int:
+        return await self.db.timer_sessions.count_documents({"user_id": user_id})
+
+    async def get(self, user_id: str, session_id: str) -> Optional[dict]:
+        return await self.db.timer_sessions.find_one({"user_id": user_id, "id": session_id}, {"_id": 0})
+
+    async def stream(self, user_id: str, start: Optional[datetime], end: Optional[datetime],
+                     category: Optional[str], after: Optional[Tuple[datetime, str]],
+                     batch_size: int) -> AsyncIterator[dict]:
+        query: Dict[str, Any] = {"user_id": user_id}
+        if start is not None or end is not None:
+            query["session_date"] = {
+                **({"$gte": start} if start is not None else {}),
+                **({"$lt": end} if end is not None else {}),
+            }
+        if category is not None:
+            query["category"] = category
+        if after is not None:
+            query["$or"] = [
+                {"session_date": {"$gt": after[0]}},
+                {"session_date": after[0], "id": {"$gt": after[1]}},
+            ]
+        cursor = self.db.timer_sessions.find(query, {"_id": 0}) \
+            .sort([("session_date", ASCENDING), ("id", ASCENDING)]) \
+            .batch_size(batch_size)
+        async for doc in cursor:
+            yield doc
+
+    async def read_rollups(self, user_id: str, day: str) -> List[dict]:
+        return await self.db.stats_rollups.find({
+            "user_id": user_id,
+            "$or": [
+                {"kind": {"$in": ["global", "category"]}},
+                {"_id": rollup_id(user_id, f"day:{day}")}
+            ]
+        }).to_list(None)
+
+    async def read_sketches(self, user_id: str) -> List[dict]:
+        return await self.db.stats_sketches.find({"user_id": user_id}, {"_id": 0}).to_list(None)
+
+    async def rollup_groups(self, before: Optional[datetime] = None) -> List[Tuple[str, str, str, int, int]]:
+        """(user_id, category, day, sessions, seconds) over every stored session dated before `before`"""
+        pipeline = [
+            {"$match": {} if before is None else {"session_date": {"$lt": before}}},
+            {"$group": {
+                "_id": {
+                    "user_id": "$user_id",
+                    "category": {"$ifNull": ["$category", "general"]},
+                    "day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$session_date"}}
+                },
+                "sessions": {"$sum": 1},
+                "time_seconds": {"$sum": "$completed_seconds"}
+            }}
+        ]
+        return [
+            (group["_id"]["user_id"], group["_id"]["category"], group["_id"]["day"],
+             group["sessions"], group["time_seconds"])
+            async for group in self.db.timer_sessions.aggregate(pipeline)
+        ]
+
+    async def sketch_values(self, before: Optional[datetime] = None) -> AsyncIterator[List[SketchRow]]:
+        """(user_id, category, completed_seconds, duration_seconds) of sessions dated before `before`
+
+        Yielded in chunks of up to COLUMN_BATCH_SIZE rows.
+        """
+        query = {} if before is None else {"session_date": {"$lt": before}}
+        projection = {"_id": 0, "user_id": 1, "category": 1, "completed_seconds": 1, "duration_seconds": 1}
+        rows: List[SketchRow] = []
+        async for session in self.db.timer_sessions.find(query, projection).batch_size(COLUMN_BATCH_SIZE):
+            rows.append((session["user_id"], session["category"], session["completed_seconds"],
+                         session["duration_seconds"]))
+            if len(rows) >= COLUMN_BATCH_SIZE:
+                yield rows
+                rows = []
+        if rows:
+            yield rows
+
+    async def rebuild_rollups(self) -> int:
+        """Rebuild into fresh collections and swap them in while other workers keep adding sessions
+
+        Sessions dated before a cutoff are counted here, later ones by add()
+        straight into the fresh collections, and $inc merges both without
+        either overwriting the other. Readers see the old collections,
+        without the sessions from the cutoff on, until the swap.
+        """
+        now = datetime.utcnow()
+        cutoff = now + timedelta(seconds=REBUILD_SETTLE_SECONDS)
+        try:
+            await self.db.stats_rebuild.update_one(
+                {"_id": "rollups", "started_at": {"$lt": now - timedelta(seconds=REBUILD_TIMEOUT_SECONDS)}},
+                {"$set": {"cutoff": cutoff, "started_at": now}},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            raise RuntimeError("Another statistics rebuild is running")
+
+        try:
+            # Nothing is dated from the cutoff yet, so the fresh collections start empty
+            for live, fresh in REBUILT_COLLECTIONS.items():
+                await self.db.drop_collection(fresh)
+                await self.db[fresh].create_indexes(COLLECTION_INDEXES[live])
+            await asyncio.sleep((cutoff - datetime.utcnow()).total_seconds() + REBUILD_SETTLE_SECONDS)
+
+            rollups = fold_rollup_groups(await self.rollup_groups(before=cutoff))
+            if rollups:
+                await self.db.stats_rollups_rebuild.bulk_write(
+                    [_merge_rollup(doc) for doc in rollups.values()], ordered=False
+                )
+            # Sketches need every value, but only the sketches stay in memory
+            sketches = {}
+            async for values in self.sketch_values(before=cutoff):
+                fold_sketches(sketches, values)
+            if sketches:
+                await self.db.stats_sketches_rebuild.bulk_write([
+                    _merge_sketch({"_id": key, **fields, **sketch.to_doc()})
+                    for key, (fields, sketch) in sketches.items()
+                ], ordered=False)
+
+            for live, fresh in REBUILT_COLLECTIONS.items():
+                await self.db[fresh].rename(live, dropTarget=True)
+        finally:
+            await self.db.stats_rebuild.delete_one({"_id": "rollups"})
+
+        # add() calls that saw the cutoff before it was cleared may have
+        # written to the fresh names after the swap
+        await asyncio.sleep(REBUILD_SETTLE_SECONDS)
+        for live, fresh in REBUILT_COLLECTIONS.items():
+            merge = _merge_rollup if live == "stats_rollups" else _merge_sketch
+            late = [merge(doc) async for doc in self.db[fresh].find({})]
+            if late:
+                await self.db[live].bulk_write(late, ordered=False)
+            await self.db.drop_collection(fresh)
+        return len(rollups)
+
+    async def aggregate_range(self, user_id: str, start: datetime, end: datetime, granularity: str,
+                              tz: str) -> List[RangeGroup]:
+        pipeline = [
+            {"$match": {"user_id": user_id, "session_date": {"$gte": start, "$lt": end}}},
+            *_range_group_stages(granularity, tz, "$completed_seconds")
+        ]
+        return [
+            (group["_id"]["bucket"], group["_id"]["category"], group["sessions"], group["time_seconds"])
+            async for group in self.db.timer_sessions.aggregate(pipeline)
+        ]
+
+    async def read_columns(self, user_id: str, start: datetime, end: datetime) -> SessionColumns:
+        columns = SessionColumns([], [], [])
+        # Projected onto the range index, so the query is covered and no documents are fetched
+        cursor = self.db.timer_sessions.find(
+            {"user_id": user_id, "session_date": {"$gte": start, "$lt": end}},
+            {"_id": 0, "session_date": 1, "category": 1, "completed_seconds": 1}
+        ).batch_size(COLUMN_BATCH_SIZE)
+        async for doc in cursor:
+            columns.session_date.append(doc["session_date"])
+            columns.category.append(doc.get("category") or "general")
+            columns.completed_seconds.append(doc["completed_seconds"])
+        return columns
+
+
+# Compact session layout: one document per user, category and UTC day, with
+# each session field packed into an array and UUIDs stored as 16-byte binaries
+SESSION_BUCKET_CAPACITY = 1000
+BUCKET_FIELDS = [
+    "id", "timer_id", "timer_name", "duration_seconds", "completed_seconds",
+    "started_at", "completed_at", "session_date"
+]
+
+
+def _pack_id(value: str) -> Any:
+    """Canonical UUID strings as BSON binaries; anything else unchanged"""
+    try:
+        packed = uuid.UUID(value)
+    except ValueError:
+        return value
+    return Binary.from_uuid(packed) if str(packed) == value else value
+
+
+def _unpack_id(value: Any) -> str:
+    return str(value.as_uuid()) if isinstance(value, Binary) else value
+
+
+def _day(moment: datetime) -> datetime:
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _unpack_bucket(bucket: dict) -> List[dict]:
+    """The bucket's sessions as ordinary session documents"""
+    sessions = []
+    for values in zip(*(bucket[field] for field in BUCKET_FIELDS)):
+        doc = {"user_id": bucket["user_id"], "category": bucket["category"], **dict(zip(BUCKET_FIELDS, values))}
+        doc["id"], doc["timer_id"] = _unpack_id(doc["id"]), _unpack_id(doc["timer_id"])
+        sessions.append({field: doc[field] for field in TimerSession.model_fields})
+    return sessions
+
+
+class MongoBucketedSessionRepository(MongoSessionRepository):
+    """Sessions packed into session_buckets, selected with SESSION_LAYOUT=buckets
+
+    Field names, the owner and the category are stored once per bucket
+    instead of once per session, and the collection carries two indexes
+    instead of four. Buckets keep a running session count and total, so
+    rollups are rebuilt from bucket headers and reads that need one field
+    unpack only that field's array. Rollups and sketches are shared with the
+    document layout.
+    """
+
+    async def store(self, sessions: List[TimerSession]) -> List[TimerSession]:
+        # A retried write-behind batch may already be partly stored
+        stored = await self.db.session_buckets.distinct("id", {
+            "user_id": {"$in": list({session.user_id for session in sessions})},
+            "id": {"$in": [_pack_id(session.id) for session in sessions]}
+        })
+        stored = {_unpack_id(value) for value in stored}
+        sessions = [session for session in sessions if session.id not in stored]
+
+        groups: Dict[Tuple[str, str, datetime], List[dict]] = {}
+        for session in sessions:
+            groups.setdefault((session.user_id, session.category, _day(session.session_date)), []) \
+                .append(session.dict())
+        operations = []
+        for (user_id, category, day), docs in groups.items():
+            for offset in range(0, len(docs), SESSION_BUCKET_CAPACITY):
+                chunk = docs[offset:offset + SESSION_BUCKET_CAPACITY]
+                for doc in chunk:
+                    doc["id"], doc["timer_id"] = _pack_id(doc["id"]), _pack_id(doc["timer_id"])
+                dates = [doc["session_date"] for doc in chunk]
+                operations.append(UpdateOne(
+                    # Appends to the day's open bucket, or starts one when it has no room
+                    {"user_id": user_id, "category": category, "day": day,
+                     "count": {"$lte": SESSION_BUCKET_CAPACITY - len(chunk)}},
+                    {
+                        "$push": {field: {"$each": [doc[field] for doc in chunk]} for field in BUCKET_FIELDS},
+                        "$inc": {"count": len(chunk), "time_seconds": sum(doc["completed_seconds"] for doc in chunk)},
+                        "$min": {"first": min(dates)},
+                        "$max": {"last": max(dates)},
+                    },
+                    upsert=True
+                ))
+        # In order, so a second chunk for a day sees the first one's bucket as full
+        if operations:
+            await self.db.session_buckets.bulk_write(operations)
+        return sessions
+
+    async def count(self, user_id: str) -> int:
+        pipeline = [{"$match": {"user_id": user_id}}, {"$group": {"_id": None, "count": {"$sum": "$count"}}}]
+        groups = await self.db.session_buckets.aggregate(pipeline).to_list(None)
+        return groups[0]["count"] if groups else 0
+
+    async def get(self, user_id: str, session_id: str) -> Optional[dict]:
+        bucket = await self.db.session_buckets.find_one({"user_id": user_id, "id": _pack_id(session_id)}, {"_id": 0})
+        if bucket is None:
+            return None
+        return next((session for session in _unpack_bucket(bucket) if session["id"] == session_id), None)
+
+    async def stream(self, user_id: str, start: Optional[datetime], end: Optional[datetime],
+                     category: Optional[str], after: Optional[Tuple[datetime, str]],
+                     batch_size: int) -> AsyncIterator[dict]:
+        lower = max((moment for moment in (start, after and after[0]) if moment is not None), default=None)
+        query: Dict[str, Any] = {"user_id": user_id}
+        if lower is not None or end is not None:
+            query["day"] = {
+                **({"$gte": _day(lower)} if lower is not None else {}),
+                **({"$lt": end} if end is not None else {}),
+            }
+        if category is not None:
+            query["category"] = category
+
+        def ordered(sessions: List[dict]) -> List[dict]:
+            return sorted(
+                (session for session in sessions
+                 if (start is None or session["session_date"] >= start)
+                 and (end is None or session["session_date"] < end)
+                 and (after is None or (session["session_date"], session["id"]) > after)),
+                key=lambda session: (session["session_date"], session["id"])
+            )
+
+        # Sessions of one day can sit in several buckets, so each day is
+        # sorted as a whole before any of it is yielded
+        day, sessions = None, []
+        cursor = self.db.session_buckets.find(query, {"_id": 0}).sort([("day", ASCENDING)]) \
+            .batch_size(max(1, batch_size // SESSION_BUCKET_CAPACITY))
+        async for bucket in cursor:
+            if bucket["day"] != day:
+                for session in ordered(sessions):
+                    yield session
+                day, sessions = bucket["day"], []
+            sessions.extend(_unpack_bucket(bucket))
+        for session in ordered(sessions):
+            yield session
+
+    async def rollup_groups(self, before: Optional[datetime] = None) -> List[Tuple[str, str, str, int, int]]:
+        group_id = {
+            "user_id": "$user_id",
+            "category": "$category",
+            "day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$day"}}
+        }
+        # Bucket days are UTC days, so the headers alone add up to the rollups
+        pipelines = [[
+            {"$match": {} if before is None else {"last": {"$lt": before}}},
+            {"$group": {"_id": group_id, "sessions": {"$sum": "$count"}, "time_seconds": {"$sum": "$time_seconds"}}}
+        ]]
+        if before is not None:
+            # except for buckets straddling the cutoff, counted session by session
+            pipelines.append([
+                {"$match": {"first": {"$lt": before}, "last": {"$gte": before}}},
+                {"$project": {"user_id": 1, "category": 1, "day": 1, "session_date": 1, "completed_seconds": 1}},
+                {"$unwind": {"path": "$session_date", "includeArrayIndex": "position"}},
+                {"$match": {"session_date": {"$lt": before}}},
+                {"$group": {
+                    "_id": group_id,
+                    "sessions": {"$sum": 1},
+                    "time_seconds": {"$sum": {"$arrayElemAt": ["$completed_seconds", "$position"]}}
+                }}
+            ])
+        return [
+            (group["_id"]["user_id"], group["_id"]["category"], group["_id"]["day"],
+             group["sessions"], group["time_seconds"])
+            for pipeline in pipelines
+            async for group in self.db.session_buckets.aggregate(pipeline)
+        ]
+
+    async def sketch_values(self, before: Optional[datetime] = None) -> AsyncIterator[List[SketchRow]]:
+        query = {} if before is None else {"first": {"$lt": before}}
+        projection = {"_id": 0, "user_id": 1, "category": 1, "session_date": 1, "completed_seconds": 1,
+                      "duration_seconds": 1}
+        async for bucket in self.db.session_buckets.find(query, projection):
+            yield [(bucket["user_id"], bucket["category"], completed, duration)
+                   for date, completed, duration in zip(bucket["session_date"], bucket["completed_seconds"],
+                                                        bucket["duration_seconds"])
+                   if before is None or date < before]
+
+    async def aggregate_range(self, user_id: str, start: datetime, end: datetime, granularity: str,
+                              tz: str) -> List[RangeGroup]:
+        pipeline = [
+            {"$match": {"user_id": user_id, "day": {"$gte": _day(start), "$lt": end}}},
+            {"$project": {"category": 1, "session_date": 1, "completed_seconds": 1}},
+            {"$unwind": {"path": "$session_date", "includeArrayIndex": "position"}},
+            {"$match": {"session_date": {"$gte": start, "$lt": end}}},
+            *_range_group_stages(granularity, tz, {"$arrayElemAt": ["$completed_seconds", "$position"]})
+        ]
+        return [
+            (group["_id"]["bucket"], group["_id"]["category"], group["sessions"], group["time_seconds"])
+            async for group in self.db.session_buckets.aggregate(pipeline)
+        ]
+
+    async def read_columns(self, user_id: str, start: datetime, end: datetime) -> SessionColumns:
+        columns = SessionColumns([], [], [])
+        cursor = self.db.session_buckets.find(
+            {"user_id": user_id, "day": {"$gte": _day(start), "$lt": end}},
+            {"_id": 0, "category": 1, "session_date": 1, "completed_seconds": 1, "first": 1, "last": 1}
+        )
+        async for bucket in cursor:
+            dates, seconds = bucket["session_date"], bucket["completed_seconds"]
+            # Only buckets straddling the range edges are filtered value by value
+            if bucket["first"] < start or bucket["last"] >= end:
+                kept = [index for index, date in enumerate(dates) if start <= date < end]
+                dates, seconds = [dates[index] for index in kept], [seconds[index] for index in kept]
+            columns.session_date.extend(dates)
+            columns.category.extend([bucket["category"]] * len(dates))
+            columns.completed_seconds.extend(seconds)
+        return columns
+
+
+class MongoTemplateRepository(TemplateRepository):
+    def __init__(self, db):
+        self.db = db
+
+    async def list_all(self, user_id: str) -> List[dict]:
+        return await self.db.timer_templates.find({"user_id": user_id}).to_list(1000)
+
+    async def get(self, user_id: str, template_id: str) -> Optional[dict]:
+        return await self.db.timer_templates.find_one({"user_id": user_id, "id": template_id})
+
+    async def get_by_name(self, user_id: str, name: str) -> Optional[dict]:
+        return await self.db.timer_templates.find_one({"user_id": user_id, "name": name})
+
+    async def insert(self, doc: dict):
+        await self.db.timer_templates.insert_one(doc)
+
+    async def seed(self, user_id: str, docs: List[dict]) -> int:
+        requests = [
+            UpdateOne({"user_id": user_id, "name": doc["name"]}, {"$setOnInsert": doc}, upsert=True)
+            for doc in docs
+        ]
+        if not requests:
+            return 0
+        try:
+            result = await self.db.timer_templates.bulk_write(requests, ordered=False)
+        except BulkWriteError as e:
+            # Seeded ids are derived from the name, so a worker that loses
+            # the race to insert the same template hits the unique id index
+            if any(error["code"] != 11000 for error in e.details["writeErrors"]):
+                raise
+            return e.details["nUpserted"]
+        return result.upserted_count
+
+
+class MongoVersionRepository(VersionRepository):
+    def __init__(self, db):
+        self.db = db
+
+    async def get(self, key: str) -> int:
+        stamp = await self.db.cache_versions.find_one({"_id": key})
+        return stamp["version"] if stamp else 0
+
+    async def bump(self, key: str):
+        await self.db.cache_versions.update_one({"_id": key}, {"$inc": {"version": 1}}, upsert=True)
+
+    async def claim(self, key: str) -> bool:
+        result = await self.db.cache_versions.update_one(
+            {"_id": key}, {"$setOnInsert": {"version": 1}}, upsert=True
+        )
+        return result.upserted_id is not None
+
+
+# Every request-path index leads with user_id, so each tenant's data is
+# one contiguous range and {user_id: 1, id: 1} works as a shard key
+COLLECTION_INDEXES = {
+    "timers": [
+        IndexModel([("user_id", ASCENDING), ("id", ASCENDING)], name="user_id_id_unique", unique=True),
+        IndexModel([("status", ASCENDING)], name="status"),
+        # Not partial on ACTIVE_TIMER_QUERY: $in in a partial filter needs MongoDB 6.0.
+        # The (user_id, status) prefix also counts a tenant's running timers for ETags
+        IndexModel(
+            [("user_id", ASCENDING), ("status", ASCENDING), ("created_at", ASCENDING), ("id", ASCENDING)],
+            name="user_status_created_at_id"
+        ),
+        IndexModel(
+            [("ends_at", ASCENDING)],
+            name="running_ends_at",
+            partialFilterExpression={"status": TimerStatus.RUNNING.value}
+        ),
+        IndexModel(
+            [("completed_at", ASCENDING)],
+            name="completed_completed_at",
+            partialFilterExpression={"status": TimerStatus.COMPLETED.value}
+        ),
+        IndexModel([("user_id", ASCENDING), ("updated_at", ASCENDING), ("id", ASCENDING)],
+                   name="user_updated_at_id"),
+    ],
+    "timers_archive": [
+        IndexModel([("user_id", ASCENDING), ("id", ASCENDING)], name="user_id_id_unique", unique=True),
+        IndexModel([("completed_at", DESCENDING), ("id", DESCENDING)], name="completed_at_id"),
+        IndexModel([("user_id", ASCENDING), ("completed_at", DESCENDING), ("id", DESCENDING)],
+                   name="user_completed_at_id"),
+        IndexModel([("user_id", ASCENDING), ("category", ASCENDING), ("completed_at", DESCENDING),
+                    ("id", DESCENDING)], name="user_category_completed_at_id"),
+        IndexModel([("user_id", ASCENDING), ("updated_at", ASCENDING), ("id", ASCENDING)],
+                   name="user_updated_at_id"),
+    ],
+    "timer_tombstones": [
+        IndexModel([("user_id", ASCENDING), ("id", ASCENDING)], name="user_id_id_unique", unique=True),
+        IndexModel([("user_id", ASCENDING), ("deleted_at", ASCENDING)], name="user_deleted_at"),
+        IndexModel([("deleted_at", ASCENDING)], name="deleted_at"),
+    ],
+    "timer_sessions": [
+        IndexModel([("user_id", ASCENDING), ("id", ASCENDING)], name="user_id_id_unique", unique=True),
+        # Covers the /stats/range aggregation as well as plain date ranges
+        IndexModel(
+            [("user_id", ASCENDING), ("session_date", ASCENDING), ("category", ASCENDING),
+             ("completed_seconds", ASCENDING)],
+            name="user_session_date_category_seconds"
+        ),
+        IndexModel([("timer_id", ASCENDING)], name="timer_id"),
+        # Export order, so the cursor streams without an in-memory sort
+        IndexModel([("user_id", ASCENDING), ("session_date", ASCENDING), ("id", ASCENDING)],
+                   name="user_session_date_id"),
+    ],
+    "session_buckets": [
+        IndexModel([("user_id", ASCENDING), ("day", ASCENDING), ("category", ASCENDING)],
+                   name="user_day_category"),
+        # Multikey over the packed ids, for single-session lookups and retried writes
+        IndexModel([("user_id", ASCENDING), ("id", ASCENDING)], name="user_session_id"),
+    ],
+    "timer_templates": [
+        IndexModel([("user_id", ASCENDING), ("id", ASCENDING)], name="user_id_id_unique", unique=True),
+        IndexModel([("user_id", ASCENDING), ("name", ASCENDING)], name="user_name"),
+    ],
+    "stats_rollups": [
+        IndexModel([("user_id", ASCENDING), ("kind", ASCENDING)], name="user_kind"),
+    ],
+    "stats_sketches": [
+        IndexModel([("user_id", ASCENDING)], name="user"),
+    ],
+}
+
+# Indexes replaced by the ones above: those from before tenants existed, and
+# user_active_created_at_id, whose $in partial filter needed MongoDB 6.0
+SUPERSEDED_INDEXES = {
+    "timers": ["id_unique", "active_created_at_id", "updated_at_id", "user_active_created_at_id"],
+    "timers_archive": ["id_unique", "category_completed_at_id", "updated_at_id"],
+    "timer_tombstones": ["id_unique"],
+    "timer_sessions": ["id_unique", "session_date_category_seconds", "session_date_id"],
+    "timer_templates": ["id_unique", "name"],
+    "stats_rollups": ["kind"],
+}
+
+SESSION_LAYOUTS = {"documents": MongoSessionRepository, "buckets": MongoBucketedSessionRepository}
+
+
+def _plan_summary(stage: dict) -> List[dict]:
+    """Flatten a winning plan into its stages and the indexes they use"""
+    summary = [{"stage": stage.get("stage"), "index": stage.get("indexName")}]
+    children = stage.get("inputStages") or ([stage["inputStage"]] if "inputStage" in stage else [])
+    for child in children:
+        summary.extend(_plan_summary(child))
+    return summary
+
+
+class CommandTimer(CommandListener):
+    """Reports the collection, name and duration of every command to `record`
+
+    Events fire on the thread that ran the command, which for Motor is an
+    executor thread running in a copy of the caller's context.
+    """
+
+    def __init__(self, record: Callable[[str, str, float], None]):
+        self._record = record
+        self._collections: Dict[int, str] = {}
+
+    def started(self, event):
+        # getMore names its cursor first and the collection separately
+        target = event.command.get("collection" if event.command_name == "getMore" else event.command_name)
+        self._collections[event.request_id] = target if isinstance(target, str) else event.database_name
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        self._finish(event)
+
+    def _finish(self, event):
+        collection = self._collections.pop(event.request_id, event.database_name)
+        self._record(collection, event.command_name, event.duration_micros / 1e6)
+
+
+class MongoStorage(Storage):
+    name = "mongo"
+
+    def __init__(self, mongo_url: str, db_name: str, session_layout: str = "documents",
+                 on_command: Optional[Callable[[str, str, float], None]] = None):
+        # Command monitoring is only wired in when someone listens
+        listeners = [CommandTimer(on_command)] if on_command else []
+        self.client = AsyncIOMotorClient(mongo_url, event_listeners=listeners)
+        self.db = self.client[db_name]
+        self.timers = MongoTimerRepository(self.db)
+        if session_layout not in SESSION_LAYOUTS:
+            raise ValueError(f"Unknown SESSION_LAYOUT: {session_layout}")
+        self.sessions = SESSION_LAYOUTS[session_layout](self.db)
+        self.templates = MongoTemplateRepository(self.db)
+        self.versions = MongoVersionRepository(self.db)
+
+    async def connect(self):
+        """Assign pre-tenant data to the default user and create every index the
+        repositories rely on; existing ones are left as is"""
+        for collection in ("timers", "timers_archive", "timer_tombstones", "timer_sessions", "timer_templates"):
+            await self.db[collection].update_many(
+                {"user_id": {"$exists": False}}, {"$set": {"user_id": DEFAULT_USER_ID}}
+            )
+        # Rollups keyed without a user are dropped; the next statistics backfill rebuilds them
+        result = await self.db.stats_rollups.delete_many({"user_id": {"$exists": False}})
+        if result.deleted_count:
+            await self.versions.bump(STATS_BACKFILL_REQUESTS)
+
+        for collection, indexes in COLLECTION_INDEXES.items():
+            # One at a time so a server that rejects one spec still gets the rest
+            for index in indexes:
+                try:
+                    await self.db[collection].create_indexes([index])
+                except OperationFailure as e:
+                    logger.warning("Could not create index %s on %s: %s", index.document["name"], collection, e)
+
+        for collection, names in SUPERSEDED_INDEXES.items():
+            existing = await self.db[collection].index_information()
+            for name in names:
+                if name in existing:
+                    await self.db[collection].drop_index(name)
+
+    async def close(self):
+        self.client.close()
+
+    async def migrate_sessions(self, layout: str, batch_size: int = 1000, drop_source: bool = False) -> int:
+        """Copy every session from the other layout into `layout`; returns how many were copied
+
+        Rollups and sketches describe the same sessions either way and are
+        left alone. Sessions already in the target are skipped, so an
+        interrupted migration is finished by running it again. The source
+        collection is only dropped once the target holds as many sessions
+        for every tenant.
+        """
+        target = SESSION_LAYOUTS[layout](self.db)
+        source = next(repository(self.db) for name, repository in SESSION_LAYOUTS.items() if name != layout)
+        collection = "timer_sessions" if layout == "buckets" else "session_buckets"
+
+        copied = 0
+        user_ids = await self.db[collection].distinct("user_id")
+        for user_id in user_ids:
+            batch = []
+            async for doc in source.stream(user_id, None, None, None, None, batch_size):
+                batch.append(TimerSession(**doc))
+                if len(batch) >= batch_size:
+                    copied += len(await target.store(batch))
+                    batch = []
+            if batch:
+                copied += len(await target.store(batch))
+
+        if drop_source:
+            for user_id in user_ids:
+                if await target.count(user_id) < await source.count(user_id):
+                    raise RuntimeError(f"Sessions of {user_id} are missing from the {layout} layout; kept the source")
+            await self.db[collection].drop()
+        return copied
+
+    async def describe_indexes(self) -> Dict[str, Any]:
+        now = datetime.utcnow()
+        midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        queries = {
+            "get_timer": ("timers", {"user_id": DEFAULT_USER_ID, "id": "example"}),
+            "get_timers": ("timers", {"user_id": DEFAULT_USER_ID, **ACTIVE_TIMER_QUERY}),
+            "running_count": ("timers", {"user_id": DEFAULT_USER_ID, "status": "running"}),
+            "running_deadlines": ("timers", {"status": "running", "ends_at": {"$ne": None}}),
+            "archive_candidates": ("timers", {"status": "completed", "completed_at": {"$lt": now}}),
+            "timer_changes": ("timers", {"user_id": DEFAULT_USER_ID, "updated_at": {"$gte": now}}),
+            "template_by_id": ("timer_templates", {"user_id": DEFAULT_USER_ID, "id": "example"}),
+            "template_by_name": ("timer_templates", {"user_id": DEFAULT_USER_ID, "name": "example"}),
+            "sessions_today": ("timer_sessions", {"user_id": DEFAULT_USER_ID, "session_date": {"$gte": midnight}}),
+            "session_buckets_today": ("session_buckets", {"user_id": DEFAULT_USER_ID, "day": {"$gte": midnight}}),
+            "stats_rollups": ("stats_rollups", {"user_id": DEFAULT_USER_ID, "$or": [
+                {"kind": {"$in": ["global", "category"]}},
+                {"_id": rollup_id(DEFAULT_USER_ID, f"day:{now.date().isoformat()}")}
+            ]}),
+        }
+
+        indexes = {}
+        for collection in COLLECTION_INDEXES:
+            info = await self.db[collection].index_information()
+            indexes[collection] = {name: spec["key"] for name, spec in info.items()}
+
+        plans = {}
+        for name, (collection, query) in queries.items():
+            explain = await self.db[collection].find(query).explain()
+            plans[name] = _plan_summary(explain["queryPlanner"]["winningPlan"])
+
+        return {"backend": "mongo", "indexes": indexes, "plans": plans}
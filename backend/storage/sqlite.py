@@ -0,0 +1,733 @@
+"""Async SQLite backend for single-node deployments"""
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from datetime import datetime
+from enum import Enum
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+from zoneinfo import ZoneInfo
+
+import aiosqlite
+
+from models import (
+    ACTIVE_STATUSES, DEFAULT_USER_ID, Timer, TimerSession, TimerStatus, TimerTemplate, TimerUpdate, deadline_after
+)
+from storage.base import (
+    STATS_BACKFILL_REQUESTS, RangeGroup, SessionColumns, SessionRepository, Storage, TemplateRepository,
+    TimerProgress, TimerRepository, TimerWrite, VersionRepository, WriteResult, apply_timer_update,
+    expire_timer_doc, fold_range_groups, fold_rollup_groups, fold_sketches, rollup_id, rollup_increments,
+    sketch_increments
+)
+from sketches import QuantileSketch
+
+
+TIMER_COLUMNS = list(Timer.model_fields)
+SESSION_COLUMNS = list(TimerSession.model_fields)
+TEMPLATE_COLUMNS = list(TimerTemplate.model_fields)
+
+DATETIME_COLUMNS = {
+    "started_at", "paused_at", "completed_at", "ends_at", "created_at", "updated_at", "session_date"
+}
+
+_ACTIVE_IN = ", ".join(f"'{status}'" for status in ACTIVE_STATUSES)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS timers (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL DEFAULT 'default',
+    name TEXT NOT NULL,
+    duration_seconds INTEGER NOT NULL,
+    remaining_seconds INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    started_at TEXT,
+    paused_at TEXT,
+    completed_at TEXT,
+    ends_at TEXT,
+    created_at TEXT NOT NULL,
+    category TEXT NOT NULL,
+    template_id TEXT,
+    updated_at TEXT
+);
+CREATE INDEX IF NOT EXISTS timers_status ON timers (status);
+CREATE INDEX IF NOT EXISTS timers_running_ends_at ON timers (ends_at)
+    WHERE status = 'running';
+CREATE INDEX IF NOT EXISTS timers_completed_completed_at ON timers (completed_at)
+    WHERE status = 'completed';
+
+CREATE TABLE IF NOT EXISTS timers_archive (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL DEFAULT 'default',
+    name TEXT NOT NULL,
+    duration_seconds INTEGER NOT NULL,
+    remaining_seconds INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    started_at TEXT,
+    paused_at TEXT,
+    completed_at TEXT,
+    ends_at TEXT,
+    created_at TEXT NOT NULL,
+    category TEXT NOT NULL,
+    template_id TEXT,
+    updated_at TEXT
+);
+CREATE INDEX IF NOT EXISTS timers_archive_completed_at ON timers_archive (completed_at);
+
+CREATE TABLE IF NOT EXISTS timer_tombstones (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL DEFAULT 'default',
+    deleted_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS timer_tombstones_deleted_at ON timer_tombstones (deleted_at);
+
+CREATE TABLE IF NOT EXISTS timer_sessions (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL DEFAULT 'default',
+    timer_id TEXT NOT NULL,
+    timer_name TEXT NOT NULL,
+    category TEXT NOT NULL,
+    duration_seconds INTEGER NOT NULL,
+    completed_seconds INTEGER NOT NULL,
+    started_at TEXT NOT NULL,
+    completed_at TEXT,
+    session_date TEXT NOT NULL
+);
+DROP INDEX IF EXISTS timer_sessions_session_date;
+CREATE INDEX IF NOT EXISTS timer_sessions_timer_id ON timer_sessions (timer_id);
+
+CREATE TABLE IF NOT EXISTS timer_templates (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL DEFAULT 'default',
+    name TEXT NOT NULL,
+    duration_minutes INTEGER NOT NULL,
+    description TEXT NOT NULL,
+    category TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS stats_rollups (
+    key TEXT PRIMARY KEY,
+    user_id TEXT,
+    kind TEXT NOT NULL,
+    category TEXT,
+    day TEXT,
+    sessions INTEGER NOT NULL,
+    time_seconds INTEGER NOT NULL
+);
+
+-- Each sketch is one JSON document, merged under the write lock
+CREATE TABLE IF NOT EXISTS stats_sketches (
+    key TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    category TEXT,
+    sketch TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS stats_sketches_user ON stats_sketches (user_id);
+
+CREATE TABLE IF NOT EXISTS cache_versions (
+    key TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+"""
+
+# Columns added since the tables were first created; CREATE TABLE IF NOT
+# EXISTS leaves existing tables alone, so connect() adds them
+_USER_ID = ("user_id", f"TEXT NOT NULL DEFAULT '{DEFAULT_USER_ID}'")
+
+ADDED_COLUMNS = {
+    "timers": [("updated_at", "TEXT"), _USER_ID],
+    "timers_archive": [("updated_at", "TEXT"), _USER_ID],
+    "timer_tombstones": [_USER_ID],
+    "timer_sessions": [_USER_ID],
+    "timer_templates": [_USER_ID],
+    # Rollups from before tenancy have no owner; connect() drops them and
+    # the next statistics backfill rebuilds them from the sessions
+    "stats_rollups": [("user_id", "TEXT")],
+}
+
+# Every per-tenant read leads with user_id, so these replace the
+# single-tenant indexes they supersede
+ADDED_COLUMN_INDEXES = f"""
+DROP INDEX IF EXISTS timers_active_created_at_id;
+DROP INDEX IF EXISTS timers_updated_at_id;
+DROP INDEX IF EXISTS timers_archive_updated_at_id;
+DROP INDEX IF EXISTS timers_archive_completed_at_id;
+DROP INDEX IF EXISTS timers_archive_category;
+DROP INDEX IF EXISTS timer_sessions_range;
+DROP INDEX IF EXISTS timer_sessions_date_id;
+DROP INDEX IF EXISTS timer_templates_name;
+DROP INDEX IF EXISTS stats_rollups_kind;
+CREATE INDEX IF NOT EXISTS timers_user_active_created_at_id ON timers (user_id, created_at, id)
+    WHERE status IN ({_ACTIVE_IN});
+CREATE INDEX IF NOT EXISTS timers_user_updated_at_id ON timers (user_id, updated_at, id);
+CREATE INDEX IF NOT EXISTS timers_archive_user_completed_at_id ON timers_archive (user_id, completed_at, id);
+CREATE INDEX IF NOT EXISTS timers_archive_user_category
+    ON timers_archive (user_id, category, completed_at, id);
+CREATE INDEX IF NOT EXISTS timers_archive_user_updated_at_id ON timers_archive (user_id, updated_at, id);
+CREATE INDEX IF NOT EXISTS timer_tombstones_user_deleted_at ON timer_tombstones (user_id, deleted_at);
+-- Covers the range aggregation, so it never touches the table rows
+CREATE INDEX IF NOT EXISTS timer_sessions_user_range
+    ON timer_sessions (user_id, session_date, category, completed_seconds);
+CREATE INDEX IF NOT EXISTS timer_sessions_user_date_id ON timer_sessions (user_id, session_date, id);
+CREATE INDEX IF NOT EXISTS timer_templates_user_name ON timer_templates (user_id, name);
+CREATE INDEX IF NOT EXISTS stats_rollups_user_kind ON stats_rollups (user_id, kind);
+"""
+
+
+def _to_sql(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    # Fixed width so text ordering matches time ordering and equality is exact
+    if isinstance(value, datetime):
+        return value.isoformat(timespec="microseconds")
+    return value
+
+
+def _from_row(row: aiosqlite.Row) -> dict:
+    doc = dict(row)
+    for column in DATETIME_COLUMNS & doc.keys():
+        if doc[column] is not None:
+            doc[column] = datetime.fromisoformat(doc[column])
+    return doc
+
+
+def _insert_sql(table: str, columns: List[str]) -> str:
+    return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})"
+
+
+def _values(doc: dict, columns: List[str]) -> Tuple:
+    return tuple(_to_sql(doc.get(column)) for column in columns)
+
+
+class SQLiteDatabase:
+    """One aiosqlite connection; writes are serialized behind an asyncio lock
+
+    aiosqlite funnels every statement through a single thread, but two
+    coroutines can still interleave statements of different transactions,
+    so read-modify-write sequences hold the lock for their duration.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.conn: Optional[aiosqlite.Connection] = None
+        self.lock = asyncio.Lock()
+
+    async def connect(self):
+        if self.conn is None:
+            self.conn = await aiosqlite.connect(self.path, isolation_level=None)
+            self.conn.row_factory = aiosqlite.Row
+            await self.conn.execute("PRAGMA journal_mode=WAL")
+            await self.conn.executescript(SCHEMA)
+            for table, columns in ADDED_COLUMNS.items():
+                async with self.conn.execute(f"PRAGMA table_info({table})") as cursor:
+                    existing = {row["name"] for row in await cursor.fetchall()}
+                for column, kind in columns:
+                    if column not in existing:
+                        await self.conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {kind}")
+            await self.conn.executescript(ADDED_COLUMN_INDEXES)
+
+    @asynccontextmanager
+    async def transaction(self):
+        async with self.lock:
+            await self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.conn
+            except BaseException:
+                await self.conn.execute("ROLLBACK")
+                raise
+            await self.conn.execute("COMMIT")
+
+    async def fetch_all(self, sql: str, params: Tuple = ()) -> List[dict]:
+        async with self.conn.execute(sql, params) as cursor:
+            return [_from_row(row) for row in await cursor.fetchall()]
+
+    async def fetch_one(self, sql: str, params: Tuple = ()) -> Optional[dict]:
+        async with self.conn.execute(sql, params) as cursor:
+            row = await cursor.fetchone()
+        return _from_row(row) if row is not None else None
+
+
+class SQLiteTimerRepository(TimerRepository):
+    def __init__(self, database: SQLiteDatabase):
+        self.database = database
+
+    async def _write(self, conn: aiosqlite.Connection, doc: dict):
+        await conn.execute(
+            _insert_sql("timers", TIMER_COLUMNS).replace("INSERT", "INSERT OR REPLACE", 1),
+            _values(doc, TIMER_COLUMNS)
+        )
+
+    async def insert(self, doc: dict):
+        async with self.database.transaction() as conn:
+            await conn.execute(_insert_sql("timers", TIMER_COLUMNS), _values(doc, TIMER_COLUMNS))
+
+    async def get(self, user_id: str, timer_id: str) -> Optional[dict]:
+        return await self.database.fetch_one(
+            "SELECT * FROM timers WHERE id = ? AND user_id = ?", (timer_id, user_id)
+        )
+
+    async def list_active(self, user_id: str, limit: int, after: Optional[Tuple[datetime, str]] = None,
+                          fields: Optional[Set[str]] = None) -> List[dict]:
+        columns = "*"
+        if fields is not None:
+            columns = ", ".join(sorted(fields | {"id", "created_at"}))
+        sql = f"SELECT {columns} FROM timers WHERE user_id = ? AND status IN ({_ACTIVE_IN})"
+        params: Tuple = (user_id,)
+        if after:
+            created_at, timer_id = _to_sql(after[0]), after[1]
+            sql += " AND (created_at > ? OR (created_at = ? AND id > ?))"
+            params += (created_at, created_at, timer_id)
+        sql += " ORDER BY created_at, id LIMIT ?"
+        return await self.database.fetch_all(sql, params + (limit,))
+
+    async def _update(self, conn: aiosqlite.Connection, user_id: str, timer_id: str,
+                      update: TimerUpdate, now: datetime) -> WriteResult:
+        async with conn.execute(
+            "SELECT * FROM timers WHERE id = ? AND user_id = ?", (timer_id, user_id)
+        ) as cursor:
+            row = await cursor.fetchone()
+        if row is None:
+            return WriteResult(False)
+        doc = _from_row(row)
+        # Completing an already completed timer is a no-op
+        if update.status == TimerStatus.COMPLETED and doc["status"] == TimerStatus.COMPLETED:
+            return WriteResult(True, doc)
+        doc = apply_timer_update(doc, update, now)
+        await self._write(conn, doc)
+        return WriteResult(True, doc, update.status == TimerStatus.COMPLETED)
+
+    async def _delete(self, conn: aiosqlite.Connection, user_id: str, timer_id: str, now: datetime) -> bool:
+        cursor = await conn.execute("DELETE FROM timers WHERE id = ? AND user_id = ?", (timer_id, user_id))
+        if cursor.rowcount == 0:
+            return False
+        # Lets delta sync report the delete
+        await conn.execute(
+            "INSERT OR REPLACE INTO timer_tombstones (id, user_id, deleted_at) VALUES (?, ?, ?)",
+            (timer_id, user_id, _to_sql(now))
+        )
+        return True
+
+    async def update(self, user_id: str, timer_id: str, update: TimerUpdate, now: datetime) -> WriteResult:
+        async with self.database.transaction() as conn:
+            return await self._update(conn, user_id, timer_id, update, now)
+
+    async def delete(self, user_id: str, timer_id: str, now: datetime) -> bool:
+        async with self.database.transaction() as conn:
+            return await self._delete(conn, user_id, timer_id, now)
+
+    async def bulk(self, user_id: str, writes: List[TimerWrite], now: datetime) -> List[WriteResult]:
+        results = []
+        async with self.database.transaction() as conn:
+            for write in writes:
+                if write.op == "create":
+                    await conn.execute(_insert_sql("timers", TIMER_COLUMNS), _values(write.doc, TIMER_COLUMNS))
+                    results.append(WriteResult(True, write.doc))
+                elif write.op == "update":
+                    results.append(await self._update(conn, user_id, write.timer_id, write.update, now))
+                else:
+                    results.append(WriteResult(await self._delete(conn, user_id, write.timer_id, now)))
+        return results
+
+    async def save_progress(self, progress: List[TimerProgress]) -> int:
+        if not progress:
+            return 0
+        async with self.database.transaction() as conn:
+            cursor = await conn.executemany(
+                "UPDATE timers SET remaining_seconds = ?, updated_at = ?, "
+                "ends_at = CASE WHEN status = 'running' THEN ? END "
+                f"WHERE id = ? AND user_id = ? AND status IN ({_ACTIVE_IN}) "
+                "AND (updated_at IS NULL OR updated_at <= ?)",
+                [
+                    (item.remaining_seconds, _to_sql(item.at),
+                     _to_sql(deadline_after(item.at, item.remaining_seconds)),
+                     item.timer_id, item.user_id, _to_sql(item.at))
+                    for item in progress
+                ]
+            )
+            return cursor.rowcount
+
+    async def expire(self, user_id: str, timer_id: str, deadline: datetime, now: datetime) -> Optional[dict]:
+        async with self.database.transaction() as conn:
+            async with conn.execute(
+                "SELECT * FROM timers WHERE user_id = ? AND id = ? AND status = 'running' AND ends_at = ?",
+                (user_id, timer_id, _to_sql(deadline))
+            ) as cursor:
+                row = await cursor.fetchone()
+            if row is None:
+                return None
+            doc = expire_timer_doc(_from_row(row), deadline, now)
+            await self._write(conn, doc)
+            return doc
+
+    async def running_deadlines(self, horizon: Optional[datetime]) -> List[Tuple[str, str, datetime]]:
+        sql = "SELECT user_id, id, ends_at FROM timers WHERE status = 'running' AND ends_at IS NOT NULL"
+        params: Tuple = ()
+        if horizon is not None:
+            sql += " AND ends_at <= ?"
+            params = (_to_sql(horizon),)
+        return [(row["user_id"], row["id"], row["ends_at"]) for row in await self.database.fetch_all(sql, params)]
+
+    async def count_running(self, user_id: Optional[str] = None) -> int:
+        sql, params = "SELECT COUNT(*) FROM timers WHERE status = 'running'", ()
+        if user_id is not None:
+            sql, params = sql + " AND user_id = ?", (user_id,)
+        async with self.database.conn.execute(sql, params) as cursor:
+            (count,) = await cursor.fetchone()
+        return count
+
+    async def archive_completed(self, completed_before: datetime, limit: int) -> int:
+        columns = ", ".join(TIMER_COLUMNS)
+        async with self.database.transaction() as conn:
+            async with conn.execute(
+                "SELECT id FROM timers WHERE status = 'completed' AND completed_at < ? LIMIT ?",
+                (_to_sql(completed_before), limit)
+            ) as cursor:
+                ids = [row[0] for row in await cursor.fetchall()]
+            if not ids:
+                return 0
+            placeholders = ", ".join("?" for _ in ids)
+            await conn.execute(
+                f"INSERT OR REPLACE INTO timers_archive ({columns}) "
+                f"SELECT {columns} FROM timers WHERE id IN ({placeholders})",
+                ids
+            )
+            await conn.execute(f"DELETE FROM timers WHERE id IN ({placeholders})", ids)
+        return len(ids)
+
+    async def get_archived(self, user_id: str, timer_id: str) -> Optional[dict]:
+        return await self.database.fetch_one(
+            "SELECT * FROM timers_archive WHERE id = ? AND user_id = ?", (timer_id, user_id)
+        )
+
+    async def list_archived(self, user_id: str, limit: int, before: Optional[Tuple[datetime, str]] = None,
+                            category: Optional[str] = None) -> List[dict]:
+        conditions, params = ["user_id = ?"], [user_id]
+        if category is not None:
+            conditions.append("category = ?")
+            params.append(category)
+        if before is not None:
+            conditions.append("(completed_at, id) < (?, ?)")
+            params.extend([_to_sql(before[0]), before[1]])
+        where = " AND ".join(conditions)
+        return await self.database.fetch_all(
+            f"SELECT * FROM timers_archive WHERE {where} ORDER BY completed_at DESC, id DESC LIMIT ?",
+            tuple(params + [limit])
+        )
+
+    async def purge_archived(self, completed_before: datetime) -> int:
+        async with self.database.transaction() as conn:
+            cursor = await conn.execute(
+                "DELETE FROM timers_archive WHERE completed_at < ?", (_to_sql(completed_before),)
+            )
+            return cursor.rowcount
+
+    async def changes(self, user_id: str, since: datetime, limit: int) -> Tuple[List[dict], List[str]]:
+        columns = ", ".join(TIMER_COLUMNS)
+        since = _to_sql(since)
+        timers = await self.database.fetch_all(
+            f"SELECT {columns} FROM timers WHERE user_id = ? AND updated_at >= ? "
+            f"UNION ALL SELECT {columns} FROM timers_archive WHERE user_id = ? AND updated_at >= ? "
+            "ORDER BY updated_at, id LIMIT ?",
+            (user_id, since, user_id, since, limit)
+        )
+        tombstones = await self.database.fetch_all(
+            "SELECT id FROM timer_tombstones WHERE user_id = ? AND deleted_at >= ?", (user_id, since)
+        )
+        return timers, [row["id"] for row in tombstones]
+
+    async def purge_tombstones(self, deleted_before: datetime) -> int:
+        async with self.database.transaction() as conn:
+            cursor = await conn.execute(
+                "DELETE FROM timer_tombstones WHERE deleted_at < ?", (_to_sql(deleted_before),)
+            )
+            return cursor.rowcount
+
+
+class SQLiteSessionRepository(SessionRepository):
+    def __init__(self, database: SQLiteDatabase):
+        self.database = database
+
+    async def add(self, sessions: List[TimerSession]):
+        if not sessions:
+            return
+        async with self.database.transaction() as conn:
+            await conn.executemany(
+                _insert_sql("timer_sessions", SESSION_COLUMNS),
+                [_values(session.dict(), SESSION_COLUMNS) for session in sessions]
+            )
+            await conn.executemany(
+                "INSERT INTO stats_rollups (key, user_id, kind, category, day, sessions, time_seconds) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET "
+                "sessions = sessions + excluded.sessions, "
+                "time_seconds = time_seconds + excluded.time_seconds",
+                [
+                    (key, fields["user_id"], fields["kind"], fields.get("category"), fields.get("day"),
+                     inc["sessions"], inc["time_seconds"])
+                    for key, (inc, fields) in rollup_increments(sessions).items()
+                ]
+            )
+
+            sketches = sketch_increments(sessions)
+            keys = list(sketches)
+            async with conn.execute(
+                f"SELECT key, sketch FROM stats_sketches WHERE key IN ({', '.join('?' for _ in keys)})", keys
+            ) as cursor:
+                for key, stored in await cursor.fetchall():
+                    sketches[key][1].merge(QuantileSketch.from_doc(json.loads(stored)))
+            await self._write_sketches(conn, sketches)
+
+    async def _write_sketches(self, conn: aiosqlite.Connection, sketches: Dict[str, Tuple[dict, QuantileSketch]]):
+        await conn.executemany(
+            "INSERT OR REPLACE INTO stats_sketches (key, user_id, metric, category, sketch) VALUES (?, ?, ?, ?, ?)",
+            [
+                (key, fields["user_id"], fields["metric"], fields["category"], json.dumps(sketch.to_doc()))
+                for key, (fields, sketch) in sketches.items()
+            ]
+        )
+
+    async def count(self, user_id: str) -> int:
+        async with self.database.conn.execute(
+            "SELECT COUNT(*) FROM timer_sessions WHERE user_id = ?", (user_id,)
+        ) as cursor:
+            (count,) = await cursor.fetchone()
+        return count
+
+    async def get(self, user_id: str, session_id: str) -> Optional[dict]:
+        return await self.database.fetch_one(
+            "SELECT * FROM timer_sessions WHERE id = ? AND user_id = ?", (session_id, user_id)
+        )
+
+    async def stream(self, user_id: str, start: Optional[datetime], end: Optional[datetime],
+                     category: Optional[str], after: Optional[Tuple[datetime, str]],
+                     batch_size: int) -> AsyncIterator[dict]:
+        conditions, params = ["user_id = ?"], [user_id]
+        if start is not None:
+            conditions.append("session_date >= ?")
+            params.append(_to_sql(start))
+        if end is not None:
+            conditions.append("session_date < ?")
+            params.append(_to_sql(end))
+        if category is not None:
+            conditions.append("category = ?")
+            params.append(category)
+
+        # One keyset query per batch rather than a cursor held open on the
+        # shared connection for the whole download
+        while True:
+            keyset = ["(session_date, id) > (?, ?)"] if after is not None else []
+            keyset_params = [_to_sql(after[0]), after[1]] if after is not None else []
+            where = " AND ".join(conditions + keyset)
+            rows = await self.database.fetch_all(
+                f"SELECT * FROM timer_sessions WHERE {where} ORDER BY session_date, id LIMIT ?",
+                tuple(params + keyset_params + [batch_size])
+            )
+            for row in rows:
+                yield row
+            if len(rows) < batch_size:
+                return
+            after = (rows[-1]["session_date"], rows[-1]["id"])
+
+    async def read_rollups(self, user_id: str, day: str) -> List[dict]:
+        rows = await self.database.fetch_all(
+            "SELECT key AS _id, user_id, kind, category, day, sessions, time_seconds FROM stats_rollups "
+            "WHERE user_id = ? AND (kind IN ('global', 'category') OR key = ?)",
+            (user_id, rollup_id(user_id, f"day:{day}"))
+        )
+        return [{k: v for k, v in row.items() if v is not None} for row in rows]
+
+    async def read_sketches(self, user_id: str) -> List[dict]:
+        rows = await self.database.fetch_all(
+            "SELECT metric, category, sketch FROM stats_sketches WHERE user_id = ?", (user_id,)
+        )
+        return [{"metric": row["metric"], "category": row["category"], **json.loads(row["sketch"])} for row in rows]
+
+    async def rebuild_rollups(self) -> int:
+        async with self.database.transaction() as conn:
+            async with conn.execute(
+                "SELECT user_id, category, substr(session_date, 1, 10), COUNT(*), SUM(completed_seconds) "
+                "FROM timer_sessions GROUP BY 1, 2, 3"
+            ) as cursor:
+                rollups = fold_rollup_groups(await cursor.fetchall())
+            await conn.execute("DELETE FROM stats_rollups")
+            await conn.executemany(
+                "INSERT INTO stats_rollups (key, user_id, kind, category, day, sessions, time_seconds) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (key, doc["user_id"], doc["kind"], doc.get("category"), doc.get("day"),
+                     doc["sessions"], doc["time_seconds"])
+                    for key, doc in rollups.items()
+                ]
+            )
+
+            # Sketches need every value, but only the sketches stay in memory
+            sketches = {}
+            async with conn.execute(
+                "SELECT user_id, category, completed_seconds, duration_seconds FROM timer_sessions"
+            ) as cursor:
+                async for row in cursor:
+                    fold_sketches(sketches, [tuple(row)])
+            await conn.execute("DELETE FROM stats_sketches")
+            await self._write_sketches(conn, sketches)
+        return len(rollups)
+
+    async def aggregate_range(self, user_id: str, start: datetime, end: datetime, granularity: str,
+                              tz: str) -> List[RangeGroup]:
+        # SQLite has no time zone database, so group by UTC quarter hour and
+        # fold those into local buckets; every zone's offset is a whole number
+        # of quarter hours, so no slot straddles a local boundary
+        async with self.database.conn.execute(
+            "SELECT substr(session_date, 1, 14) || "
+            "printf('%02d', CAST(substr(session_date, 15, 2) AS INTEGER) / 15 * 15), "
+            "category, COUNT(*), SUM(completed_seconds) "
+            "FROM timer_sessions WHERE user_id = ? AND session_date >= ? AND session_date < ? GROUP BY 1, 2",
+            (user_id, _to_sql(start), _to_sql(end))
+        ) as cursor:
+            groups = [(datetime.fromisoformat(slot), category, sessions, seconds)
+                      for slot, category, sessions, seconds in await cursor.fetchall()]
+        return fold_range_groups(groups, granularity, ZoneInfo(tz))
+
+    async def read_columns(self, user_id: str, start: datetime, end: datetime) -> SessionColumns:
+        # Answered from timer_sessions_user_range alone, without touching the table
+        async with self.database.conn.execute(
+            "SELECT session_date, category, completed_seconds FROM timer_sessions "
+            "WHERE user_id = ? AND session_date >= ? AND session_date < ?",
+            (user_id, _to_sql(start), _to_sql(end))
+        ) as cursor:
+            rows = await cursor.fetchall()
+        return SessionColumns(
+            [datetime.fromisoformat(row[0]) for row in rows],
+            [row[1] for row in rows],
+            [row[2] for row in rows]
+        )
+
+
+class SQLiteTemplateRepository(TemplateRepository):
+    def __init__(self, database: SQLiteDatabase):
+        self.database = database
+
+    async def list_all(self, user_id: str) -> List[dict]:
+        return await self.database.fetch_all(
+            "SELECT * FROM timer_templates WHERE user_id = ? LIMIT 1000", (user_id,)
+        )
+
+    async def get(self, user_id: str, template_id: str) -> Optional[dict]:
+        return await self.database.fetch_one(
+            "SELECT * FROM timer_templates WHERE id = ? AND user_id = ?", (template_id, user_id)
+        )
+
+    async def get_by_name(self, user_id: str, name: str) -> Optional[dict]:
+        return await self.database.fetch_one(
+            "SELECT * FROM timer_templates WHERE user_id = ? AND name = ?", (user_id, name)
+        )
+
+    async def insert(self, doc: dict):
+        async with self.database.transaction() as conn:
+            await conn.execute(_insert_sql("timer_templates", TEMPLATE_COLUMNS), _values(doc, TEMPLATE_COLUMNS))
+
+    async def seed(self, user_id: str, docs: List[dict]) -> int:
+        if not docs:
+            return 0
+        placeholders = ", ".join("?" for _ in TEMPLATE_COLUMNS)
+        # BEGIN IMMEDIATE serializes writers across processes, so the
+        # existence check and the insert cannot interleave with another seed
+        async with self.database.transaction() as conn:
+            cursor = await conn.executemany(
+                f"INSERT OR IGNORE INTO timer_templates ({', '.join(TEMPLATE_COLUMNS)}) "
+                f"SELECT {placeholders} WHERE NOT EXISTS "
+                "(SELECT 1 FROM timer_templates WHERE user_id = ? AND name = ?)",
+                [_values(doc, TEMPLATE_COLUMNS) + (user_id, doc["name"]) for doc in docs]
+            )
+            return cursor.rowcount
+
+
+class SQLiteVersionRepository(VersionRepository):
+    def __init__(self, database: SQLiteDatabase):
+        self.database = database
+
+    async def get(self, key: str) -> int:
+        row = await self.database.fetch_one("SELECT version FROM cache_versions WHERE key = ?", (key,))
+        return row["version"] if row else 0
+
+    async def bump(self, key: str):
+        async with self.database.transaction() as conn:
+            await conn.execute(
+                "INSERT INTO cache_versions (key, version) VALUES (?, 1) "
+                "ON CONFLICT (key) DO UPDATE SET version = version + 1",
+                (key,)
+            )
+
+    async def claim(self, key: str) -> bool:
+        async with self.database.transaction() as conn:
+            cursor = await conn.execute(
+                "INSERT INTO cache_versions (key, version) VALUES (?, 1) ON CONFLICT (key) DO NOTHING", (key,)
+            )
+            return cursor.rowcount == 1
+
+
+class SQLiteStorage(Storage):
+    name = "sqlite"
+
+    def __init__(self, path: str):
+        self.database = SQLiteDatabase(path)
+        self.timers = SQLiteTimerRepository(self.database)
+        self.sessions = SQLiteSessionRepository(self.database)
+        self.templates = SQLiteTemplateRepository(self.database)
+        self.versions = SQLiteVersionRepository(self.database)
+
+    async def connect(self):
+        await self.database.connect()
+        async with self.database.transaction() as conn:
+            cursor = await conn.execute("DELETE FROM stats_rollups WHERE user_id IS NULL")
+        if cursor.rowcount:
+            await self.versions.bump(STATS_BACKFILL_REQUESTS)
+
+    async def close(self):
+        if self.database.conn is not None:
+            await self.database.conn.close()
+            self.database.conn = None
+
+    async def describe_indexes(self) -> Dict[str, Any]:
+        user = DEFAULT_USER_ID
+        queries = {
+            "get_timer": ("SELECT * FROM timers WHERE id = ? AND user_id = ?", ("example", user)),
+            "get_timers": (
+                f"SELECT * FROM timers WHERE user_id = ? AND status IN ({_ACTIVE_IN}) ORDER BY created_at, id",
+                (user,)
+            ),
+            "running_deadlines": (
+                "SELECT id, ends_at FROM timers WHERE status = 'running' AND ends_at IS NOT NULL", ()
+            ),
+            "archive_candidates": (
+                "SELECT id FROM timers WHERE status = 'completed' AND completed_at < ?", ("2100-01-01",)
+            ),
+            "timer_changes": (
+                "SELECT * FROM timers WHERE user_id = ? AND updated_at >= ? ORDER BY updated_at, id",
+                (user, "2100-01-01")
+            ),
+            "template_by_id": ("SELECT * FROM timer_templates WHERE id = ? AND user_id = ?", ("example", user)),
+            "template_by_name": (
+                "SELECT * FROM timer_templates WHERE user_id = ? AND name = ?", (user, "example")
+            ),
+            "sessions_today": (
+                "SELECT * FROM timer_sessions WHERE user_id = ? AND session_date >= ?", (user, "2000-01-01")
+            ),
+            "sessions_range": (
+                "SELECT substr(session_date, 1, 16), category, COUNT(*), SUM(completed_seconds) "
+                "FROM timer_sessions WHERE user_id = ? AND session_date >= ? AND session_date < ? GROUP BY 1, 2",
+                (user, "2000-01-01", "2100-01-01")
+            ),
+        }
+
+        indexes = {}
+        for row in await self.database.fetch_all(
+            "SELECT tbl_name, name, sql FROM sqlite_master WHERE type = 'index'"
+        ):
+            indexes.setdefault(row["tbl_name"], {})[row["name"]] = row["sql"]
+
+        plans = {}
+        for name, (sql, params) in queries.items():
+            async with self.database.conn.execute(f"EXPLAIN QUERY PLAN {sql}", params) as cursor:
+                plans[name] = [row[-1] for row in await cursor.fetchall()]
+
+        return {"backend": "sqlite", "indexes": indexes, "plans": plans}
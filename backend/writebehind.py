@@ -0,0 +1,216 @@
+"""Write-behind buffers that batch records into one store write"""
+import asyncio
+import itertools
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Generic, Hashable, List, Optional, TypeVar
+
+
+logger = logging.getLogger(__name__)
+
+K = TypeVar("K", bound=Hashable)
+T = TypeVar("T")
+
+
+class WriteBehindQueue(Generic[T]):
+    """Buffers records in memory and hands them to `write` in batches.
+
+    A background task flushes once `max_batch` records are pending or
+    `interval` seconds after the previous flush, whichever comes first.
+    Readers that need their own writes call `flush` first; it waits for any
+    flush already in progress and then writes whatever is still pending.
+    A failed batch is put back at the head of the queue and retried.
+    """
+
+    def __init__(self, write: Callable[[List[T]], Awaitable[None]],
+                 max_batch: int = 100, interval: float = 0.5):
+        self._write = write
+        self._max_batch = max_batch
+        self._interval = interval
+        self._pending: List[T] = []
+        self._lock = asyncio.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.flushes = 0
+        self.flushed = 0
+        self.failures = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def put(self, items: List[T]):
+        self._pending.extend(items)
+        if len(self._pending) >= self._max_batch and self._wakeup is not None:
+            self._wakeup.set()
+
+    async def flush(self):
+        """Write everything queued so far"""
+        async with self._lock:
+            while self._pending:
+                batch = self._pending[:self._max_batch]
+                del self._pending[:len(batch)]
+                start = time.perf_counter()
+                try:
+                    await self._write(batch)
+                except BaseException:
+                    self._pending[:0] = batch
+                    self.failures += 1
+                    raise
+                elapsed = (time.perf_counter() - start) * 1000
+                self.flushes += 1
+                self.flushed += len(batch)
+                self.last_flush_ms = elapsed
+                self.max_flush_ms = max(self.max_flush_ms, elapsed)
+                self._total_flush_ms += elapsed
+
+    async def start(self):
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background task and write out what is left"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception("Dropping %d queued records on shutdown", len(self._pending))
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        failed = False
+        while True:
+            self._wakeup.clear()
+            # After a failure, wait out the interval even if the queue is full
+            if failed or len(self._pending) < self._max_batch:
+                alarm = loop.call_later(self._interval, self._wakeup.set)
+                try:
+                    await self._wakeup.wait()
+                finally:
+                    alarm.cancel()
+            try:
+                await self.flush()
+                failed = False
+            except Exception:
+                failed = True
+                logger.exception("Write-behind flush failed; %d records queued", len(self._pending))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._pending),
+            "flushes": self.flushes,
+            "flushed": self.flushed,
+            "failures": self.failures,
+            "last_flush_ms": round(self.last_flush_ms, 3),
+            "max_flush_ms": round(self.max_flush_ms, 3),
+            "avg_flush_ms": round(self._total_flush_ms / self.flushes, 3) if self.flushes else 0.0,
+            "max_batch": self._max_batch,
+            "interval_seconds": self._interval,
+        }
+
+
+class CoalescingBuffer(Generic[K, T]):
+    """Keeps only the latest record per key and writes them out in batches.
+
+    `put` replaces whatever is pending under the same key, so the store sees
+    at most one write per key per `interval` however often callers report.
+    `flush_key` writes one key ahead of schedule, waiting out a flush that
+    may already be carrying it, and `discard` drops it. A failed batch is
+    put back, except for keys that received a newer record meanwhile.
+    """
+
+    def __init__(self, write: Callable[[List[T]], Awaitable[None]],
+                 interval: float = 1.0, max_batch: int = 500):
+        self._write = write
+        self._interval = interval
+        self._max_batch = max_batch
+        self._pending: Dict[K, T] = {}
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.received = 0
+        self.written = 0
+        self.flushes = 0
+        self.failures = 0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def get(self, key: K) -> Optional[T]:
+        return self._pending.get(key)
+
+    def values(self) -> List[T]:
+        return list(self._pending.values())
+
+    def put(self, key: K, item: T):
+        self._pending[key] = item
+        self.received += 1
+
+    def discard(self, key: K):
+        self._pending.pop(key, None)
+
+    async def _write_batch(self, batch: Dict[K, T]):
+        try:
+            await self._write(list(batch.values()))
+        except BaseException:
+            for key, item in batch.items():
+                self._pending.setdefault(key, item)
+            self.failures += 1
+            raise
+        self.flushes += 1
+        self.written += len(batch)
+
+    async def flush_key(self, key: K):
+        async with self._lock:
+            item = self._pending.pop(key, None)
+            if item is not None:
+                await self._write_batch({key: item})
+
+    async def flush(self):
+        """Write everything pending so far"""
+        async with self._lock:
+            while self._pending:
+                keys = list(itertools.islice(self._pending, self._max_batch))
+                await self._write_batch({key: self._pending.pop(key) for key in keys})
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background task and write out what is left"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception("Dropping %d buffered records on shutdown", len(self._pending))
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self._interval)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Coalesced flush failed; %d records buffered", len(self._pending))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._pending),
+            "received": self.received,
+            "written": self.written,
+            "flushes": self.flushes,
+            "failures": self.failures,
+            "interval_seconds": self._interval,
+        }
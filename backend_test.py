@@ -5,18 +5,29 @@ Tests all timer CRUD operations, templates, and statistics endpoints
 """
 
 import requests
+import argparse
+import asyncio
 import json
+import logging
+import random
+import os
+import sys
 import time
-from datetime import datetime
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
 from typing import Dict, List, Optional
 
 # Backend URL from environment
-BACKEND_URL = "https://2c20541d-b61d-4b69-a8bd-e0d09e5adea2.preview.emergentagent.com/api"
+BACKEND_URL = os.environ.get(
+    "BACKEND_URL", "https://2c20541d-b61d-4b69-a8bd-e0d09e5adea2.preview.emergentagent.com/api"
+)
 
 class PowerTimerAPITester:
-    def __init__(self):
-        self.base_url = BACKEND_URL
-        self.session = requests.Session()
+    def __init__(self, session=None, base_url: str = BACKEND_URL):
+        self.base_url = base_url
+        self.session = session or requests.Session()
         self.created_timers = []
         self.created_templates = []
         
@@ -95,6 +106,30 @@ class PowerTimerAPITester:
             self.log(f"❌ Get timers error: {str(e)}", "ERROR")
             results['get_timers'] = False
         
+        # Test 2b: Paginated listing with field projection
+        self.log("Testing Paginated Timer Listing...")
+        try:
+            seen = []
+            params = {"limit": 1, "fields": "name,status"}
+            while True:
+                response = self.session.get(f"{self.base_url}/timers", params=params)
+                page = response.json()
+                seen.extend(timer['id'] for timer in page)
+                cursor = response.headers.get('X-Next-Cursor')
+                if not cursor or len(seen) > 1000:
+                    break
+                params['cursor'] = cursor
+            
+            if page and set(page[0]) == {'id', 'name', 'status'} and len(seen) == len(set(seen)):
+                self.log(f"✅ Paged through {len(seen)} timers")
+                results['paginate_timers'] = True
+            else:
+                self.log("❌ Paginated listing returned unexpected pages", "ERROR")
+                results['paginate_timers'] = False
+        except Exception as e:
+            self.log(f"❌ Paginated listing error: {str(e)}", "ERROR")
+            results['paginate_timers'] = False
+        
         # Test 3: Get Specific Timer
         if self.created_timers:
             timer_id = self.created_timers[0]
@@ -241,6 +276,234 @@ class PowerTimerAPITester:
                 self.log(f"❌ Timer deletion error: {str(e)}", "ERROR")
                 results['delete_timer'] = False
         
+        # Test 9: Concurrent completions record exactly one session
+        self.log("Testing Concurrent Timer Completion...")
+        try:
+            timer_data = {
+                "name": "Raced Timer",
+                "duration_seconds": 300,
+                "category": "test"
+            }
+            response = self.session.post(f"{self.base_url}/timers", json=timer_data)
+            timer_id = response.json()['id']
+            self.created_timers.append(timer_id)
+            self.session.patch(f"{self.base_url}/timers/{timer_id}", json={"status": "running"})
+            
+            before = self.session.get(f"{self.base_url}/stats").json()['total_sessions']
+            
+            def complete(_):
+                return self.session.patch(f"{self.base_url}/timers/{timer_id}", json={"status": "completed"}).status_code
+            
+            with ThreadPoolExecutor(max_workers=10) as pool:
+                status_codes = list(pool.map(complete, range(10)))
+            
+            after = self.session.get(f"{self.base_url}/stats").json()['total_sessions']
+            if all(code == 200 for code in status_codes) and after - before == 1:
+                self.log("✅ Concurrent completions wrote exactly one session")
+                results['concurrent_completion'] = True
+            else:
+                self.log(f"❌ Concurrent completions wrote {after - before} sessions", "ERROR")
+                results['concurrent_completion'] = False
+        except Exception as e:
+            self.log(f"❌ Concurrent completion error: {str(e)}", "ERROR")
+            results['concurrent_completion'] = False
+        
+        # Test 10: Bulk create, update and delete
+        self.log("Testing Bulk Timer Operations...")
+        try:
+            operations = [
+                {"op": "create", "timer": {"name": f"Bulk Pomodoro {i}", "duration_seconds": 1500, "category": "productivity"}}
+                for i in range(3)
+            ]
+            response = self.session.post(f"{self.base_url}/timers/bulk", json={"operations": operations})
+            bulk_ids = [item['id'] for item in response.json()]
+            self.created_timers.extend(bulk_ids[:2])
+            
+            operations = [
+                {"op": "update", "id": bulk_ids[0], "update": {"status": "running"}},
+                {"op": "update", "id": bulk_ids[1], "update": {"status": "paused"}},
+                {"op": "delete", "id": bulk_ids[2]},
+                {"op": "delete", "id": "invalid-id"},
+            ]
+            response = self.session.post(f"{self.base_url}/timers/bulk", json={"operations": operations})
+            items = response.json()
+            if [item['status_code'] for item in items] == [200, 200, 200, 404] and items[0]['timer']['status'] == 'running':
+                self.log("✅ Bulk timer operations successful")
+                results['bulk_operations'] = True
+            else:
+                self.log(f"❌ Bulk timer operations returned {items}", "ERROR")
+                results['bulk_operations'] = False
+        except Exception as e:
+            self.log(f"❌ Bulk timer operations error: {str(e)}", "ERROR")
+            results['bulk_operations'] = False
+        
+        # Test 11: Server-side expiry (no client PATCH to complete)
+        self.log("Testing Server-Side Timer Expiry...")
+        try:
+            timer_data = {
+                "name": "Expiring Timer",
+                "duration_seconds": 1,
+                "category": "test"
+            }
+            response = self.session.post(f"{self.base_url}/timers", json=timer_data)
+            timer_id = response.json()['id']
+            self.created_timers.append(timer_id)
+            
+            response = self.session.patch(f"{self.base_url}/timers/{timer_id}", json={"status": "running"})
+            if response.json().get('ends_at') is None:
+                self.log("❌ Running timer has no deadline", "ERROR")
+                results['server_side_expiry'] = False
+            else:
+                time.sleep(2.5)
+                timer = self.session.get(f"{self.base_url}/timers/{timer_id}").json()
+                if timer['status'] == 'completed' and timer['remaining_seconds'] == 0:
+                    self.log("✅ Timer completed by the server scheduler")
+                    results['server_side_expiry'] = True
+                else:
+                    self.log(f"❌ Timer not completed after deadline: {timer['status']}", "ERROR")
+                    results['server_side_expiry'] = False
+        except Exception as e:
+            self.log(f"❌ Server-side expiry error: {str(e)}", "ERROR")
+            results['server_side_expiry'] = False
+        
+        # Test 12: Completed timers move to the archive and stay readable
+        self.log("Testing Timer Archival...")
+        try:
+            response = self.session.post(f"{self.base_url}/timers", json={"name": "Archived Timer", "duration_seconds": 60, "category": "archive-test"})
+            timer_id = response.json()['id']
+            self.session.patch(f"{self.base_url}/timers/{timer_id}", json={"status": "completed"})
+            
+            summary = self.session.post(f"{self.base_url}/admin/archive", params={"older_than_seconds": 0}).json()
+            archived = self.session.get(f"{self.base_url}/timers/archive", params={"category": "archive-test"}).json()
+            hot_ids = [timer['id'] for timer in self.session.get(f"{self.base_url}/timers").json()]
+            response = self.session.get(f"{self.base_url}/timers/{timer_id}")
+            if (summary['archived'] >= 1 and [timer['id'] for timer in archived] == [timer_id]
+                    and timer_id not in hot_ids and response.status_code == 200
+                    and response.json()['status'] == 'completed'):
+                self.log(f"✅ Timer archival successful - {summary['archived']} timers archived")
+                results['timer_archival'] = True
+            else:
+                self.log(f"❌ Timer archival failed: {summary}, {archived}", "ERROR")
+                results['timer_archival'] = False
+        except Exception as e:
+            self.log(f"❌ Timer archival error: {str(e)}", "ERROR")
+            results['timer_archival'] = False
+        
+        # Test 13: Delta sync reports creates, updates and deletes since a token
+        self.log("Testing Timer Delta Sync...")
+        try:
+            token = self.session.get(f"{self.base_url}/timers").headers['X-Changes-Token']
+            created = self.session.post(f"{self.base_url}/timers", json={"name": "Delta Timer", "duration_seconds": 60, "category": "test"}).json()
+            self.created_timers.append(created['id'])
+            self.session.patch(f"{self.base_url}/timers/{created['id']}", json={"name": "Delta Timer Renamed"})
+            doomed = self.session.post(f"{self.base_url}/timers", json={"name": "Doomed Timer", "duration_seconds": 60, "category": "test"}).json()
+            self.session.delete(f"{self.base_url}/timers/{doomed['id']}")
+            
+            response = self.session.get(f"{self.base_url}/timers/changes", params={"since": token})
+            changes = response.json()
+            names = {timer['id']: timer['name'] for timer in changes['timers']}
+            invalid = self.session.get(f"{self.base_url}/timers/changes", params={"since": "not-a-token"})
+            if (response.status_code == 200 and names.get(created['id']) == "Delta Timer Renamed"
+                    and doomed['id'] in changes['deleted'] and doomed['id'] not in names
+                    and changes['token'] and invalid.status_code == 400):
+                self.log(f"✅ Delta sync returned {len(changes['timers'])} changed and {len(changes['deleted'])} deleted timers")
+                results['delta_sync'] = True
+            else:
+                self.log(f"❌ Delta sync mismatch: {changes}", "ERROR")
+                results['delta_sync'] = False
+        except Exception as e:
+            self.log(f"❌ Delta sync error: {str(e)}", "ERROR")
+            results['delta_sync'] = False
+        
+        # Test 14: Timers are only visible to the tenant named in X-User-Id
+        self.log("Testing Tenant Isolation...")
+        try:
+            tenant = {"X-User-Id": "tenant-b"}
+            created = self.session.post(f"{self.base_url}/timers", json={"name": "Tenant Timer", "duration_seconds": 60, "category": "test"}, headers=tenant).json()
+            default_ids = {timer['id'] for timer in self.session.get(f"{self.base_url}/timers").json()}
+            tenant_ids = {timer['id'] for timer in self.session.get(f"{self.base_url}/timers", headers=tenant).json()}
+            foreign = self.session.get(f"{self.base_url}/timers/{created['id']}")
+            foreign_delete = self.session.delete(f"{self.base_url}/timers/{created['id']}")
+            own_delete = self.session.delete(f"{self.base_url}/timers/{created['id']}", headers=tenant)
+            if (created['id'] in tenant_ids and created['id'] not in default_ids
+                    and not tenant_ids & set(self.created_timers)
+                    and foreign.status_code == 404 and foreign_delete.status_code == 404
+                    and own_delete.status_code == 200):
+                self.log("✅ Tenant timers are invisible to other tenants")
+                results['tenant_isolation'] = True
+            else:
+                self.log(f"❌ Tenant isolation broken: {created['id']} default={default_ids} tenant={tenant_ids}", "ERROR")
+                results['tenant_isolation'] = False
+        except Exception as e:
+            self.log(f"❌ Tenant isolation error: {str(e)}", "ERROR")
+            results['tenant_isolation'] = False
+
+        # Test 15: Rapid progress PATCHes end at the last value, coalesced or not
+        self.log("Testing Progress Update Coalescing...")
+        try:
+            timer = self.session.post(f"{self.base_url}/timers", json={"name": "Progress Timer", "duration_seconds": 60, "category": "test"}).json()
+            self.created_timers.append(timer['id'])
+            acks = [self.session.patch(f"{self.base_url}/timers/{timer['id']}", json={"remaining_seconds": remaining}).json()
+                    for remaining in range(55, 45, -1)]
+            current = self.session.get(f"{self.base_url}/timers/{timer['id']}").json()
+            paused = self.session.patch(f"{self.base_url}/timers/{timer['id']}", json={"status": "paused"}).json()
+            report = self.session.get(f"{self.base_url}/admin/progress-buffer").json()
+            if (acks[-1]['remaining_seconds'] == 46 and current['remaining_seconds'] == 46
+                    and paused['status'] == 'paused' and paused['remaining_seconds'] == 46
+                    and (not report['enabled'] or report['written'] < report['received'])):
+                self.log(f"✅ Progress updates applied in order: {report}")
+                results['progress_coalescing'] = True
+            else:
+                self.log(f"❌ Progress updates lost: {current}, {paused}, {report}", "ERROR")
+                results['progress_coalescing'] = False
+        except Exception as e:
+            self.log(f"❌ Progress coalescing error: {str(e)}", "ERROR")
+            results['progress_coalescing'] = False
+
+        # Test 16: An acknowledged progress PATCH shows in the list and delta sync before any flush
+        self.log("Testing Progress Visible in Timer List...")
+        try:
+            tenant = {"X-User-Id": f"progress-{uuid.uuid4()}"}
+            timer = self.session.post(f"{self.base_url}/timers", json={"name": "Listed Progress", "duration_seconds": 60, "category": "test"}, headers=tenant).json()
+            listed = self.session.get(f"{self.base_url}/timers", headers=tenant)
+            etag, token = listed.headers.get('ETag'), listed.headers.get('X-Changes-Token')
+            self.session.patch(f"{self.base_url}/timers/{timer['id']}", json={"remaining_seconds": 30}, headers=tenant)
+            relisted = self.session.get(f"{self.base_url}/timers", headers={**tenant, "If-None-Match": etag or ""})
+            changes = self.session.get(f"{self.base_url}/timers/changes", params={"since": token}, headers=tenant).json()
+            remaining = {t['id']: t['remaining_seconds'] for t in relisted.json()} if relisted.status_code == 200 else {}
+            changed = {t['id']: t['remaining_seconds'] for t in changes['timers']}
+            if remaining.get(timer['id']) == 30 and changed.get(timer['id']) == 30:
+                self.log("✅ Progress PATCH visible to the list and delta sync right away")
+                results['progress_listed'] = True
+            else:
+                self.log(f"❌ Progress PATCH not visible: list {relisted.status_code} {remaining}, changes {changed}", "ERROR")
+                results['progress_listed'] = False
+            self.session.delete(f"{self.base_url}/timers/{timer['id']}", headers=tenant)
+        except Exception as e:
+            self.log(f"❌ Progress listing error: {str(e)}", "ERROR")
+            results['progress_listed'] = False
+
+        # Test 17: A progress PATCH on a running timer moves the stored deadline right away
+        self.log("Testing Running Timer Progress Write-Through...")
+        try:
+            timer = self.session.post(f"{self.base_url}/timers", json={"name": "Running Progress", "duration_seconds": 60, "category": "test"}).json()
+            self.created_timers.append(timer['id'])
+            self.session.patch(f"{self.base_url}/timers/{timer['id']}", json={"status": "running"})
+            before = self.session.get(f"{self.base_url}/admin/progress-buffer").json()
+            ack = self.session.patch(f"{self.base_url}/timers/{timer['id']}", json={"remaining_seconds": 20}).json()
+            after = self.session.get(f"{self.base_url}/admin/progress-buffer").json()
+            current = self.session.get(f"{self.base_url}/timers/{timer['id']}").json()
+            if (ack['remaining_seconds'] in (19, 20) and current['remaining_seconds'] in (19, 20)
+                    and before.get('received') == after.get('received')):
+                self.log("✅ Running timer deadline written through")
+                results['running_progress'] = True
+            else:
+                self.log(f"❌ Running timer deadline not written: {ack}, {current}, {before}, {after}", "ERROR")
+                results['running_progress'] = False
+        except Exception as e:
+            self.log(f"❌ Running timer progress error: {str(e)}", "ERROR")
+            results['running_progress'] = False
+
         return results
     
     def test_timer_templates(self) -> Dict[str, bool]:
@@ -262,6 +525,22 @@ class PowerTimerAPITester:
             self.log(f"❌ Initialize templates error: {str(e)}", "ERROR")
             results['init_templates'] = False
         
+        # Seeding again creates nothing and leaves one template per name
+        self.log("Testing Idempotent Template Seeding...")
+        try:
+            response = self.session.post(f"{self.base_url}/init-templates")
+            names = [template['name'] for template in self.session.get(f"{self.base_url}/templates").json()]
+            if (response.status_code == 200 and response.json()['message'].startswith("Created 0 ")
+                    and "Pomodoro Work" in names and len(names) == len(set(names))):
+                self.log(f"✅ Seed version {response.json()['seed_version']} already in place")
+                results['seed_templates'] = True
+            else:
+                self.log(f"❌ Re-seeding changed templates: {response.json()}, {names}", "ERROR")
+                results['seed_templates'] = False
+        except Exception as e:
+            self.log(f"❌ Template seeding error: {str(e)}", "ERROR")
+            results['seed_templates'] = False
+        
         # Test 2: Get All Templates
         self.log("Testing Get All Templates...")
         try:
@@ -318,7 +597,7 @@ class PowerTimerAPITester:
         if self.created_templates:
             template_id = self.created_templates[0]
             custom_name = "My Custom Focus Session"
-            self.log(f"Testing Create Timer from Template with Custom Name...")
+            self.log("Testing Create Timer from Template with Custom Name...")
             try:
                 response = self.session.post(f"{self.base_url}/templates/{template_id}/create-timer?name={custom_name}")
                 if response.status_code == 200:
@@ -368,6 +647,278 @@ class PowerTimerAPITester:
             self.log(f"❌ Statistics API error: {str(e)}", "ERROR")
             results['get_stats'] = False
         
+        # Rebuilding the rollups from raw sessions must not change the figures,
+        # and needs the admin token; without ADMIN_TOKEN only the refusal is checked
+        self.log("Testing Statistics Rollup Rebuild...")
+        try:
+            denied = self.session.post(f"{self.base_url}/stats/rebuild")
+            admin_token = os.environ.get('ADMIN_TOKEN')
+            if denied.status_code != 403:
+                self.log(f"❌ Statistics rollup rebuild allowed without admin token: {denied.status_code}", "ERROR")
+                results['rebuild_stats'] = False
+            elif not admin_token:
+                self.log("✅ Statistics rollup rebuild refused without admin token")
+                results['rebuild_stats'] = True
+            else:
+                before = self.session.get(f"{self.base_url}/stats").json()
+                response = self.session.post(f"{self.base_url}/stats/rebuild", headers={"X-Admin-Token": admin_token})
+                after = self.session.get(f"{self.base_url}/stats").json()
+                if response.status_code == 200 and before == after:
+                    self.log(f"✅ Statistics rollups rebuilt: {response.json()['message']}")
+                    results['rebuild_stats'] = True
+                else:
+                    self.log(f"❌ Statistics rollup rebuild mismatch: {before} != {after}", "ERROR")
+                    results['rebuild_stats'] = False
+        except Exception as e:
+            self.log(f"❌ Statistics rollup rebuild error: {str(e)}", "ERROR")
+            results['rebuild_stats'] = False
+        
+        # Reading stats drains any write-behind queue first
+        self.log("Testing Session Queue Report...")
+        try:
+            self.session.get(f"{self.base_url}/stats")
+            response = self.session.get(f"{self.base_url}/admin/session-queue")
+            report = response.json()
+            if response.status_code == 200 and (not report['enabled'] or report['pending'] == 0):
+                self.log(f"✅ Session queue report: {report}")
+                results['session_queue'] = True
+            else:
+                self.log(f"❌ Session queue not drained by a stats read: {report}", "ERROR")
+                results['session_queue'] = False
+        except Exception as e:
+            self.log(f"❌ Session queue report error: {str(e)}", "ERROR")
+            results['session_queue'] = False
+        
+        # Export every session, then resume after the first one
+        self.log("Testing Session Export...")
+        try:
+            total = self.session.get(f"{self.base_url}/stats").json()['total_sessions']
+            response = self.session.get(f"{self.base_url}/sessions/export", params={"format": "ndjson"})
+            rows = [json.loads(line) for line in response.text.splitlines() if line]
+            dates = [row['session_date'] for row in rows]
+            csv_response = self.session.get(f"{self.base_url}/sessions/export", params={"format": "csv"})
+            csv_lines = csv_response.text.splitlines()
+            resumed = self.session.get(f"{self.base_url}/sessions/export", params={"cursor": rows[0]['id']}) if rows else None
+            resumed_rows = [json.loads(line) for line in resumed.text.splitlines() if line] if resumed else []
+            if (response.status_code == 200 and len(rows) == total and dates == sorted(dates)
+                    and csv_lines[0].startswith("id,timer_id") and len(csv_lines) == total + 1
+                    and [row['id'] for row in resumed_rows] == [row['id'] for row in rows[1:]]):
+                self.log(f"✅ Exported {len(rows)} sessions as NDJSON and CSV, resume works")
+                results['session_export'] = True
+            else:
+                self.log(f"❌ Session export mismatch: {len(rows)} rows, {total} sessions", "ERROR")
+                results['session_export'] = False
+        except Exception as e:
+            self.log(f"❌ Session export error: {str(e)}", "ERROR")
+            results['session_export'] = False
+        
+        # Sketched percentiles stay within the advertised error of exact ones
+        self.log("Testing Session Distribution...")
+        try:
+            rng = random.Random(7)
+            durations = [rng.randint(60, 5400) for _ in range(200)]
+            created = self.session.post(f"{self.base_url}/timers/bulk", json={"operations": [
+                {"op": "create", "timer": {"name": f"Sketch {i}", "duration_seconds": duration, "category": rng.choice(["sketch-a", "sketch-b"])}}
+                for i, duration in enumerate(durations)
+            ]}).json()
+            self.session.post(f"{self.base_url}/timers/bulk", json={"operations": [
+                {"op": "update", "id": result['id'], "update": {"remaining_seconds": rng.randint(0, duration), "status": "completed"}}
+                for result, duration in zip(created, durations)
+            ]})
+            
+            distribution = self.session.get(f"{self.base_url}/stats/distribution").json()
+            rows = [json.loads(line) for line in self.session.get(f"{self.base_url}/sessions/export").text.splitlines() if line]
+            accuracy = distribution['relative_accuracy']
+            
+            def exact(values, q):
+                return sorted(values)[int(q * (len(values) - 1))]
+            
+            checks = []
+            for metric, value in (("duration_seconds", lambda row: row['completed_seconds']),
+                                  ("completion_ratio", lambda row: row['completed_seconds'] / row['duration_seconds'])):
+                scopes = [(distribution[metric]['overall'], rows)] + [
+                    (summary, [row for row in rows if row['category'] == category])
+                    for category, summary in distribution[metric]['categories'].items()
+                ]
+                for summary, scoped in scopes:
+                    values = [value(row) for row in scoped]
+                    checks.append(summary['count'] == len(values))
+                    for name, q in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99)):
+                        checks.append(abs(summary[name] - exact(values, q)) <= accuracy * exact(values, q) + 1e-9)
+            if len(checks) > 20 and all(checks):
+                self.log(f"✅ Distribution of {len(rows)} sessions within {accuracy:.0%}: p50={distribution['duration_seconds']['overall']['p50']:.0f}s")
+                results['session_distribution'] = True
+            else:
+                self.log(f"❌ Distribution off from exact: {distribution['duration_seconds']['overall']}", "ERROR")
+                results['session_distribution'] = False
+        except Exception as e:
+            self.log(f"❌ Session distribution error: {str(e)}", "ERROR")
+            results['session_distribution'] = False
+        
+        # Unchanged resources revalidate with 304; large bodies are gzipped
+        self.log("Testing Conditional GET and Compression...")
+        try:
+            not_modified = []
+            for path in ("/stats", "/templates"):
+                etag = self.session.get(f"{self.base_url}{path}").headers.get('ETag')
+                response = self.session.get(f"{self.base_url}{path}", headers={"If-None-Match": etag or ""})
+                not_modified.append(etag is not None and response.status_code == 304)
+            
+            response = self.session.post(f"{self.base_url}/timers", json={"name": "ETag Timer", "duration_seconds": 60, "category": "test"})
+            self.created_timers.append(response.json()['id'])
+            stale = self.session.get(f"{self.base_url}/stats").headers.get('ETag')
+            self.session.patch(f"{self.base_url}/timers/{response.json()['id']}", json={"status": "completed"})
+            changed = self.session.get(f"{self.base_url}/stats", headers={"If-None-Match": stale})
+            
+            export = self.session.get(f"{self.base_url}/sessions/export", headers={"Accept-Encoding": "gzip"})
+            if all(not_modified) and changed.status_code == 200 and export.headers.get('Content-Encoding') == 'gzip':
+                self.log("✅ 304 for unchanged stats and templates, gzip for exports")
+                results['conditional_get'] = True
+            else:
+                self.log(f"❌ Conditional GET mismatch: {not_modified}, {changed.status_code}, {export.headers.get('Content-Encoding')}", "ERROR")
+                results['conditional_get'] = False
+        except Exception as e:
+            self.log(f"❌ Conditional GET error: {str(e)}", "ERROR")
+            results['conditional_get'] = False
+        
+        # Counters start equal for every tenant, so tags must not match across tenants
+        self.log("Testing Conditional GET Across Tenants...")
+        try:
+            alice, bob = ({"X-User-Id": f"etag-{name}-{uuid.uuid4()}"} for name in ("alice", "bob"))
+            leaked = []
+            for path in ("/timers", "/templates", "/stats"):
+                first = self.session.get(f"{self.base_url}{path}", headers=alice)
+                etag = first.headers.get('ETag')
+                response = self.session.get(f"{self.base_url}{path}", headers={**bob, "If-None-Match": etag or ""})
+                if (etag is None or response.status_code != 200
+                        or 'X-User-Id' not in first.headers.get('Vary', '')):
+                    leaked.append((path, etag, response.status_code, first.headers.get('Vary')))
+            if not leaked:
+                self.log("✅ ETags are scoped to the tenant and vary on X-User-Id")
+                results['tenant_etags'] = True
+            else:
+                self.log(f"❌ ETags shared across tenants: {leaked}", "ERROR")
+                results['tenant_etags'] = False
+        except Exception as e:
+            self.log(f"❌ Tenant ETag error: {str(e)}", "ERROR")
+            results['tenant_etags'] = False
+        
+        # Prometheus scrape endpoint lives outside /api
+        self.log("Testing Prometheus Metrics...")
+        try:
+            metrics_url = self.base_url.rsplit("/api", 1)[0] + "/metrics"
+            response = self.session.get(metrics_url)
+            body = response.text
+            expected = [
+                'power_timer_http_request_duration_seconds_count{method="POST",route="/api/timers"',
+                'power_timer_sessions_completed_total{source="patch"}',
+                'power_timer_running_timers ',
+            ]
+            if response.status_code == 200 and all(line in body for line in expected):
+                self.log("✅ Prometheus metrics exposed")
+                results['metrics'] = True
+            else:
+                self.log(f"❌ Prometheus metrics missing series: {response.status_code}", "ERROR")
+                results['metrics'] = False
+        except Exception as e:
+            self.log(f"❌ Prometheus metrics error: {str(e)}", "ERROR")
+            results['metrics'] = False
+        
+        # X-Profile is ignored unless the server runs with PROFILING_ENABLED
+        self.log("Testing Request Profiling...")
+        try:
+            response = self.session.get(f"{self.base_url}/stats", headers={"X-Profile": "1"})
+            report_header = response.headers.get('X-Profile-Report')
+            if report_header is None:
+                if response.status_code == 200:
+                    self.log("✅ Profiling disabled, X-Profile ignored")
+                    results['request_profiling'] = True
+                else:
+                    self.log(f"❌ Profiled request failed: {response.status_code}", "ERROR")
+                    results['request_profiling'] = False
+            else:
+                report = json.loads(report_header)
+                if (response.status_code == 200 and report['path'].endswith("/stats")
+                        and report['storage']['calls'] >= 1 and report['functions']):
+                    self.log(f"✅ Profiled /stats: {report['duration_ms']}ms, {report['storage']['calls']} storage and {report['db']['calls']} database calls")
+                    results['request_profiling'] = True
+                else:
+                    self.log(f"❌ Profile report incomplete: {report}", "ERROR")
+                    results['request_profiling'] = False
+        except Exception as e:
+            self.log(f"❌ Request profiling error: {str(e)}", "ERROR")
+            results['request_profiling'] = False
+        
+        # Weekly buckets over all of history must add up to the all-time figures
+        self.log("Testing Statistics Range API...")
+        try:
+            totals = self.session.get(f"{self.base_url}/stats").json()
+            response = self.session.get(f"{self.base_url}/stats/range", params={
+                "from": "2000-01-03", "granularity": "week", "tz": "America/New_York"
+            })
+            if response.status_code == 200:
+                report = response.json()
+                starts = [bucket['start'] for bucket in report['buckets']]
+                if (report['total_sessions'] == totals['total_sessions']
+                        and report['total_time_seconds'] == totals['total_time_seconds']
+                        and sum(b['sessions'] for b in report['buckets']) == report['total_sessions']
+                        and starts == sorted(starts)
+                        and all(datetime.fromisoformat(start).weekday() == 0 for start in starts)):
+                    self.log(f"✅ Statistics range returned {len(starts)} weekly buckets")
+                    results['stats_range'] = True
+                else:
+                    self.log(f"❌ Statistics range mismatch: {report} vs {totals}", "ERROR")
+                    results['stats_range'] = False
+            else:
+                self.log(f"❌ Statistics range failed: {response.status_code}", "ERROR")
+                results['stats_range'] = False
+            
+            bad_zone = self.session.get(f"{self.base_url}/stats/range", params={"tz": "Mars/Olympus"})
+            reversed_range = self.session.get(f"{self.base_url}/stats/range", params={
+                "from": "2030-01-01", "to": "2020-01-01"
+            })
+            if bad_zone.status_code == 400 and reversed_range.status_code == 400:
+                self.log("✅ Statistics range rejects bad zones and reversed ranges")
+                results['stats_range_validation'] = True
+            else:
+                self.log(f"❌ Statistics range validation: {bad_zone.status_code}, {reversed_range.status_code}", "ERROR")
+                results['stats_range_validation'] = False
+        except Exception as e:
+            self.log(f"❌ Statistics range error: {str(e)}", "ERROR")
+            results['stats_range'] = False
+        
+        # Today's row of a UTC report matches the rollups, and every breakdown adds up
+        self.log("Testing Productivity Report...")
+        try:
+            totals = self.session.get(f"{self.base_url}/stats").json()
+            checks = []
+            for period in ("week", "month"):
+                response = self.session.get(f"{self.base_url}/stats/report", params={"period": period, "periods": 3})
+                report = response.json()
+                current = report['periods'][-1]
+                checks += [
+                    response.status_code == 200 and len(report['periods']) == 3,
+                    report['days'][-1]['sessions'] == totals['today_sessions'],
+                    report['days'][-1]['time_seconds'] == totals['today_time_seconds'],
+                    current['time_seconds'] - current['delta_seconds'] == 0 or current['delta_ratio'] is not None,
+                    sum(map(sum, report['heatmap'])) == report['total_time_seconds'],
+                    sum(c['sessions'] for c in report['categories'].values()) == report['total_sessions'],
+                    sum(p['time_seconds'] for p in report['periods']) == report['total_time_seconds'],
+                ]
+            etag = response.headers.get('ETag')
+            cached = self.session.get(f"{self.base_url}/stats/report", params={"period": "month", "periods": 3},
+                                      headers={"If-None-Match": etag or ""})
+            bad_zone = self.session.get(f"{self.base_url}/stats/report", params={"tz": "Mars/Olympus"})
+            if all(checks) and cached.status_code == 304 and bad_zone.status_code == 400:
+                self.log(f"✅ Productivity report: {report['total_sessions']} sessions over 3 months across {len(report['categories'])} categories")
+                results['stats_report'] = True
+            else:
+                self.log(f"❌ Productivity report mismatch: {checks}, {cached.status_code}, {bad_zone.status_code}", "ERROR")
+                results['stats_report'] = False
+        except Exception as e:
+            self.log(f"❌ Productivity report error: {str(e)}", "ERROR")
+            results['stats_report'] = False
+        
         return results
     
     def test_edge_cases(self) -> Dict[str, bool]:
@@ -502,10 +1053,418 @@ class PowerTimerAPITester:
         return all_results
 
 
+def run_in_process() -> Dict[str, Dict[str, bool]]:
+    """Run the suite against the app in this process, on the STORAGE_BACKEND store"""
+    sys.path.insert(0, str(Path(__file__).parent / "backend"))
+    from fastapi.testclient import TestClient
+    from server import app
+    
+    with TestClient(app) as client:
+        return PowerTimerAPITester(session=client, base_url="/api").run_all_tests()
+
+
+# Load generation
+LOAD_SCENARIOS = ("crud", "templates", "stats")
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of already sorted samples"""
+    if not samples:
+        return 0.0
+    rank = max(1, int(round(fraction * len(samples) + 0.5)))
+    return samples[min(rank, len(samples)) - 1]
+
+
+class LoadGenerator:
+    """Replays the CRUD, template and statistics scenarios from many concurrent clients
+
+    Each worker loops over randomly picked scenarios until the duration runs
+    out; latencies are recorded per route, e.g. "PATCH /timers/{id}".
+    """
+    
+    def __init__(self, client, scenarios=LOAD_SCENARIOS):
+        self.client = client
+        self.scenarios = scenarios
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.template_ids: List[str] = []
+        
+    async def call(self, method: str, route: str, url: str, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+            failed = response.status_code >= 400
+        except Exception:
+            response, failed = None, True
+        label = f"{method} {route}"
+        self.latencies.setdefault(label, []).append((time.perf_counter() - start) * 1000)
+        if failed:
+            self.errors[label] = self.errors.get(label, 0) + 1
+        return response
+    
+    async def crud(self):
+        response = await self.call("POST", "/timers", "/timers", json={
+            "name": "Load Session", "duration_seconds": 1500, "category": "productivity"
+        })
+        if response is None or response.status_code != 200:
+            return
+        timer_id = response.json()['id']
+        await self.call("GET", "/timers/{id}", f"/timers/{timer_id}")
+        await self.call("PATCH", "/timers/{id}", f"/timers/{timer_id}", json={"status": "running"})
+        await self.call("GET", "/timers", "/timers", params={"limit": 50})
+        await self.call("PATCH", "/timers/{id}", f"/timers/{timer_id}", json={"status": "paused"})
+        await self.call("DELETE", "/timers/{id}", f"/timers/{timer_id}")
+    
+    async def templates(self):
+        await self.call("GET", "/templates", "/templates")
+        if not self.template_ids:
+            return
+        template_id = random.choice(self.template_ids)
+        response = await self.call("POST", "/templates/{id}/create-timer",
+                                   f"/templates/{template_id}/create-timer")
+        if response is not None and response.status_code == 200:
+            await self.call("DELETE", "/timers/{id}", f"/timers/{response.json()['id']}")
+    
+    async def stats(self):
+        await self.call("GET", "/stats", "/stats")
+    
+    async def worker(self, deadline: float):
+        while time.perf_counter() < deadline:
+            await getattr(self, random.choice(self.scenarios))()
+    
+    async def run(self, concurrency: int, duration: float) -> Dict:
+        await self.client.post("/init-templates")
+        self.template_ids = [t['id'] for t in (await self.client.get("/templates")).json()]
+        
+        started_at = datetime.utcnow()
+        start = time.perf_counter()
+        await asyncio.gather(*(self.worker(start + duration) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        
+        endpoints = {}
+        for label, samples in sorted(self.latencies.items()):
+            samples.sort()
+            endpoints[label] = {
+                "requests": len(samples),
+                "errors": self.errors.get(label, 0),
+                "throughput_rps": round(len(samples) / elapsed, 2),
+                "p50_ms": round(percentile(samples, 0.50), 3),
+                "p95_ms": round(percentile(samples, 0.95), 3),
+                "p99_ms": round(percentile(samples, 0.99), 3),
+                "max_ms": round(samples[-1], 3),
+            }
+        total = sum(len(samples) for samples in self.latencies.values())
+        return {
+            "started_at": started_at.isoformat() + "Z",
+            "concurrency": concurrency,
+            "duration_seconds": round(elapsed, 3),
+            "scenarios": list(self.scenarios),
+            "requests": total,
+            "errors": sum(self.errors.values()),
+            "throughput_rps": round(total / elapsed, 2),
+            "endpoints": endpoints,
+        }
+
+
+async def run_load(target: Optional[str], concurrency: int, duration: float,
+                   scenarios=LOAD_SCENARIOS) -> Dict:
+    """Load `target` (a base URL ending in /api), or the app in this process when None"""
+    import httpx
+    
+    # One INFO line per request would dominate the run
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    if target:
+        async with httpx.AsyncClient(base_url=target, limits=limits, timeout=30) as client:
+            report = await LoadGenerator(client, scenarios).run(concurrency, duration)
+        report["target"] = target
+        return report
+    
+    sys.path.insert(0, str(Path(__file__).parent / "backend"))
+    from server import app
+    
+    # ASGITransport does not run lifespan events, so start the app by hand
+    await app.router.startup()
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://app/api", timeout=30) as client:
+            report = await LoadGenerator(client, scenarios).run(concurrency, duration)
+    finally:
+        await app.router.shutdown()
+    report["target"] = f"in-process ({os.environ.get('STORAGE_BACKEND', 'mongo')})"
+    return report
+
+
+def compare_load_reports(baseline: Dict, current: Dict, tolerance: float) -> List[str]:
+    """Endpoints whose p95 or p99 grew by more than `tolerance` over the baseline"""
+    regressions = []
+    for label, stats in current["endpoints"].items():
+        previous = baseline.get("endpoints", {}).get(label)
+        if not previous:
+            continue
+        for key in ("p95_ms", "p99_ms"):
+            if previous[key] and stats[key] > previous[key] * (1 + tolerance):
+                regressions.append(f"{label} {key}: {previous[key]} -> {stats[key]}")
+    return regressions
+
+
+async def run_serialization_benchmark(count: int = 1000, rounds: int = 50) -> Dict:
+    """CPU time per request for a `count`-timer list and the template list,
+    on the standard path and with FAST_JSON_RESPONSES, in this process"""
+    import httpx
+    
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    sys.path.insert(0, str(Path(__file__).parent / "backend"))
+    import serialization
+    import server
+    
+    await server.app.router.startup()
+    fast_setting = server.FAST_JSON_RESPONSES
+    timer_ids = []
+    try:
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://app/api") as client:
+            await client.post("/init-templates")
+            for offset in range(0, count, 500):
+                operations = [
+                    {"op": "create", "timer": {"name": f"Bench {i}", "duration_seconds": 1500, "category": "bench"}}
+                    for i in range(offset, min(offset + 500, count))
+                ]
+                response = await client.post("/timers/bulk", json={"operations": operations})
+                timer_ids.extend(item['id'] for item in response.json())
+            # Half of them running, so remaining time is derived per request
+            for offset in range(0, len(timer_ids), 1000):
+                operations = [{"op": "update", "id": timer_id, "update": {"status": "running"}}
+                              for timer_id in timer_ids[offset:offset + 1000:2]]
+                await client.post("/timers/bulk", json={"operations": operations})
+            
+            report = {"timer_count": count, "rounds": rounds, "orjson": serialization.orjson is not None}
+            bodies = {}
+            for label, fast in (("standard", False), ("fast", True)):
+                server.FAST_JSON_RESPONSES = fast
+                for name, url in (("timers", f"/timers?limit={count}"), ("templates", "/templates")):
+                    for _ in range(3):
+                        await client.get(url)
+                    start = time.process_time()
+                    for _ in range(rounds):
+                        response = await client.get(url)
+                    cpu_ms = (time.process_time() - start) * 1000 / rounds
+                    report.setdefault(name, {})[f"{label}_cpu_ms"] = round(cpu_ms, 3)
+                    # Remaining time of running timers ticks between the two passes
+                    bodies[(name, label)] = [
+                        {k: v for k, v in item.items() if not (k == 'remaining_seconds' and item.get('status') == 'running')}
+                        for item in response.json()
+                    ]
+            
+            for name in ("timers", "templates"):
+                stats = report[name]
+                stats["speedup"] = round(stats["standard_cpu_ms"] / max(stats["fast_cpu_ms"], 1e-9), 2)
+                stats["identical"] = bodies[(name, "standard")] == bodies[(name, "fast")]
+            
+            for offset in range(0, len(timer_ids), 500):
+                await client.post("/timers/bulk", json={"operations": [
+                    {"op": "delete", "id": timer_id} for timer_id in timer_ids[offset:offset + 500]
+                ]})
+    finally:
+        server.FAST_JSON_RESPONSES = fast_setting
+        await server.app.router.shutdown()
+    return report
+
+
+def run_report_benchmark(count: int = 1_000_000, rounds: int = 5, budget_ms: float = 1000) -> Dict:
+    """Wall time of /stats/report's computation over `count` sessions, from the
+    column lists a store returns to the finished report"""
+    import numpy as np
+    
+    sys.path.insert(0, str(Path(__file__).parent / "backend"))
+    from models import ReportPeriod
+    from reports import build_report, report_range
+    from storage import SessionColumns
+    
+    rng = np.random.default_rng(7)
+    now = datetime(2026, 3, 11, 15, 30)
+    report = {"session_count": count, "rounds": rounds, "budget_ms": budget_ms}
+    for period, periods in ((ReportPeriod.WEEK, 12), (ReportPeriod.MONTH, 12)):
+        fetch_from, _, _ = report_range(now, period, periods, 7)
+        span = int((now - fetch_from).total_seconds())
+        dates = np.datetime64(fetch_from, "us") + rng.integers(0, span, count).astype("timedelta64[s]")
+        columns = SessionColumns(
+            dates.astype(object).tolist(),
+            rng.choice(["productivity", "break", "tasks", "study", "exercise"], count).tolist(),
+            rng.integers(0, 5400, count).tolist()
+        )
+        timings = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            result = build_report(columns, period, "America/New_York", periods, 7, now)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        report[period.value] = {
+            "periods": periods,
+            "best_ms": round(timings[0], 1),
+            "median_ms": round(timings[len(timings) // 2], 1),
+            "sessions_reported": result.total_sessions,
+            "within_budget": timings[len(timings) // 2] < budget_ms,
+        }
+    return report
+
+
+async def run_session_layout_benchmark(count: int = 100_000, users: int = 10, days: int = 180,
+                                       rounds: int = 5) -> Dict:
+    """Storage size and stats query latency of the document and bucket session
+    layouts, with `count` sessions of `users` tenants spread over `days` days,
+    in a scratch database on MONGO_URL"""
+    sys.path.insert(0, str(Path(__file__).parent / "backend"))
+    from bson import encode
+    from pymongo.errors import OperationFailure
+    from models import TimerSession
+    from storage.mongo import SESSION_LAYOUTS, MongoStorage
+    
+    rng = random.Random(7)
+    now = datetime(2026, 3, 11, 15, 30)
+    sessions = []
+    for i in range(count):
+        duration = rng.choice([300, 900, 1500, 5400])
+        # Whole seconds, as MongoDB keeps only milliseconds
+        session_date = now - timedelta(seconds=rng.randint(0, days * 86400))
+        sessions.append(TimerSession(
+            user_id=f"user-{i % users}", timer_id=str(uuid.uuid4()),
+            timer_name=rng.choice(["Pomodoro Work", "Deep Work", "Short Break"]),
+            category=rng.choice(["productivity", "break", "tasks"]), duration_seconds=duration,
+            completed_seconds=rng.randint(0, duration), started_at=session_date - timedelta(seconds=duration),
+            completed_at=session_date, session_date=session_date
+        ))
+    
+    storage = MongoStorage(os.environ.get('MONGO_URL', 'mongodb://localhost:27017'),
+                           f"{os.environ.get('DB_NAME', 'test_database')}_layout_benchmark")
+    report = {"session_count": count, "users": users, "days": days, "rounds": rounds, "layouts": {}}
+    results = {}
+    try:
+        await storage.client.drop_database(storage.db.name)
+        await storage.connect()
+        for layout, collection in (("documents", "timer_sessions"), ("buckets", "session_buckets")):
+            repository = SESSION_LAYOUTS[layout](storage.db)
+            start = time.perf_counter()
+            for offset in range(0, count, 1000):
+                await repository.store(sessions[offset:offset + 1000])
+            stats = {"write_seconds": round(time.perf_counter() - start, 2)}
+            
+            try:
+                coll_stats = await storage.db.command({"collStats": collection})
+                stats.update({key: coll_stats[key] for key in ("count", "size", "storageSize", "totalIndexSize")})
+            except OperationFailure:
+                stats["count"] = await storage.db[collection].count_documents({})
+            stats["bson_bytes"] = 0
+            async for doc in storage.db[collection].find({}):
+                stats["bson_bytes"] += len(encode(doc))
+            
+            user_id = "user-0"
+            queries = {
+                "count": lambda: repository.count(user_id),
+                "range_day_30d": lambda: repository.aggregate_range(
+                    user_id, now - timedelta(days=30), now, "day", "UTC"),
+                "range_hour_7d": lambda: repository.aggregate_range(
+                    user_id, now - timedelta(days=7), now, "hour", "Europe/Berlin"),
+                "report_columns_12w": lambda: repository.read_columns(user_id, now - timedelta(weeks=12), now),
+                "rebuild_rollup_groups": repository.rollup_groups,
+            }
+            for name, query in queries.items():
+                timings = []
+                for _ in range(rounds):
+                    start = time.perf_counter()
+                    results[(layout, name)] = await query()
+                    timings.append((time.perf_counter() - start) * 1000)
+                stats[f"{name}_ms"] = round(sorted(timings)[rounds // 2], 2)
+            report["layouts"][layout] = stats
+        
+        documents, buckets = report["layouts"]["documents"], report["layouts"]["buckets"]
+        report["bson_ratio"] = round(buckets["bson_bytes"] / max(documents["bson_bytes"], 1), 3)
+        
+        def normalized(name, result):
+            if name == "count":
+                return result
+            # Column lists compare row by row, groups as tuples, in any order
+            return sorted(zip(*result) if name == "report_columns_12w" else map(tuple, result))
+        
+        report["identical"] = all(
+            normalized(name, results[("documents", name)]) == normalized(name, results[("buckets", name)])
+            for name in queries
+        )
+    finally:
+        await storage.client.drop_database(storage.db.name)
+        await storage.close()
+    return report
+
+
 def main():
     """Main test execution"""
-    tester = PowerTimerAPITester()
-    results = tester.run_all_tests()
+    parser = argparse.ArgumentParser(description="Power Timer backend API tests")
+    parser.add_argument("--in-process", action="store_true",
+                        help="test the app in this process instead of BACKEND_URL")
+    parser.add_argument("--load", action="store_true",
+                        help="run the concurrent load benchmark instead of the functional tests")
+    parser.add_argument("--url", help="base URL to load, e.g. http://localhost:8000/api "
+                                      "(default: BACKEND_URL, or the app in this process with --in-process)")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=30, help="seconds")
+    parser.add_argument("--scenario", action="append", choices=LOAD_SCENARIOS,
+                        help="scenario to run; repeat for several (default: all)")
+    parser.add_argument("--output", default="load_results",
+                        help="directory the JSON report is saved in")
+    parser.add_argument("--baseline", help="earlier JSON report to compare p95/p99 latencies against")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed latency growth over the baseline (0.2 = 20%%)")
+    parser.add_argument("--serialization-benchmark", action="store_true",
+                        help="compare per-request CPU of the standard and fast JSON paths in this process")
+    parser.add_argument("--report-benchmark", action="store_true",
+                        help="time the productivity report computation over a million sessions")
+    parser.add_argument("--session-layout-benchmark", action="store_true",
+                        help="compare size and query latency of the session layouts on MONGO_URL")
+    parser.add_argument("--sessions", type=int, default=100_000,
+                        help="sessions stored per layout by --session-layout-benchmark")
+    parser.add_argument("--users", type=int, default=10, help="tenants the benchmark sessions belong to")
+    parser.add_argument("--days", type=int, default=180, help="days the benchmark sessions are spread over")
+    args = parser.parse_args()
+    
+    if args.session_layout_benchmark:
+        report = asyncio.run(run_session_layout_benchmark(args.sessions, args.users, args.days))
+        print(json.dumps(report, indent=2))
+        return 0 if report["identical"] else 1
+    
+    if args.report_benchmark:
+        report = run_report_benchmark()
+        print(json.dumps(report, indent=2))
+        return 0 if all(report[period]["within_budget"] for period in ("week", "month")) else 1
+    
+    if args.serialization_benchmark:
+        report = asyncio.run(run_serialization_benchmark())
+        print(json.dumps(report, indent=2))
+        return 0 if report["timers"]["identical"] and report["templates"]["identical"] else 1
+    
+    if args.load:
+        target = None if args.in_process and not args.url else (args.url or BACKEND_URL)
+        report = asyncio.run(run_load(target, args.concurrency, args.duration,
+                                      tuple(args.scenario or LOAD_SCENARIOS)))
+        print(json.dumps(report, indent=2))
+        
+        output = Path(args.output)
+        output.mkdir(parents=True, exist_ok=True)
+        path = output / f"load-{report['started_at'][:19].replace(':', '')}.json"
+        path.write_text(json.dumps(report, indent=2))
+        print(f"Saved report to {path}", file=sys.stderr)
+        
+        if args.baseline:
+            baseline = json.loads(Path(args.baseline).read_text())
+            regressions = compare_load_reports(baseline, report, args.tolerance)
+            for regression in regressions:
+                print(f"REGRESSION {regression}", file=sys.stderr)
+            return 1 if regressions else 0
+        return 1 if report["errors"] else 0
+    
+    if args.in_process:
+        results = run_in_process()
+    else:
+        results = PowerTimerAPITester().run_all_tests()
     
     # Return exit code based on results
     if 'error' in results:
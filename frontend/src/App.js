@@ -15,9 +15,11 @@ const API = BACKEND_URL; // Now API is directly "http://localhost:8000/api"
 export const api = {
   // Timers
   getTimers: () => axios.get(`${API}/timers`),
+  getTimerChanges: (since) => axios.get(`${API}/timers/changes`, { params: { since } }),
   createTimer: (data) => axios.post(`${API}/timers`, data),
   updateTimer: (id, data) => axios.patch(`${API}/timers/${id}`, data),
   deleteTimer: (id) => axios.delete(`${API}/timers/${id}`),
+  streamTimers: () => new EventSource(`${API}/timers/stream`),
   
   // Templates
   getTemplates: () => axios.get(`${API}/templates`),
@@ -27,6 +29,7 @@ export const api = {
   
   // Stats
   getStats: () => axios.get(`${API}/stats`),
+  getStatsRange: (params) => axios.get(`${API}/stats/range`, { params }),
 };
 
 function App() {
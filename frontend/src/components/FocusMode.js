@@ -17,43 +17,44 @@ const FocusMode = ({ timer, onExit }) => {
       Notification.requestPermission();
     }
 
-    // Update timer every second if running
+    // Count down every second if running; display only, the server completes the timer
     const interval = setInterval(() => {
       setCurrentTimer(prev => {
         if (!prev || prev.status !== 'running') {
           return prev; // Stop updating if timer is null or not running
         }
-        const newRemaining = Math.max(0, prev.remaining_seconds - 1);
-        if (newRemaining === 0) {
-          completeTimer();
-          return { ...prev, remaining_seconds: 0, status: 'completed' };
-        }
-        return { ...prev, remaining_seconds: newRemaining };
+        return { ...prev, remaining_seconds: Math.max(0, prev.remaining_seconds - 1) };
       });
     }, 1000);
 
     return () => clearInterval(interval);
   }, [currentTimer?.status]); // Depend on currentTimer.status to re-run effect when it changes
 
-  const completeTimer = async () => {
-    try {
-      if (currentTimer) { // Ensure currentTimer exists before API call
-        await api.updateTimer(currentTimer.id, { status: 'completed' });
-
-        // Show notification
-        if (Notification.permission === 'granted') {
-          new Notification('🎉 Timer Completed!', {
-            body: `${currentTimer.name} has finished. Great work!`,
-            icon: '/favicon.ico'
-          });
-        }
+  useEffect(() => {
+    // The server completes the timer at its deadline and announces it on the stream
+    const stream = api.streamTimers();
+    const onChange = (event) => {
+      const changed = JSON.parse(event.data);
+      if (changed.id !== timer.id) return;
+      setCurrentTimer(changed);
+      if (event.type === 'completed') notifyCompleted(changed);
+    };
+    stream.addEventListener('updated', onChange);
+    stream.addEventListener('completed', onChange);
+    return () => stream.close();
+  }, [timer.id]);
 
-        // Play completion sound (you can add actual audio here)
-        console.log('Timer completed in focus mode!');
-      }
-    } catch (error) {
-      console.error('Error completing timer:', error);
+  const notifyCompleted = (completed) => {
+    // Show notification
+    if (Notification.permission === 'granted') {
+      new Notification('🎉 Timer Completed!', {
+        body: `${completed.name} has finished. Great work!`,
+        icon: '/favicon.ico'
+      });
     }
+
+    // Play completion sound (you can add actual audio here)
+    console.log('Timer completed in focus mode!');
   };
 
   const toggleTimer = async () => {
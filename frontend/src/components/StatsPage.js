@@ -2,14 +2,42 @@ import React, { useState, useEffect } from 'react';
 import { BarChart3, Clock, Calendar, Target, TrendingUp, Award } from 'lucide-react';
 import { api } from '../App';
 
+const TREND_RANGES = {
+  week: { label: 'Last 7 days', granularity: 'day', days: 7 },
+  quarter: { label: 'Last 12 weeks', granularity: 'week', days: 84 },
+};
+
 const StatsPage = () => {
   const [stats, setStats] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [trendRange, setTrendRange] = useState('week');
+  const [trend, setTrend] = useState([]);
 
   useEffect(() => {
     loadStats();
   }, []);
 
+  useEffect(() => {
+    loadTrend(trendRange);
+  }, [trendRange]);
+
+  const loadTrend = async (rangeKey) => {
+    const range = TREND_RANGES[rangeKey];
+    const to = new Date();
+    const from = new Date(to.getTime() - range.days * 24 * 60 * 60 * 1000);
+    try {
+      const response = await api.getStatsRange({
+        from: from.toISOString(),
+        to: to.toISOString(),
+        granularity: range.granularity,
+        tz: Intl.DateTimeFormat().resolvedOptions().timeZone,
+      });
+      setTrend(response.data.buckets);
+    } catch (error) {
+      console.error('Error loading trend:', error);
+    }
+  };
+
   const loadStats = async () => {
     try {
       const response = await api.getStats();
@@ -187,6 +215,53 @@ const StatsPage = () => {
         )}
       </div>
 
+      {/* Trends */}
+      <div className="mt-8 bg-gradient-to-br from-white/5 to-white/10 backdrop-blur-md border border-white/20 rounded-2xl p-6 sm:p-8 shadow-2xl">
+        <div className="flex flex-col sm:flex-row sm:items-center sm:justify-between mb-6 space-y-3 sm:space-y-0">
+          <div className="flex items-center space-x-2">
+            <Calendar className="h-6 w-6 text-purple-400" />
+            <h2 className="text-xl sm:text-2xl font-bold text-white">Trends</h2>
+          </div>
+          <div className="flex space-x-2">
+            {Object.entries(TREND_RANGES).map(([key, range]) => (
+              <button
+                key={key}
+                onClick={() => setTrendRange(key)}
+                className={`px-3 py-1 rounded-lg text-sm font-medium transition-colors ${
+                  trendRange === key ? 'bg-purple-600 text-white' : 'bg-white/10 text-gray-300 hover:bg-white/20'
+                }`}
+              >
+                {range.label}
+              </button>
+            ))}
+          </div>
+        </div>
+
+        {trend.length > 0 ? (
+          <div className="space-y-3">
+            {trend.map((bucket) => {
+              const maxTime = Math.max(...trend.map((b) => b.time_seconds), 1);
+              const label = new Date(bucket.start).toLocaleDateString(undefined, { month: 'short', day: 'numeric' });
+
+              return (
+                <div key={bucket.start} className="flex items-center space-x-4">
+                  <span className="w-16 text-gray-400 text-sm">{label}</span>
+                  <div className="flex-1 bg-gray-700 rounded-full h-2">
+                    <div
+                      className="h-2 rounded-full bg-gradient-to-r from-blue-500 to-purple-600 transition-all duration-500"
+                      style={{ width: `${(bucket.time_seconds / maxTime) * 100}%` }}
+                    ></div>
+                  </div>
+                  <span className="w-20 text-right text-white text-sm">{formatTime(bucket.time_seconds)}</span>
+                </div>
+              );
+            })}
+          </div>
+        ) : (
+          <p className="text-center text-gray-400 text-base sm:text-lg py-8">No sessions in this period</p>
+        )}
+      </div>
+
       {/* Productivity Insights */}
       <div className="mt-8 bg-gradient-to-br from-white/5 to-white/10 backdrop-blur-md border border-white/20 rounded-2xl p-6 sm:p-8 shadow-2xl"> {/* Responsive padding */}
         <h2 className="text-xl sm:text-2xl font-bold text-white mb-4 flex items-center space-x-2"> {/* Responsive font size */}
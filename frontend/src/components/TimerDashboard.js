@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { Plus, Play, Pause, Square, Trash2, Maximize2, Clock, Coffee, Brain, Zap } from 'lucide-react';
 import { CircularProgressbar, buildStyles } from 'react-circular-progressbar';
 import 'react-circular-progressbar/dist/styles.css';
@@ -12,13 +12,50 @@ const TimerDashboard = ({ onFocusMode }) => {
   const [showCreateModal, setShowCreateModal] = useState(false);
   const [showTemplates, setShowTemplates] = useState(false);
   const [loading, setLoading] = useState(true);
+  const changesToken = useRef(null);
 
   useEffect(() => {
     loadData();
 
     // Update timers every second
     const interval = setInterval(updateActiveTimers, 1000);
-    return () => clearInterval(interval);
+
+    // Keep in sync with changes made from other tabs and devices
+    const stream = api.streamTimers();
+    const upsertTimer = (event) => {
+      const changed = JSON.parse(event.data);
+      setTimers(currentTimers => {
+        if (changed.status === 'completed') {
+          return currentTimers.map(t => t.id === changed.id ? changed : t);
+        }
+        return currentTimers.some(t => t.id === changed.id)
+          ? currentTimers.map(t => t.id === changed.id ? changed : t)
+          : [...currentTimers, changed];
+      });
+    };
+    stream.addEventListener('created', upsertTimer);
+    stream.addEventListener('updated', upsertTimer);
+    // The server completes timers when they run out; this is the only place the client learns of it
+    stream.addEventListener('completed', (event) => {
+      upsertTimer(event);
+      notifyCompleted();
+    });
+    stream.addEventListener('deleted', (event) => {
+      const { id } = JSON.parse(event.data);
+      setTimers(currentTimers => currentTimers.filter(t => t.id !== id));
+    });
+    stream.addEventListener('resync', syncChanges);
+    // Catch up on whatever happened while the stream was reconnecting
+    let connected = false;
+    stream.addEventListener('open', () => {
+      if (connected) syncChanges();
+      connected = true;
+    });
+
+    return () => {
+      clearInterval(interval);
+      stream.close();
+    };
   }, []);
 
   const loadData = async () => {
@@ -27,6 +64,7 @@ const TimerDashboard = ({ onFocusMode }) => {
         api.getTimers(),
         api.getTemplates()
       ]);
+      changesToken.current = timersRes.headers['x-changes-token'] || null;
       setTimers(timersRes.data);
       setTemplates(templatesRes.data);
     } catch (error) {
@@ -36,37 +74,51 @@ const TimerDashboard = ({ onFocusMode }) => {
     }
   };
 
+  const syncChanges = async () => {
+    if (!changesToken.current) {
+      return loadData();
+    }
+    try {
+      const { data } = await api.getTimerChanges(changesToken.current);
+      changesToken.current = data.token;
+      const changed = new Map(data.timers.map(t => [t.id, t]));
+      const deleted = new Set(data.deleted);
+      setTimers(currentTimers => {
+        const kept = currentTimers
+          .filter(t => !deleted.has(t.id))
+          .map(t => changed.get(t.id) || t);
+        const known = new Set(kept.map(t => t.id));
+        // Timers completed before we ever saw them are not worth adding
+        const added = data.timers.filter(t => !known.has(t.id) && !deleted.has(t.id) && t.status !== 'completed');
+        return [...kept, ...added];
+      });
+    } catch (error) {
+      // Token too old or too many changes: fall back to a full reload
+      await loadData();
+    }
+  };
+
   const updateActiveTimers = () => {
+    // Display only: a running timer holds at zero until the server's completed event arrives
     setTimers(currentTimers =>
       currentTimers.map(timer => {
         if (timer.status === 'running') {
-          const newRemaining = Math.max(0, timer.remaining_seconds - 1);
-          if (newRemaining === 0) {
-            // Timer completed
-            completeTimer(timer.id);
-            return { ...timer, remaining_seconds: 0, status: 'completed' };
-          }
-          return { ...timer, remaining_seconds: newRemaining };
+          return { ...timer, remaining_seconds: Math.max(0, timer.remaining_seconds - 1) };
         }
         return timer;
       })
     );
   };
 
-  const completeTimer = async (timerId) => {
-    try {
-      await api.updateTimer(timerId, { status: 'completed' });
-      // Play completion sound (you can add actual sound here)
-      console.log('Timer completed!');
-      // Show notification
-      if (Notification.permission === 'granted') {
-        new Notification('Timer Completed!', {
-          body: 'Your timer has finished.',
-          icon: '/favicon.ico'
-        });
-      }
-    } catch (error) {
-      console.error('Error completing timer:', error);
+  const notifyCompleted = () => {
+    // Play completion sound (you can add actual sound here)
+    console.log('Timer completed!');
+    // Show notification
+    if (Notification.permission === 'granted') {
+      new Notification('Timer Completed!', {
+        body: 'Your timer has finished.',
+        icon: '/favicon.ico'
+      });
     }
   };
 